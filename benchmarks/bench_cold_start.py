@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+bench_cold_start.py — tempo de partida a frio dos pontos de entrada.
+
+Cada medição roda num processo Python novo (como um worker acordando
+depois de escalar para zero, ou o .exe do desktop sendo aberto):
+  web      import de web/app.py e tempo até a 1ª resposta (GET / e /health)
+  desktop  import de desktop/Agendamentos_FCJA.py e tempo até a janela de login
+Não precisa de Supabase: sem .env os clientes simplesmente não são criados.
+
+    python benchmarks/bench_cold_start.py [-n 5] [--alvo web|desktop|todos] [--top 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+WEB = r"""
+import json, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+from web.app import app
+t_import = time.perf_counter()
+cli = app.test_client()
+status = cli.get("/").status_code
+t_resp = time.perf_counter()
+cli.get("/health")
+t_health = time.perf_counter()
+print(json.dumps({{
+    "import_s": t_import - t0,
+    "primeira_resposta_s": t_resp - t0,
+    "health_s": t_health - t_resp,
+    "status": status,
+    "modulos": len(sys.modules),
+}}))
+"""
+
+DESKTOP = r"""
+import json, runpy, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, {root!r})
+runpy.run_path({root!r} + "/desktop/Agendamentos_FCJA.py", run_name="bench")
+t_import = time.perf_counter()
+saida = {{"import_s": t_import - t0, "modulos": len(sys.modules)}}
+try:
+    admin = sys.modules["desktop.admin"]  # login e janela: desktop/admin.py
+    root = admin.tb.Window(themename="flatly")
+    root.withdraw()
+    dlg = admin.LoginDialog(root)
+    dlg.update()
+    saida["janela_login_s"] = time.perf_counter() - t0
+    root.destroy()
+except Exception as e:  # sem display (servidor, CI)
+    saida["janela_login_s"] = None
+    saida["aviso"] = str(e)
+print(json.dumps(saida))
+"""
+
+
+def rodar(codigo: str) -> dict:
+    t0 = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", codigo.format(root=ROOT)],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    parede = time.perf_counter() - t0
+    if out.returncode != 0:
+        raise SystemExit(out.stderr.strip().splitlines()[-1] if out.stderr else "falhou")
+    dados = json.loads(out.stdout.strip().splitlines()[-1])
+    dados["processo_s"] = parede
+    return dados
+
+
+def top_imports(modulo: str, n: int) -> None:
+    """Os `n` módulos mais caros de importar (python -X importtime)."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {ROOT!r}); import {modulo}"],
+        capture_output=True,
+        text=True,
+        cwd=ROOT,
+    )
+    linhas = []
+    for linha in out.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        linhas.append((int(cumulativo), nome))
+    linhas.sort(reverse=True)
+    print(f"\n  mais caros ao importar {modulo} (cumulativo):")
+    for us, nome in linhas[:n]:
+        print(f"    {us / 1000:8.1f} ms  {nome.strip()}")
+
+
+def resumo(nome: str, amostras: list) -> None:
+    print(f"\n{nome} ({len(amostras)} execuções, mediana / mín)")
+    for chave in amostras[0]:
+        vals = [a[chave] for a in amostras if isinstance(a.get(chave), (int, float))]
+        if not vals or chave == "status":
+            continue
+        if chave == "modulos":
+            print(f"  {chave:22s} {int(statistics.median(vals))}")
+        else:
+            print(f"  {chave:22s} {statistics.median(vals) * 1000:8.1f} ms  / {min(vals) * 1000:8.1f} ms")
+    avisos = {a["aviso"] for a in amostras if a.get("aviso")}
+    for a in avisos:
+        print(f"  aviso: {a}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("-n", type=int, default=5, help="execuções por alvo")
+    ap.add_argument("--alvo", choices=["web", "desktop", "todos"], default="todos")
+    ap.add_argument("--top", type=int, default=0, help="mostra os N imports mais caros")
+    args = ap.parse_args()
+
+    if args.alvo in ("web", "todos"):
+        resumo("web/app.py", [rodar(WEB) for _ in range(args.n)])
+        if args.top:
+            top_imports("web.app", args.top)
+    if args.alvo in ("desktop", "todos"):
+        resumo("desktop/Agendamentos_FCJA.py", [rodar(DESKTOP) for _ in range(args.n)])
+        if args.top:
+            top_imports("desktop.Agendamentos_FCJA", args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+bench_esquema.py — custo de CPU e de alocação por envio de formulário.
+
+Compara o caminho antigo (validações soltas + dict do app + dict do
+database.insert_*) com o pipeline do esquema (Tabela.preparar).
+Não acessa o banco: mede só validação e montagem do payload.
+
+    python benchmarks/bench_esquema.py [-n 20000]
+"""
+import argparse
+import os
+import sys
+import timeit
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.esquema import ESQUEMAS  # noqa: E402
+from utils.validacoes import (  # noqa: E402
+    validar_email,
+    validar_telefone,
+    validar_data_visita,
+    normalizar_turno,
+)
+
+FORM = {
+    "nome_escola": "Escola Estadual Lyceu Paraibano",
+    "representante": "Maria José",
+    "email": "contato@escola.pb.gov.br",
+    "telefone": "(83) 99999-8888",
+    "endereco": "Av. Getúlio Vargas, s/n",
+    "num_alunos": "35",
+    "data": "2026-10-20",
+    "turno": "manha",
+    "horario_chegada": "09:30",
+    "duracao": "1h30",
+    "observacao": "",
+}
+
+
+def _safe_int(value, default=0):
+    try:
+        return int(value)
+    except Exception:
+        return default
+
+
+def caminho_antigo(form):
+    """Reprodução do fluxo anterior de agendar_submit + database.insert_escola."""
+    data = dict(form)  # request.form.to_dict()
+    turno = normalizar_turno(data.get("turno"))
+    data_str = (data.get("data") or "").strip()
+    d = datetime.strptime(data_str, "%Y-%m-%d").date()
+    if not turno or not d or not validar_data_visita(data_str):
+        return None
+    if not validar_email(data.get("email", "")) or not validar_telefone(data.get("telefone", "")):
+        return None
+    intermediario = {
+        "nome_escola": data.get("nome_escola"),
+        "representante": data.get("representante"),
+        "email": data.get("email"),
+        "telefone": data.get("telefone"),
+        "endereco": data.get("endereco"),
+        "num_alunos": _safe_int(data.get("num_alunos"), 0),
+        "data": d.isoformat(),
+        "turno": turno,
+        "horario_chegada": data.get("horario_chegada"),
+        "duracao": data.get("duracao"),
+        "observacao": data.get("observacao"),
+    }
+    return {
+        "nome_escola": intermediario.get("nome_escola") or "",
+        "representante": intermediario.get("representante") or "",
+        "email": intermediario.get("email") or "",
+        "telefone": intermediario.get("telefone") or "",
+        "endereco": intermediario.get("endereco") or "",
+        "num_alunos": int(intermediario.get("num_alunos") or 0),
+        "data": intermediario.get("data"),
+        "turno": intermediario.get("turno") or "",
+        "horario_chegada": intermediario.get("horario_chegada") or "",
+        "duracao": intermediario.get("duracao") or "",
+        "observacao": intermediario.get("observacao") or "",
+    }
+
+
+def caminho_esquema(form, _preparar=ESQUEMAS["escola"].preparar):
+    payload, _erro = _preparar(form)
+    return payload
+
+
+def _alocacao(fn, n):
+    """Bytes alocados (pico) e blocos vivos por chamada."""
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(n):
+        fn(FORM)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return pico - base
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=20000)
+    args = ap.parse_args()
+
+    assert caminho_antigo(FORM) == caminho_esquema(FORM), "payloads divergentes"
+
+    print(f"{'caminho':<10} {'µs/envio':>10} {'pico alocado (B)':>18}")
+    for nome, fn in (("antigo", caminho_antigo), ("esquema", caminho_esquema)):
+        t = min(timeit.repeat(lambda: fn(FORM), number=args.n, repeat=5)) / args.n
+        pico = _alocacao(fn, 1000)
+        print(f"{nome:<10} {t * 1e6:>10.2f} {pico:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+bench_validacoes.py — validação de muitos registros (importação/exportação).
+
+Compara, sobre o mesmo conjunto de linhas (datas espalhadas por um ano,
+~10% inválidas):
+  antigo     validações de antes (regex compilada a cada chamada, strptime por data)
+  registro   Tabela.preparar() linha a linha
+  lote       Tabela.preparar_lote() (validar_lote + payload só dos válidos)
+  mascaras   só validar_lote() (máscaras de erro, sem montar payloads)
+
+    python benchmarks/bench_validacoes.py [-n 200000]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.esquema import ESQUEMAS  # noqa: E402
+from utils.validacoes import validar_lote, _parse_str  # noqa: E402
+
+
+# ---------- reprodução das validações anteriores ----------
+def _antigo_data_visita(s):
+    try:
+        return datetime.strptime(s, "%Y-%m-%d").weekday() in [1, 2, 3, 4, 5, 6]
+    except Exception:
+        return False
+
+
+def _antigo_email(e):
+    return re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", e or "") is not None
+
+
+def _antigo_telefone(t):
+    if not t:
+        return False
+    s = t.strip()
+    pattern = re.compile(r'''
+        ^(?:\+?55[\s-]*)?
+        (?:\(?\d{2}\)?[\s-]*)?
+        (?:\d{4,5}[-\s]?\d{4})$
+    ''', re.VERBOSE)
+    if pattern.match(s):
+        return True
+    return 8 <= len(re.sub(r'\D', '', s)) <= 11
+
+
+def _antigo_turno(t):
+    t = (t or "").strip().lower()
+    if t in {"manha", "manhã"}:
+        return "manhã"
+    return "tarde" if t == "tarde" else None
+
+
+def caminho_antigo(registros, _payload=ESQUEMAS["escola"].payload):
+    saida = []
+    for reg in registros:
+        turno = _antigo_turno(reg.get("turno"))
+        s = (reg.get("data") or "").strip()
+        if "/" in s:
+            try:
+                s = datetime.strptime(s, "%d/%m/%Y").date().isoformat()
+            except Exception:
+                s = ""
+        if not turno or not _antigo_data_visita(s):
+            saida.append((None, "erro"))
+            continue
+        if not _antigo_email(reg.get("email")) or not _antigo_telefone(reg.get("telefone")):
+            saida.append((None, "erro"))
+            continue
+        p = _payload(reg)
+        p["data"], p["turno"] = s, turno
+        saida.append((p, None))
+    return saida
+
+
+def caminho_registro(registros, _preparar=ESQUEMAS["escola"].preparar):
+    return [_preparar(r) for r in registros]
+
+
+def caminho_lote(registros):
+    return ESQUEMAS["escola"].preparar_lote(registros)
+
+
+def caminho_mascaras(registros):
+    return validar_lote(registros, "visita")
+
+
+# ---------- dados ----------
+def gerar(n, seed=42):
+    rnd = random.Random(seed)
+    inicio = date(2026, 1, 1)
+    regs = []
+    for i in range(n):
+        d = inicio + timedelta(days=rnd.randrange(365))
+        reg = {
+            "nome_escola": f"Escola {i}",
+            "representante": "Maria José",
+            "email": f"contato{i}@escola.pb.gov.br",
+            "telefone": rnd.choice(["(83) 99999-8888", "83 3214 5566", "+55 83 98888-7777"]),
+            "num_alunos": str(rnd.randrange(10, 60)),
+            "data": d.isoformat() if rnd.random() < 0.7 else d.strftime("%d/%m/%Y"),
+            "turno": rnd.choice(["manha", "Manhã", "tarde"]),
+        }
+        if rnd.random() < 0.1:
+            reg[rnd.choice(["email", "telefone", "data", "turno"])] = "x"
+        regs.append(reg)
+    return regs
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-n", type=int, default=200000)
+    args = ap.parse_args()
+
+    regs = gerar(args.n)
+    validos = sum(1 for p, _ in caminho_lote(regs) if p)
+    assert validos == sum(1 for p, _ in caminho_registro(regs) if p), "resultados divergentes"
+    print(f"{args.n} registros, {validos} válidos\n")
+
+    print(f"{'caminho':<10} {'total (s)':>10} {'µs/registro':>12} {'registros/s':>13}")
+    for nome, fn in (
+        ("antigo", caminho_antigo),
+        ("registro", caminho_registro),
+        ("lote", caminho_lote),
+        ("mascaras", caminho_mascaras),
+    ):
+        _parse_str.cache_clear()  # cada caminho começa com o cache de datas frio
+        t0 = time.perf_counter()
+        fn(regs)
+        t = time.perf_counter() - t0
+        print(f"{nome:<10} {t:>10.3f} {t / args.n * 1e6:>12.2f} {args.n / t:>13,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,17 +6,39 @@ Se possível usa supabase-py (anon key). Para listar todas as tabelas
 """
 import os
 import argparse
-from dotenv import load_dotenv
-import json
-import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.env import carregar_env
 
 # Carrega .env localmente (se houver)
-load_dotenv()
+carregar_env()
 
 # Importa supabase client (crie supabase_client.py conforme instruído)
-from supabase_client import supabase
+from supabase_client import get_client
+from models.esquema import ESQUEMAS
+from utils.busca import sql_indice
+from utils.capacidade import sql_capacidade
+from utils.spool import sql_chave_envio
+from utils.exportacao import (
+    FORMATOS,
+    TAMANHO_PAGINA,
+    MarcasDagua,
+    Progresso,
+    ResultadoExportacao,
+    exportar,
+    faixas_id,
+    exportar_postgres,
+    fonte_supabase,
+    formato_parte,
+    juntar_partes,
+    limites_postgres,
+    limites_supabase,
+    planejar,
+    restaurar_postgres,
+)
 
 # Importa psycopg2 apenas para operações administrativas (fallback)
 try:
@@ -82,7 +104,7 @@ def show_table(table: str, limit: int = 10) -> List[Dict[str, Any]]:
     """
     try:
         # usa order e limit via supabase-py
-        resp = supabase.table(table).select("*").order("id", desc=True).limit(limit).execute()
+        resp = get_client().table(table).select("*").order("id", desc=True).limit(limit).execute()
         data = resp.data or []
         # Supabase já retorna dicionários compatíveis
         for i, row in enumerate(data, start=1):
@@ -95,8 +117,13 @@ def show_table(table: str, limit: int = 10) -> List[Dict[str, Any]]:
         # fallback: tentar via psycopg2 se disponível
         if psycopg2 and DATABASE_URL:
             try:
+                from psycopg2 import sql
+
                 with get_conn() as conn, conn.cursor() as cur:
-                    cur.execute(f"SELECT * FROM {table} ORDER BY id DESC LIMIT %s", (limit,))
+                    cur.execute(
+                        sql.SQL("SELECT * FROM {} ORDER BY id DESC LIMIT %s").format(sql.Identifier(table)),
+                        (limit,),
+                    )
                     regs = cur.fetchall()
                 for i, row in enumerate(regs, start=1):
                     print(f"[{i}]")
@@ -108,95 +135,331 @@ def show_table(table: str, limit: int = 10) -> List[Dict[str, Any]]:
         return []
 
 
-def export_table(table: str, fmt: str, out: Optional[str], limit: Optional[int]):
+def _exportar_faixa(
+    table: str,
+    fmt: str,
+    out_path: Path,
+    limit: Optional[int],
+    pagina: int,
+    prog: Progresso,
+    apos_id: Optional[int] = None,
+    ate_id: Optional[int] = None,
+    anexar: bool = False,
+    desc: bool = False,
+) -> Optional[ResultadoExportacao]:
     """
-    Exporta uma tabela para CSV ou JSON usando Supabase como primeira opção.
+    Exporta os ids (apos_id, ate_id] da tabela: Supabase primeiro; se falhar,
+    psycopg2 (COPY para CSV, cursor nomeado para JSON/JSONL). Com `desc`, do
+    maior id para o menor (`limit` = as linhas mais recentes).
     """
-    fmt = fmt.lower()
-    if fmt not in {"csv", "json"}:
-        raise ValueError("Formato inválido. Use csv ou json.")
+    cli = get_client()
+    if cli is not None:
+        try:
+            return exportar(
+                fonte_supabase(cli, table, ate_id=ate_id, desc=desc), table, fmt, out_path, limit, pagina, apos_id, prog, anexar
+            )
+        except Exception as e:
+            print(f"Erro ao exportar '{table}' via Supabase, tentando fallback psycopg2: {e}")
+            prog.linhas = 0
 
-    export_dir = Path("export")
-    export_dir.mkdir(exist_ok=True)
-    out_path = Path(out) if out else export_dir / f"{table}.{fmt}"
+    if psycopg2 and DATABASE_URL:
+        conn = get_conn()
+        try:
+            return exportar_postgres(conn, table, fmt, out_path, limit, pagina, apos_id, ate_id, prog, anexar, desc)
+        finally:
+            conn.close()
+    return None
 
-    # monta query via supabase (usa limit se passado)
-    try:
-        q = supabase.table(table).select("*").order("id", desc=True)
-        if isinstance(limit, int) and limit > 0:
-            q = q.limit(limit)
-        resp = q.execute()
-        regs = resp.data or []
-    except Exception as e:
-        print(f"Erro ao exportar '{table}' via Supabase, tentando fallback psycopg2: {e}")
-        # fallback psycopg2
-        if psycopg2 and DATABASE_URL:
-            with get_conn() as conn, conn.cursor() as cur:
-                sql = f"SELECT * FROM {table} ORDER BY id DESC"
-                params = ()
-                if isinstance(limit, int) and limit > 0:
-                    sql += " LIMIT %s"
-                    params = (limit,)
-                cur.execute(sql, params)
-                regs = cur.fetchall()
-        else:
-            regs = []
-
-    # grava arquivo
-    if fmt == "json":
-        with open(out_path, "w", encoding="utf-8") as f:
-            json.dump(regs, f, ensure_ascii=False, indent=2)
-    else:  # csv
-        if regs:
-            # regs pode ser lista de dicts (supabase) ou RealDictRow (psycopg2) — ambos mapeáveis
-            headers = list(regs[0].keys())
-        else:
-            headers = []
-        with open(out_path, "w", newline="", encoding="utf-8") as f:
-            w = csv.DictWriter(f, fieldnames=headers)
-            w.writeheader()
-            for r in regs:
-                w.writerow(r)
 
-    print(f"Exportado {len(regs)} registro(s) de '{table}' para {out_path.resolve()}")
+def _mais_recentes(limit: Optional[int], apos_id: Optional[int]) -> bool:
+    """
+    --limit N exporta as N linhas mais recentes (maior id), do maior para o menor.
+    Incremental (com marca), as N seguintes à marca em ordem crescente: a próxima execução continua delas.
+    """
+    return bool(limit and limit > 0) and apos_id is None
 
 
-def export_all(fmt: str, outdir: Optional[str], limit: Optional[int]):
+def _limites(table: str) -> Optional[Tuple[int, int]]:
+    """(menor id, maior id) da tabela, ou None se vazia/indisponível."""
+    cli = get_client()
+    if cli is not None:
+        try:
+            return limites_supabase(cli, table)
+        except Exception as e:
+            print(f"Erro ao ler limites de '{table}' via Supabase: {e}")
+    if psycopg2 and DATABASE_URL:
+        conn = get_conn()
+        try:
+            return limites_postgres(conn, table)
+        finally:
+            conn.close()
+    return None
+
+
+def export_table(
+    table: str,
+    fmt: str,
+    out: Optional[str],
+    limit: Optional[int],
+    pagina: int = TAMANHO_PAGINA,
+    progresso: bool = True,
+    incremental: bool = False,
+    delta: bool = False,
+) -> Optional[ResultadoExportacao]:
     """
-    Exporta todas as tabelas do schema public para CSV/JSON.
-    Usa psycopg2->information_schema para obter a lista de tabelas, se possível.
+    Exporta uma tabela para CSV, JSON, JSON Lines (.gz/.zst) ou Parquet em streaming: lê por
+    páginas (keyset em id crescente) e grava cada página no arquivo, com
+    memória constante. Usa Supabase como primeira opção e psycopg2 como
+    fallback (só se a primeira falhar). Com `limit`, exporta as `limit`
+    linhas mais recentes, do maior id para o menor.
+
+    Toda exportação registra a marca d'água (maior id) do arquivo. Com
+    `incremental`, busca só as linhas depois da marca e as anexa ao arquivo
+    (CSV/JSONL) ou, com `delta` (sempre em JSON), grava um arquivo delta.
     """
-    out_base = Path(outdir) if outdir else Path("export")
-    out_base.mkdir(parents=True, exist_ok=True)
+    fmt = fmt.lower()
+    if fmt not in FORMATOS:
+        raise ValueError(f"Formato inválido. Use {', '.join(FORMATOS)}.")
+
+    out_path = Path(out) if out else Path("export") / f"{table}.{fmt}"
+    marcas = MarcasDagua(out_path.parent)
+    plano = planejar(out_path, table, fmt, marcas, incremental, delta)
+    res = _exportar_faixa(
+        table, fmt, plano.saida, limit, pagina, Progresso(table, ativo=progresso), plano.apos_id,
+        anexar=plano.anexar, desc=_mais_recentes(limit, plano.apos_id),
+    )
 
+    if res is None:
+        print(f"Nada exportado de '{table}': nenhuma fonte disponível.")
+        return None
+    plano.registrar(marcas, out_path, table, fmt, res)
+
+    if plano.modo == "completo":
+        print(
+            f"Exportado {res.linhas} registro(s) de '{table}' para {out_path.resolve()} "
+            f"({res.segundos:.1f}s, {res.vazao:,.0f} linhas/s)"
+        )
+    else:
+        destino = out_path if plano.anexar else plano.saida
+        print(
+            f"Incremental ({plano.modo}): {res.linhas} registro(s) novo(s) de '{table}' com id > {plano.apos_id}"
+            + (f" em {destino.resolve()}" if res.linhas else "")
+            + f" ({res.segundos:.1f}s)"
+        )
+    return res
+
+
+def _tabelas_public() -> List[str]:
+    """
+    Tabelas do schema public com coluna `id` (a exportação pagina por id);
+    tabelas auxiliares sem id, como ocupacao_turno, ficam de fora.
+    """
     tables = []
     if psycopg2 and DATABASE_URL:
         try:
             with get_conn() as conn, conn.cursor() as cur:
                 cur.execute("""
-                    SELECT table_name
-                    FROM information_schema.tables
-                    WHERE table_schema='public'
-                    ORDER BY table_name
+                    SELECT t.table_name
+                    FROM information_schema.tables t
+                    JOIN information_schema.columns c
+                      ON c.table_schema = t.table_schema AND c.table_name = t.table_name
+                    WHERE t.table_schema='public' AND c.column_name='id'
+                    ORDER BY t.table_name
                 """)
                 tables = [r["table_name"] for r in cur.fetchall()]
         except Exception as e:
             print("Falha ao listar tables via information_schema (fallback):", e)
+    return tables or known_tables()
+
+
+def export_all(
+    fmt: str,
+    outdir: Optional[str],
+    limit: Optional[int],
+    jobs: int = 4,
+    pagina: int = TAMANHO_PAGINA,
+    linhas_por_parte: int = 50000,
+    incremental: bool = False,
+    delta: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Exporta todas as tabelas do schema public com coluna id para CSV/JSON/JSONL/Parquet, até
+    `jobs` exportações ao mesmo tempo. Tabelas com mais de `linhas_por_parte`
+    ids são divididas em faixas de id exportadas em paralelo para arquivos
+    de parte, depois juntados na ordem de id — a saída é a mesma de uma
+    exportação sequencial. No fim imprime um resumo por tabela.
+    `incremental`/`delta`: como em export_table (tabelas com marca não são divididas).
+    """
+    fmt = fmt.lower()
+    if fmt not in FORMATOS:
+        raise ValueError(f"Formato inválido. Use {', '.join(FORMATOS)}.")
+    jobs = max(1, jobs)
+    out_base = Path(outdir) if outdir else Path("export")
+    out_base.mkdir(parents=True, exist_ok=True)
 
-    if not tables:
-        tables = known_tables()
-
+    tables = _tabelas_public()
     if not tables:
         print("Nenhuma tabela encontrada para exportar.")
-        return
+        return []
+
+    inicio = time.monotonic()
+    marcas = MarcasDagua(out_base)
+    incr = {t: planejar(out_base / f"{t}.{fmt}", t, fmt, marcas, incremental, delta) for t in tables}
+
+    # planejamento: tabela -> faixas de id (com --limit ou incremental, uma faixa só)
+    planos: Dict[str, List[Tuple[Optional[int], Optional[int]]]] = {}
+    for t in tables:
+        faixas: List[Tuple[Optional[int], Optional[int]]] = [(incr[t].apos_id, None)]
+        if not limit and jobs > 1 and incr[t].modo == "completo":
+            try:
+                lim = _limites(t)
+            except Exception as e:
+                print(f"Erro ao ler limites de '{t}' (exportação sem divisão): {e}")
+                lim = None
+            if lim:
+                vao = lim[1] - lim[0] + 1
+                faixas = faixas_id(lim[0], lim[1], min(jobs, -(-vao // linhas_por_parte)))
+        planos[t] = faixas
+
+    def caminho_parte(t: str, i: int) -> Path:
+        if len(planos[t]) == 1:
+            return incr[t].saida
+        return out_base / f".{t}.parte{i:03d}.{formato_parte(fmt)}"
+
+    def tarefa(t: str, i: int):
+        apos_id, ate_id = planos[t][i]
+        n = len(planos[t])
+        nome = t if n == 1 else f"{t}[{i + 1}/{n}]"
+        t0 = time.monotonic()
+        fmt_tarefa = fmt if n == 1 else formato_parte(fmt)
+        res = _exportar_faixa(
+            t, fmt_tarefa, caminho_parte(t, i), limit, pagina, Progresso(nome), apos_id, ate_id, incr[t].anexar,
+            _mais_recentes(limit, apos_id),
+        )
+        return res, t0, time.monotonic()
+
+    # (tabela, parte) -> (resultado, início, fim) ou exceção
+    feitos: Dict[Tuple[str, int], Any] = {}
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="export") as pool:
+        futuros = {
+            pool.submit(tarefa, t, i): (t, i) for t in tables for i in range(len(planos[t]))
+        }
+        for fut in as_completed(futuros):
+            chave = futuros[fut]
+            try:
+                feitos[chave] = fut.result()
+            except Exception as e:
+                feitos[chave] = e
 
+    # junção em ordem determinística (ordem das tabelas, partes por id)
+    resumo: List[Dict[str, Any]] = []
     for t in tables:
+        n = len(planos[t])
+        partes = [feitos[(t, i)] for i in range(n)]
         dest = out_base / f"{t}.{fmt}"
-        export_table(t, fmt, str(dest), limit)
+        erro = next((p for p in partes if isinstance(p, Exception)), None)
+        if erro is None and any(p[0] is None for p in partes):
+            erro = "nenhuma fonte disponível"
+        ok = [p for p in partes if not isinstance(p, Exception)]
+        linha = {
+            "tabela": t, "modo": incr[t].modo, "partes": n, "linhas": 0, "segundos": 0.0,
+            "arquivo": incr[t].saida, "erro": erro,
+        }
+        if ok:
+            linha["segundos"] = max(p[2] for p in ok) - min(p[1] for p in ok)
+        if erro is None:
+            if n > 1:
+                t0 = time.monotonic()
+                juntar_partes([caminho_parte(t, i) for i in range(n)], fmt, dest)
+                linha["segundos"] += time.monotonic() - t0
+            linha["linhas"] = sum(p[0].linhas for p in partes)
+            ultimo = next((p[0].ultimo_id for p in reversed(partes) if p[0].ultimo_id is not None), None)
+            incr[t].registrar(
+                marcas, dest, t, fmt,
+                ResultadoExportacao(t, dest, linha["linhas"], linha["segundos"], ultimo),
+            )
+        else:
+            for i in range(n):
+                if n > 1 and caminho_parte(t, i).exists():
+                    caminho_parte(t, i).unlink()
+        resumo.append(linha)
+
+    total = time.monotonic() - inicio
+    largura = max(len(t) for t in tables)
+    print(f"\n{'tabela':<{largura}} {'modo':>8} {'partes':>6} {'linhas':>10} {'tempo (s)':>10} {'linhas/s':>10}")
+    for r in resumo:
+        if r["erro"] is not None:
+            print(f"{r['tabela']:<{largura}} {r['modo']:>8} {r['partes']:>6} {'ERRO':>10}  {r['erro']}")
+            continue
+        vazao = r["linhas"] / r["segundos"] if r["segundos"] > 0 else 0.0
+        print(
+            f"{r['tabela']:<{largura}} {r['modo']:>8} {r['partes']:>6} {r['linhas']:>10} "
+            f"{r['segundos']:>10.1f} {vazao:>10,.0f}"
+        )
+    soma = sum(r["linhas"] for r in resumo)
+    print(
+        f"{'total':<{largura}} {'':>8} {'':>6} {soma:>10} {total:>10.1f} {(soma / total if total > 0 else 0):>10,.0f}"
+        f"   ({jobs} job(s), saída em {out_base.resolve()})"
+    )
+    return resumo
+
+
+def restore_table(table: str, arquivo: str, truncar: bool):
+    """
+    Restaura uma tabela a partir de um CSV exportado (COPY FROM STDIN via
+    psycopg2, numa transação só). Os ids do arquivo são mantidos.
+    """
+    conn = get_conn()
+    try:
+        t0 = time.monotonic()
+        n = restaurar_postgres(conn, table, Path(arquivo), truncar)
+    finally:
+        conn.close()
+    s = time.monotonic() - t0
+    print(f"Restaurado {n} registro(s) em '{table}' de {arquivo} ({s:.1f}s, {n / s if s > 0 else 0:,.0f} linhas/s)")
+
+
+def import_file(tipo: str, arquivo: str, lote: int, simular: bool):
+    """
+    Importa agendamentos de um CSV/XLSX (lido em streaming) para a tabela `tipo`,
+    inserindo as linhas válidas em lotes multi-linha.
+    """
+    from database import get_ocupacao, inserir_lote
+    from utils.importacao import importar, ler_registros
+
+    if tipo not in ESQUEMAS:
+        raise ValueError(f"Tipo inválido: {tipo}. Use: {', '.join(ESQUEMAS)}")
+
+    with open(arquivo, "rb") as f:
+        res = importar(
+            tipo,
+            ler_registros(f, arquivo, tipo),
+            None if simular else inserir_lote,
+            tamanho_lote=lote,
+            ocupacao=get_ocupacao(),
+        )
+
+    for linha, msg in res.erros:
+        print(f"  linha {linha}: {msg}")
+    if res.recusadas > len(res.erros):
+        print(f"  ... e mais {res.recusadas - len(res.erros)} erro(s)")
+    acao = "válida(s)" if simular else "inserida(s)"
+    print(f"{res.lidas} linha(s) lida(s), {res.inseridas} {acao}, {res.invalidas} com erro, "
+          f"{res.lotadas} recusada(s) por turno lotado.")
 
 
 # ------------------ CLI ------------------
 
+def _args_incremental(p: argparse.ArgumentParser) -> None:
+    modo = p.add_mutually_exclusive_group()
+    modo.add_argument(
+        "--incremental", action="store_true",
+        help="Só as linhas depois da marca d'água (maior id já exportado), anexadas ao arquivo",
+    )
+    modo.add_argument("--full", action="store_true", help="Reexporta tudo e refaz a marca d'água (padrão)")
+    p.add_argument("--delta", action="store_true", help="Com --incremental: grava <tabela>.delta-<marca>.<fmt> em vez de anexar")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Ferramenta de consulta e export do Postgres/Supabase."
@@ -204,7 +467,7 @@ def main():
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     # listar tabelas
-    p_list = sub.add_parser("list", help="Lista todas as tabelas do schema public.")
+    sub.add_parser("list", help="Lista todas as tabelas do schema public.")
 
     # mostrar registros
     p_show = sub.add_parser("show", help="Mostra registros de uma tabela.")
@@ -212,17 +475,49 @@ def main():
     p_show.add_argument("--limit", "-n", type=int, default=10, help="Quantidade de registros (default: 10)")
 
     # exportar tabela
-    p_exp = sub.add_parser("export", help="Exporta uma tabela para CSV ou JSON.")
+    p_exp = sub.add_parser("export", help="Exporta uma tabela para CSV, JSON, JSON Lines ou Parquet.")
     p_exp.add_argument("table", help="Nome da tabela")
-    p_exp.add_argument("--fmt", choices=["csv", "json"], default="csv", help="Formato (csv/json)")
+    p_exp.add_argument("--fmt", choices=list(FORMATOS), default="csv", help="Formato (csv/json/jsonl, .gz/.zst, parquet)")
     p_exp.add_argument("--out", help="Arquivo de saída (padrão: export/<tabela>.<fmt>)")
-    p_exp.add_argument("--limit", "-n", type=int, help="Limite de registros (opcional)")
+    p_exp.add_argument("--limit", "-n", type=int, help="Exporta só os N registros mais recentes (maior id), do mais novo para o mais antigo")
+    p_exp.add_argument("--pagina", type=int, default=TAMANHO_PAGINA, help=f"Linhas por requisição (default: {TAMANHO_PAGINA})")
+    _args_incremental(p_exp)
 
     # exportar todas
     p_all = sub.add_parser("export-all", help="Exporta TODAS tabelas para CSV/JSON.")
-    p_all.add_argument("--fmt", choices=["csv", "json"], default="csv", help="Formato (csv/json)")
+    p_all.add_argument("--fmt", choices=list(FORMATOS), default="csv", help="Formato (csv/json/jsonl, .gz/.zst, parquet)")
     p_all.add_argument("--outdir", help="Pasta de saída (padrão: ./export)")
-    p_all.add_argument("--limit", "-n", type=int, help="Limite de registros (opcional)")
+    p_all.add_argument("--limit", "-n", type=int, help="Só os N registros mais recentes de cada tabela (opcional)")
+    p_all.add_argument("--jobs", "-j", type=int, default=4, help="Exportações simultâneas (default: 4)")
+    p_all.add_argument("--pagina", type=int, default=TAMANHO_PAGINA, help=f"Linhas por requisição (default: {TAMANHO_PAGINA})")
+    p_all.add_argument(
+        "--linhas-por-parte", type=int, default=50000,
+        help="Tabelas com mais ids que isso são divididas em faixas paralelas (default: 50000)",
+    )
+    _args_incremental(p_all)
+
+    # restaurar de um CSV exportado
+    p_res = sub.add_parser("restore", help="Restaura uma tabela de um CSV exportado (COPY, requer DATABASE_URL).")
+    p_res.add_argument("table", help="Nome da tabela")
+    p_res.add_argument("arquivo", help="CSV com cabeçalho, opcionalmente .gz/.zst (ex: export/visitante.csv)")
+    p_res.add_argument("--truncar", action="store_true", help="Esvazia a tabela antes de carregar")
+
+    # importar CSV/XLSX
+    p_imp = sub.add_parser("import", help="Importa agendamentos de um CSV/XLSX.")
+    p_imp.add_argument("tipo", choices=list(ESQUEMAS), help="Tipo de agendamento")
+    p_imp.add_argument("arquivo", help="Arquivo .csv (',' ou ';') ou .xlsx com cabeçalho")
+    p_imp.add_argument("--lote", type=int, default=500, help="Linhas por inserção (default: 500)")
+    p_imp.add_argument("--simular", action="store_true", help="Apenas valida, não grava")
+
+    # DDL do índice de busca textual
+    p_busca = sub.add_parser("sql-busca", help="Mostra o SQL da coluna de busca (sem acento) com índice de trigramas.")
+    p_busca.add_argument("tipos", nargs="*", choices=list(ESQUEMAS), help="Tabelas (padrão: todas)")
+
+    # DDL do limite de capacidade no banco
+    sub.add_parser("sql-capacidade", help="Mostra o SQL do gatilho que garante a capacidade por turno no banco.")
+
+    # DDL da chave de idempotência do spool
+    sub.add_parser("sql-spool", help="Mostra o SQL da coluna chave_envio (reenvios do spool não duplicam linhas).")
 
     args = parser.parse_args()
 
@@ -237,9 +532,26 @@ def main():
     elif args.cmd == "show":
         show_table(args.table, args.limit)
     elif args.cmd == "export":
-        export_table(args.table, args.fmt, args.out, args.limit)
+        export_table(
+            args.table, args.fmt, args.out, args.limit, args.pagina,
+            incremental=args.incremental, delta=args.delta,
+        )
     elif args.cmd == "export-all":
-        export_all(args.fmt, args.outdir, args.limit)
+        export_all(
+            args.fmt, args.outdir, args.limit, args.jobs, args.pagina, args.linhas_por_parte,
+            incremental=args.incremental, delta=args.delta,
+        )
+    elif args.cmd == "restore":
+        restore_table(args.table, args.arquivo, args.truncar)
+    elif args.cmd == "import":
+        import_file(args.tipo, args.arquivo, args.lote, args.simular)
+    elif args.cmd == "sql-capacidade":
+        print(sql_capacidade())
+    elif args.cmd == "sql-spool":
+        print(sql_chave_envio(list(ESQUEMAS)), end="")
+    elif args.cmd == "sql-busca":
+        for t in args.tipos or ESQUEMAS:
+            print(sql_indice(t, ESQUEMAS[t].campos_busca))
 
 
 if __name__ == "__main__":
@@ -1,48 +1,45 @@
 # database.py
 from __future__ import annotations
 
+import hashlib
+import json
 import os
-import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 
-from dotenv import load_dotenv
+from utils.env import carregar_env
 
-# -------------------------
-# Carregamento de .env robusto
-# -------------------------
-def _load_env_robusto() -> None:
-    exe_dir = Path(getattr(sys, "_MEIPASS", Path(sys.argv[0]).resolve().parent))
-    cwd = Path.cwd()
-    here = Path(__file__).resolve().parent
-    project_root = here.parent if (here.name.lower() == "desktop") else here
-
-    candidatos = [
-        exe_dir / ".env",
-        cwd / ".env",
-        here / ".env",
-        project_root / ".env",
-    ]
-
-    for p in candidatos:
-        if p.exists():
-            load_dotenv(dotenv_path=p, override=False)
-            return
-
-    load_dotenv(override=False)
-
-_load_env_robusto()
+carregar_env()
 
 # -------------------------
 # Import supabase client
 # -------------------------
 try:
-    from supabase_client import supabase, create_admin_client  # type: ignore
+    from supabase_client import get_client, get_admin_client, reportar_falha, reportar_sucesso  # type: ignore
 except Exception as e:
     print("[database.py] Aviso: falha ao importar supabase_client:", e)
-    supabase = None  # type: ignore
-    def create_admin_client():
+    def get_client():
         return None
+    def get_admin_client():
+        return None
+    def reportar_falha(chave: str = "anon") -> None:
+        pass
+    def reportar_sucesso(chave: str = "anon") -> None:
+        pass
+
+from models.esquema import ESQUEMAS, TIPOS
+from utils.capacidade import OcupacaoIndex, Reserva, TurnoLotado, CAMPO_QTD, disponibilidade_mes, ocupado_no_banco
+from utils.spool import COLUNA_CHAVE, Spool
+from utils.idempotencia import RegistroIdempotencia, EnvioIdempotente
+from utils.cache import TTLCache
+from utils.busca import COLUNA_BUSCA, normalizar, palavras
+from utils.paginacao import aplicar_keyset, chave_registro, codificar_cursor, ORDENS
+from utils.resiliencia import Circuito, executar
+from utils.metricas import medir_supabase
 
 # -------------------------
 # Helpers
@@ -52,134 +49,484 @@ def _safe_resp_data(resp) -> Optional[Any]:
         return None
     return getattr(resp, "data", None)
 
+def _cliente():
+    """Cliente anon do registro (criado no primeiro uso, um por worker)."""
+    return get_client()
+
 def _supabase_ok() -> bool:
-    return (supabase is not None)
+    return (_cliente() is not None)
 
 # -------------------------
-# INSERÇÕES
+# Resiliência (prazo, novas tentativas, disjuntor)
 # -------------------------
-def insert_visitante(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+# Prazo total de uma chamada, somando as novas tentativas (cada requisição
+# HTTP já é limitada por SUPABASE_TIMEOUT_S no supabase_client).
+SUPABASE_PRAZO_S = float(os.getenv("SUPABASE_PRAZO_S", "15"))
+
+_circuito = Circuito(
+    "supabase",
+    limiar_erro=float(os.getenv("CIRCUITO_LIMIAR_ERRO", "0.5")),
+    tempo_aberto=float(os.getenv("CIRCUITO_TEMPO_ABERTO_S", "30")),
+)
+
+def _executar(query, tabela: str, operacao: str, idempotente: bool = False, chave: str = "anon"):
+    """
+    Executa uma query do supabase-py sob o disjuntor, medindo a latência
+    por tabela/operação. Só leituras (idempotente=True) são repetidas em
+    caso de erro transitório. Levanta CircuitoAberto sem tocar na rede se
+    o Supabase estiver fora.
+    """
+    with medir_supabase(tabela, operacao):
+        resp = executar(
+            query.execute,
+            _circuito,
+            idempotente=idempotente,
+            prazo=SUPABASE_PRAZO_S,
+            ao_falhar=lambda e: reportar_falha(chave),
+        )
+    reportar_sucesso(chave)
+    return resp
+
+def estado_circuito() -> Dict[str, Any]:
+    return _circuito.estado()
+
+# -------------------------
+# OCUPAÇÃO (capacidade por data + turno)
+# -------------------------
+_ocupacao = OcupacaoIndex()
+_ocupacao_lock = threading.Lock()
+# o índice de cada worker só vê as próprias inserções: de tempos em tempos
+# ele é refeito do banco para incluir as dos outros workers
+OCUPACAO_RECARREGAR_S = float(os.getenv("OCUPACAO_RECARREGAR_S", "300"))
+PAGINA_OCUPACAO = 500
+
+def _carregar_ocupacao() -> None:
+    """
+    Carrega do Supabase os agendamentos a partir de hoje (só data/turno/qtd),
+    página a página por keyset em id (uma consulta só seria cortada em max-rows).
+    """
+    hoje = date.today().isoformat()
+    registros: List[Any] = []
+    for tabela, campo in CAMPO_QTD.items():
+        cols = ["data", "turno"] + ([campo] if campo else [])
+        cursor = None
+        while True:
+            res = listar_pagina(tabela, colunas=cols, limite=PAGINA_OCUPACAO, cursor=cursor, desde=hoje, ordem="id")
+            if res is None:
+                raise RuntimeError(f"falha ao ler {tabela}")
+            registros.extend((tabela, r) for r in res["dados"])
+            cursor = res["proximo"]
+            if not cursor:
+                break
+    _ocupacao.carregar(registros)
+
+def _recarregar_ocupacao() -> None:
+    """Roda numa thread, com _ocupacao_lock já adquirido."""
+    try:
+        _carregar_ocupacao()
+    except Exception as e:
+        print("Erro ao recarregar ocupação:", e)
+        _ocupacao.carregado_em = time.monotonic()  # tenta de novo no próximo intervalo
+    finally:
+        _ocupacao_lock.release()
+
+def recarregar_ocupacao_se_velha() -> None:
+    """Recarrega em segundo plano se passou OCUPACAO_RECARREGAR_S; quem chama não espera."""
+    em = _ocupacao.carregado_em
+    if em is None or time.monotonic() - em < OCUPACAO_RECARREGAR_S:
+        return
+    if _ocupacao_lock.acquire(blocking=False):
+        threading.Thread(target=_recarregar_ocupacao, name="fcja-ocupacao", daemon=True).start()
+
+def get_ocupacao() -> OcupacaoIndex:
+    """
+    Retorna o índice de ocupação, carregando-o na primeira chamada.
+    Se o carregamento falhar, tenta de novo na próxima chamada; depois,
+    recarrega em segundo plano a cada OCUPACAO_RECARREGAR_S.
+    """
+    if not _ocupacao.carregado and _supabase_ok():
+        with _ocupacao_lock:
+            if not _ocupacao.carregado:
+                try:
+                    _carregar_ocupacao()
+                except Exception as e:
+                    print("Erro ao carregar ocupação:", e)
+    else:
+        recarregar_ocupacao_se_velha()
+    return _ocupacao
+
+# -------------------------
+# DISPONIBILIDADE DO MÊS (date picker do formulário)
+# -------------------------
+# O JSON de cada (tipo, mês) fica pronto em cache e só é refeito quando o
+# índice de ocupação muda (versao), o dia vira ou o TTL vence (calendário).
+DISPONIBILIDADE_TTL = float(os.getenv("DISPONIBILIDADE_TTL", "300"))
+_cache_disponibilidade = TTLCache(DISPONIBILIDADE_TTL)
+
+def disponibilidade(tipo: str, ano: int, mes: int, ocupacao: Optional[OcupacaoIndex] = None) -> Tuple[bytes, str]:
+    """Retorna (corpo JSON, ETag). O ETag é o hash do corpo: igual em todos os workers."""
+    ocup = ocupacao if ocupacao is not None else get_ocupacao()
+    hoje = date.today()
+    chave = (tipo, ano, mes)
+    item = _cache_disponibilidade.get(chave)
+    if item is not None and item[0] == (ocup.versao, hoje):
+        return item[1], item[2]
+
+    dados = disponibilidade_mes(ocup, tipo, ano, mes, hoje)
+    corpo = json.dumps(dados, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    etag = hashlib.sha1(corpo).hexdigest()[:20]
+    _cache_disponibilidade.set(chave, ((ocup.versao, hoje), corpo, etag))
+    return corpo, etag
+
+# -------------------------
+# SPOOL (gravação assíncrona)
+# -------------------------
+# USAR_SPOOL=1 faz os insert_* gravarem num spool SQLite local e retornarem
+# na hora; uma thread envia os pendentes em lote para o Supabase.
+USAR_SPOOL = os.getenv("USAR_SPOOL", "0").lower() in {"1", "true", "sim"}
+SPOOL_PATH = os.getenv("SPOOL_PATH") or str(Path(__file__).resolve().parent / "spool.sqlite3")
+
+_spool: Optional[Spool] = None
+_spool_lock = threading.Lock()
+
+def _enviar_lote(tabela: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Inserção multi-linha (importação). Levanta exceção em caso de falha."""
+    if not _supabase_ok():
+        raise RuntimeError("Supabase indisponível")
+    resp = _executar(_cliente().table(tabela).insert(payloads), tabela, "insert_lote")
+    _cache_ultimos.invalidar(tabela)
+    return _safe_resp_data(resp) or []
+
+def _enviar_spool(tabela: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Envio do spool: upsert pela chave de idempotência (utils/spool.COLUNA_CHAVE)
+    que ignora as já gravadas — reenviar um lote que estourou o timeout, mas
+    entrou, não duplica linhas. Devolve só as linhas gravadas agora.
+    """
     if not _supabase_ok():
+        raise RuntimeError("Supabase indisponível")
+    q = _cliente().table(tabela).upsert(payloads, on_conflict=COLUNA_CHAVE, ignore_duplicates=True)
+    resp = _executar(q, tabela, "insert_lote")
+    _cache_ultimos.invalidar(tabela)
+    return _safe_resp_data(resp) or []
+
+def get_spool() -> Spool:
+    global _spool
+    if _spool is None:
+        with _spool_lock:
+            if _spool is None:
+                _spool = Spool(SPOOL_PATH, _enviar_spool)
+    return _spool
+
+def iniciar_spool() -> None:
+    """Inicia o envio em segundo plano (chamar no worker, depois do fork)."""
+    if USAR_SPOOL:
+        get_spool().iniciar()
+
+def status_envio(envio_id: int) -> Optional[Dict[str, Any]]:
+    if not USAR_SPOOL:
         return None
+    return get_spool().status(envio_id)
+
+# -------------------------
+# IDEMPOTÊNCIA (reenvio do formulário / duplicatas)
+# -------------------------
+# Token do formulário: o mesmo POST reenviado devolve o resultado original.
+# Hash do conteúdo (email, data, turno, tipo): bloqueia duplicatas dentro da janela.
+IDEMPOTENCIA_PATH = os.getenv("IDEMPOTENCIA_PATH") or str(Path(__file__).resolve().parent / "idempotencia.sqlite3")
+IDEMPOTENCIA_TTL_S = float(os.getenv("IDEMPOTENCIA_TTL_S", "3600"))
+DEDUPE_JANELA_S = float(os.getenv("DEDUPE_JANELA_S", "600"))
+
+_idempotencia: Optional[RegistroIdempotencia] = None
+_idempotencia_lock = threading.Lock()
+
+def get_idempotencia() -> RegistroIdempotencia:
+    global _idempotencia
+    if _idempotencia is None:
+        with _idempotencia_lock:
+            if _idempotencia is None:
+                _idempotencia = RegistroIdempotencia(IDEMPOTENCIA_PATH)
+    return _idempotencia
+
+def novo_envio(token: Optional[str]) -> EnvioIdempotente:
+    """Controle de idempotência de um POST do formulário (ver utils/idempotencia.py)."""
+    try:
+        registro = get_idempotencia()
+    except Exception as e:
+        print("Registro de idempotência indisponível:", e)
+        registro = None
+    return EnvioIdempotente(registro, token, IDEMPOTENCIA_TTL_S, DEDUPE_JANELA_S)
 
-    payload = {
-        "nome": data.get("nome") or "",
-        "genero": data.get("genero") or "",
-        "email": data.get("email") or "",
-        "telefone": data.get("telefone") or "",
-        "endereco": data.get("endereco") or "",
-        "qtd_pessoas": int(data.get("qtd_pessoas") or 0),
-        "data": data.get("data"),
-        "turno": data.get("turno") or "",
-        "horario_chegada": data.get("horario_chegada") or "",
-        "duracao": data.get("duracao") or "",
-        "observacao": data.get("observacao") or "",
-    }
+# -------------------------
+# INSERÇÕES
+# -------------------------
+def _inserir(tabela: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Insere (ou enfileira no spool). None se falhar; TurnoLotado se o gatilho do banco recusar."""
+    if USAR_SPOOL:
+        try:
+            envio_id = get_spool().enfileirar(tabela, payload)
+        except Exception as e:
+            print(f"Erro insert_{tabela} (spool):", e)
+            return None
+        return {**payload, "spool_id": envio_id, "status": "pendente"}
 
     try:
-        resp = supabase.table("visitante").insert(payload).execute()
+        resp = _executar(_cliente().table(tabela).insert(payload), tabela, "insert")
         d = _safe_resp_data(resp)
+        if d:
+            _cache_ultimos.invalidar(tabela)
         return d[0] if d else None
     except Exception as e:
-        print("Erro insert_visitante:", e)
+        ocupado = ocupado_no_banco(e)
+        if ocupado is not None:
+            raise TurnoLotado(0, ocupado) from e
+        print(f"Erro insert_{tabela}:", e)
         return None
 
-def insert_escola(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def inserir(tipo: str, data: Dict[str, Any], preparado: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    Monta o payload de `tipo` pelo esquema e insere. Retorna o registro ou None.
+    preparado=True: `data` já é o payload de Tabela.preparar() e vai direto.
+
+    A vaga do turno é reservada no índice antes da inserção e devolvida se
+    ela falhar; levanta TurnoLotado se não houver vaga (aqui ou no banco).
+    Com o spool, o limite no banco só é checado no envio do lote.
+    """
     if not _supabase_ok():
         return None
+    payload = data if preparado else ESQUEMAS[tipo].payload(data)
+    with Reserva(get_ocupacao(), tipo, payload) as vaga:
+        novo = _inserir(tipo, payload)
+        if novo:
+            vaga.confirmar()
+    return novo
 
-    payload = {
-        "nome_escola": data.get("nome_escola") or "",
-        "representante": data.get("representante") or "",
-        "email": data.get("email") or "",
-        "telefone": data.get("telefone") or "",
-        "endereco": data.get("endereco") or "",
-        "num_alunos": int(data.get("num_alunos") or 0),
-        "data": data.get("data"),
-        "turno": data.get("turno") or "",
-        "horario_chegada": data.get("horario_chegada") or "",
-        "duracao": data.get("duracao") or "",
-        "observacao": data.get("observacao") or "",
-    }
-
+def inserir_lote(tipo: str, payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Inserção multi-linha de payloads já preparados (importação em lote).
+    Uma requisição por lote; levanta exceção se o lote falhar (TurnoLotado
+    se o gatilho do banco recusou). As vagas ficam por conta de quem chama
+    (utils/importacao reserva cada linha no índice).
+    """
     try:
-        resp = supabase.table("escola").insert(payload).execute()
-        d = _safe_resp_data(resp)
-        return d[0] if d else None
+        return _enviar_lote(tipo, payloads)
     except Exception as e:
-        print("Erro insert_escola:", e)
-        return None
+        ocupado = ocupado_no_banco(e)
+        if ocupado is not None:
+            raise TurnoLotado(0, ocupado) from e
+        raise
+
+def insert_visitante(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return inserir("visitante", data)
+
+def insert_escola(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return inserir("escola", data)
 
 def insert_ies(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return inserir("ies", data)
+
+def insert_pesquisador(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    return inserir("pesquisador", data)
+
+# -------------------------
+# ÚLTIMOS REGISTROS (consultas em paralelo + cache TTL)
+# -------------------------
+TABELAS = TIPOS
+
+# Só as colunas que ultimos.html exibe (a coluna de nome muda por tabela)
+CAMPO_NOME = {t: e.campo_nome for t, e in ESQUEMAS.items()}
+
+ULTIMOS_TTL = float(os.getenv("ULTIMOS_TTL", "30"))
+_cache_ultimos = TTLCache(ULTIMOS_TTL)
+
+_pool_leitura: Optional[ThreadPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+def _get_pool_leitura() -> ThreadPoolExecutor:
+    # criado sob demanda: as threads nascem no worker, depois do fork
+    global _pool_leitura
+    if _pool_leitura is None:
+        with _pool_lock:
+            if _pool_leitura is None:
+                _pool_leitura = ThreadPoolExecutor(max_workers=len(TABELAS), thread_name_prefix="leitura")
+    return _pool_leitura
+
+def _buscar_ultimos(tabela: str, limit: int) -> List[Dict[str, Any]]:
+    cols = f"id,{CAMPO_NOME[tabela]},data,turno,email,telefone"
+    q = _cliente().table(tabela).select(cols).order("id", desc=True).limit(limit)
+    resp = _executar(q, tabela, "select", idempotente=True)
+    return _safe_resp_data(resp) or []
+
+def ultimos_registros(limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Últimos `limit` registros de cada tabela de agendamento.
+    Tabelas em cache são servidas direto; as demais são consultadas em paralelo.
+    Falhas retornam lista vazia e não entram no cache.
+    """
+    dados: Dict[str, List[Dict[str, Any]]] = {}
+    faltando = []
+    for t in TABELAS:
+        item = _cache_ultimos.get(t)
+        if item is not None and item[0] >= limit:
+            dados[t] = item[1][:limit]
+        else:
+            faltando.append(t)
+
+    if not faltando:
+        return dados
+    if not _supabase_ok():
+        dados.update({t: [] for t in faltando})
+        return dados
+
+    pool = _get_pool_leitura()
+    futuros = {t: pool.submit(_buscar_ultimos, t, limit) for t in faltando}
+    for t, fut in futuros.items():
+        try:
+            dados[t] = fut.result()
+            _cache_ultimos.set(t, (limit, dados[t]))
+        except Exception as e:
+            print(f"Erro ultimos_registros ({t}):", e)
+            dados[t] = []
+    return dados
+
+# -------------------------
+# LEITURA PAGINADA (keyset)
+# -------------------------
+COLUNAS: Dict[str, tuple] = {t: e.colunas_leitura for t, e in ESQUEMAS.items()}
+# max-rows do PostgREST (1000 no Supabase): acima disso a resposta vem cortada sem aviso
+SUPABASE_MAX_ROWS = int(os.getenv("SUPABASE_MAX_ROWS", "1000"))
+# coluna gerada `busca` com índice de trigramas já criada (python consultar.py sql-busca)
+BUSCA_INDEXADA = os.getenv("BUSCA_INDEXADA", "0").lower() in {"1", "true", "sim"}
+
+def listar_pagina(
+    tabela: str,
+    colunas: Optional[List[str]] = None,
+    limite: int = 50,
+    cursor: Optional[str] = None,
+    desde: Optional[str] = None,
+    ate: Optional[str] = None,
+    ordem: str = "-id",
+    igual: Optional[Dict[str, Any]] = None,
+    busca: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    Uma página de `tabela` ordenada por `id` ou `(data, id)`, sem OFFSET.
+    `igual` filtra colunas por igualdade ({coluna: valor}); `busca`, por
+    texto nos campos de busca (ver _filtrar_busca).
+    Retorna {"dados": [...], "proximo": cursor|None}, ou None se o banco falhar.
+    Levanta ValueError para coluna, ordem ou cursor inválidos.
+    """
+    if tabela not in COLUNAS:
+        raise ValueError(f"Tabela inválida: {tabela}")
+    if ordem not in ORDENS:
+        raise ValueError(f"Ordenação inválida: {ordem}")
+
+    cols = list(colunas) if colunas else list(COLUNAS[tabela])
+    invalidas = [c for c in cols + list(igual or ()) if c not in COLUNAS[tabela]]
+    if invalidas:
+        raise ValueError("Coluna(s) inválida(s): " + ", ".join(invalidas))
+    # a chave de ordenação precisa vir na resposta para montar o próximo cursor
+    for c in ORDENS[ordem][0]:
+        if c not in cols:
+            cols.append(c)
+
     if not _supabase_ok():
         return None
 
-    payload = {
-        "nome_ies": data.get("nome_ies") or "",
-        "representante": data.get("representante") or "",
-        "email": data.get("email") or "",
-        "telefone": data.get("telefone") or "",
-        "endereco": data.get("endereco") or "",
-        "num_alunos": int(data.get("num_alunos") or 0),
-        "data": data.get("data"),
-        "turno": data.get("turno") or "",
-        "horario_chegada": data.get("horario_chegada") or "",
-        "duracao": data.get("duracao") or "",
-        "observacao": data.get("observacao") or "",
-    }
+    # a linha extra (limite + 1) também precisa caber no max-rows
+    limite = max(1, min(limite, SUPABASE_MAX_ROWS - 1))
+    q = _filtrar(_cliente().table(tabela).select(",".join(cols)), tabela, desde, ate, igual, busca)
+    q = aplicar_keyset(q, ordem, cursor)
 
     try:
-        resp = supabase.table("ies").insert(payload).execute()
-        d = _safe_resp_data(resp)
-        return d[0] if d else None
+        # pede 1 a mais só para saber se existe próxima página
+        resp = _executar(q.limit(limite + 1), tabela, "select", idempotente=True)
+        rows = _safe_resp_data(resp) or []
     except Exception as e:
-        print("Erro insert_ies:", e)
+        print(f"Erro listar_pagina ({tabela}):", e)
         return None
 
-def insert_pesquisador(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    proximo = None
+    if len(rows) > limite:
+        rows = rows[:limite]
+        proximo = codificar_cursor(ordem, chave_registro(ordem, rows[-1]))
+    return {"dados": rows, "proximo": proximo}
+
+def _filtrar(
+    q,
+    tabela: str,
+    desde: Optional[str],
+    ate: Optional[str],
+    igual: Optional[Dict[str, Any]],
+    busca: Optional[str] = None,
+):
+    if desde:
+        q = q.gte("data", desde)
+    if ate:
+        q = q.lte("data", ate)
+    for c, v in (igual or {}).items():
+        q = q.eq(c, v)
+    if busca:
+        q = _filtrar_busca(q, tabela, busca)
+    return q
+
+def _filtrar_busca(q, tabela: str, termo: str):
+    """
+    Cada palavra do termo precisa aparecer (substring) em algum campo de
+    busca. Com BUSCA_INDEXADA, um ilike por palavra na coluna gerada
+    `busca` (sem acento, índice de trigramas); sem ela, ilike campo a
+    campo — ignora maiúsculas, mas não acentos.
+    """
+    campos = ESQUEMAS[tabela].campos_busca
+    for p in palavras(termo):
+        if BUSCA_INDEXADA:
+            q = q.ilike(COLUNA_BUSCA, f"%{normalizar(p)}%")
+        else:
+            q = q.or_(",".join(f"{c}.ilike.*{p}*" for c in campos))
+    return q
+
+def contar(
+    tabela: str,
+    desde: Optional[str] = None,
+    ate: Optional[str] = None,
+    igual: Optional[Dict[str, Any]] = None,
+    busca: Optional[str] = None,
+) -> Optional[int]:
+    """Quantos registros passam nos mesmos filtros de listar_pagina (None se o banco falhar)."""
+    if tabela not in COLUNAS:
+        raise ValueError(f"Tabela inválida: {tabela}")
+    invalidas = [c for c in (igual or ()) if c not in COLUNAS[tabela]]
+    if invalidas:
+        raise ValueError("Coluna(s) inválida(s): " + ", ".join(invalidas))
     if not _supabase_ok():
         return None
 
-    payload = {
-        "nome": data.get("nome") or "",
-        "genero": data.get("genero") or "",
-        "email": data.get("email") or "",
-        "telefone": data.get("telefone") or "",
-        "instituicao": data.get("instituicao") or "",
-        "pesquisa": data.get("pesquisa") or "",
-        "data": data.get("data"),
-        "turno": data.get("turno") or "",
-        "horario_chegada": data.get("horario_chegada") or "",
-        "duracao": data.get("duracao") or "",
-        "observacao": data.get("observacao") or "",
-    }
-
+    q = _filtrar(_cliente().table(tabela).select("id", count="exact"), tabela, desde, ate, igual, busca).limit(1)
     try:
-        resp = supabase.table("pesquisador").insert(payload).execute()
-        d = _safe_resp_data(resp)
-        return d[0] if d else None
+        resp = _executar(q, tabela, "select", idempotente=True)
     except Exception as e:
-        print("Erro insert_pesquisador:", e)
+        print(f"Erro contar ({tabela}):", e)
         return None
+    return getattr(resp, "count", None)
 
 # -------------------------
 # LOGIN (CORRIGIDO – SERVICE ROLE)
 # -------------------------
 def get_usuario(username: str, password: str) -> Optional[Dict[str, Any]]:
-    admin = create_admin_client()
+    admin = get_admin_client()
     if not admin:
         print("get_usuario: admin client indisponível.")
         return None
 
     try:
-        resp = (
+        q = (
             admin.table("usuarios")
             .select("*")
             .eq("username", username)
             .eq("password", password)
             .limit(1)
-            .execute()
         )
+        resp = _executar(q, "usuarios", "select", idempotente=True, chave="admin")
         d = _safe_resp_data(resp)
         return d[0] if d else None
     except Exception as e:
@@ -193,7 +540,24 @@ def health_check() -> bool:
     if not _supabase_ok():
         return False
     try:
-        resp = supabase.table("health").select("id").limit(1).execute()
+        resp = _executar(_cliente().table("health").select("id").limit(1), "health", "select", idempotente=True)
         return _safe_resp_data(resp) is not None
     except Exception:
-        return False
\ No newline at end of file
+        return False
+# -------------------------
+# POSTGRES DIRETO (opcional, usado por models/*.py)
+# -------------------------
+def get_connection():
+    """
+    Conexão psycopg2 via DATABASE_URL (cursor em dict). psycopg2 só é
+    importado aqui, no primeiro uso: o app web e o desktop não pagam por ele.
+    """
+    url = os.getenv("DATABASE_URL")
+    if not url:
+        raise RuntimeError("DATABASE_URL não definida.")
+    try:
+        import psycopg2
+        from psycopg2.extras import RealDictCursor
+    except Exception:
+        raise RuntimeError("psycopg2 não instalado no ambiente.")
+    return psycopg2.connect(url, sslmode="require", cursor_factory=RealDictCursor)
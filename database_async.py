@@ -0,0 +1,160 @@
+# database_async.py
+"""
+Versões assíncronas (supabase-py async) das operações usadas pelo
+modo ASGI (web/app_async.py): inserção e últimos registros.
+
+Compartilha com database.py o índice de ocupação, o cache de /ultimos,
+o disjuntor e o spool, para que os dois modos se comportem igual.
+"""
+from __future__ import annotations
+
+import asyncio
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+import database
+from database import (
+    TABELAS,
+    CAMPO_NOME,
+    CAMPO_QTD,
+    SUPABASE_PRAZO_S,
+    _circuito,
+    _cache_ultimos,
+    _ocupacao,
+    _safe_resp_data,
+)
+from supabase_client import get_async_client, reportar_falha
+from utils.capacidade import Reserva, TurnoLotado, ocupado_no_banco
+from utils.resiliencia import executar_async
+from utils.metricas import medir_supabase
+
+_ocupacao_lock: Optional[asyncio.Lock] = None
+
+
+async def _executar(query, tabela: str, operacao: str, idempotente: bool = False):
+    with medir_supabase(tabela, operacao):
+        return await executar_async(
+            query.execute,
+            _circuito,
+            idempotente=idempotente,
+            prazo=SUPABASE_PRAZO_S,
+            ao_falhar=lambda e: reportar_falha(),
+        )
+
+
+# -------------------------
+# OCUPAÇÃO
+# -------------------------
+async def get_ocupacao():
+    """Igual a database.get_ocupacao(), mas carrega sem bloquear o event loop."""
+    global _ocupacao_lock
+    if _ocupacao.carregado:
+        database.recarregar_ocupacao_se_velha()  # numa thread, sem esperar
+        return _ocupacao
+    if _ocupacao_lock is None:
+        _ocupacao_lock = asyncio.Lock()
+
+    async with _ocupacao_lock:
+        if _ocupacao.carregado:
+            return _ocupacao
+        cli = await get_async_client()
+        if cli is None:
+            return _ocupacao
+        hoje = date.today().isoformat()
+
+        async def buscar(tabela, campo):
+            # keyset em id: uma consulta só seria cortada em max-rows
+            cols = "id,data,turno" + (f",{campo}" if campo else "")
+            linhas: List[Any] = []
+            ultimo = 0
+            while True:
+                q = (cli.table(tabela).select(cols).gte("data", hoje).gt("id", ultimo)
+                     .order("id").limit(database.PAGINA_OCUPACAO))
+                pagina = _safe_resp_data(await _executar(q, tabela, "select", idempotente=True)) or []
+                if not pagina:
+                    return linhas
+                linhas.extend((tabela, r) for r in pagina)
+                ultimo = pagina[-1]["id"]
+
+        try:
+            partes = await asyncio.gather(*(buscar(t, c) for t, c in CAMPO_QTD.items()))
+            _ocupacao.carregar(r for parte in partes for r in parte)
+        except Exception as e:
+            print("Erro ao carregar ocupação (async):", e)
+    return _ocupacao
+
+
+# -------------------------
+# DISPONIBILIDADE
+# -------------------------
+async def disponibilidade(tipo: str, ano: int, mes: int):
+    """Igual a database.disponibilidade(), com o índice carregado sem bloquear o loop."""
+    return database.disponibilidade(tipo, ano, mes, ocupacao=await get_ocupacao())
+
+
+# -------------------------
+# INSERÇÃO
+# -------------------------
+async def inserir(tipo: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Insere um payload já preparado (Tabela.preparar). Retorna o registro ou
+    None; levanta TurnoLotado como database.inserir (mesma reserva de vaga).
+    """
+    if database.USAR_SPOOL:
+        # gravação local em SQLite: rápida, mas síncrona -> fora do event loop
+        return await asyncio.to_thread(database.inserir, tipo, payload, True)
+
+    cli = await get_async_client()
+    if cli is None:
+        return None
+    with Reserva(await get_ocupacao(), tipo, payload) as vaga:
+        try:
+            resp = await _executar(cli.table(tipo).insert(payload), tipo, "insert")
+        except Exception as e:
+            ocupado = ocupado_no_banco(e)
+            if ocupado is not None:
+                raise TurnoLotado(0, ocupado) from e
+            print(f"Erro insert_{tipo} (async):", e)
+            return None
+        d = _safe_resp_data(resp)
+        if d:
+            vaga.confirmar()
+            _cache_ultimos.invalidar(tipo)
+        return d[0] if d else None
+
+
+# -------------------------
+# ÚLTIMOS REGISTROS
+# -------------------------
+async def ultimos_registros(limit: int = 5) -> Dict[str, List[Dict[str, Any]]]:
+    """Mesmo contrato de database.ultimos_registros(); as consultas rodam concorrentes no loop."""
+    dados: Dict[str, List[Dict[str, Any]]] = {}
+    faltando = []
+    for t in TABELAS:
+        item = _cache_ultimos.get(t)
+        if item is not None and item[0] >= limit:
+            dados[t] = item[1][:limit]
+        else:
+            faltando.append(t)
+    if not faltando:
+        return dados
+
+    cli = await get_async_client()
+    if cli is None:
+        dados.update({t: [] for t in faltando})
+        return dados
+
+    async def buscar(t):
+        cols = f"id,{CAMPO_NOME[t]},data,turno,email,telefone"
+        q = cli.table(t).select(cols).order("id", desc=True).limit(limit)
+        return _safe_resp_data(await _executar(q, t, "select", idempotente=True)) or []
+
+    resultados = await asyncio.gather(*(buscar(t) for t in faltando), return_exceptions=True)
+    for t, r in zip(faltando, resultados):
+        if isinstance(r, BaseException):
+            print(f"Erro ultimos_registros ({t}, async):", r)
+            dados[t] = []
+        else:
+            dados[t] = r
+            _cache_ultimos.set(t, (limit, r))
+    return dados
@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+"""
+Admin desktop: login, abas, filtros, lista virtual, cache e exportação.
+
+É a parte comum dos dois executáveis (desktop/Agendamentos_FCJA.py e
+desktop/app_desktop.py); cada um só troca a montagem do Treeview de uma
+aba (`_criar_tabela`) e o jeito de abrir o CSV exportado (`_abrir_csv`).
+
+Os filtros de uma aba são um dict só (desde, ate, busca), usado pela
+lista do servidor (FonteKeyset), pela do cache (FonteCache) e pela
+exportação: com o cache completo, o CSV sai das mesmas linhas filtradas
+localmente que estão na tela (a busca local é aproximada, a do servidor
+não); sem ele, sai do servidor com os mesmos filtros.
+"""
+import importlib
+import os
+import sys
+import threading
+from datetime import datetime
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+import ttkbootstrap as tb
+from ttkbootstrap.constants import PRIMARY, SECONDARY, INFO, SUCCESS
+
+from models.esquema import ESQUEMAS
+from desktop.cache_local import CacheTab, FonteCache
+from desktop.carregamento import Carregador, IndicadorCarregando, JanelaExportacao, exportar_csv
+from desktop.lista_virtual import FonteKeyset, ListaVirtual
+from utils.calendario import get_calendario
+from utils.validacoes import parse_data, normalizar_turno
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# database/supabase_client (e o SDK do Supabase por trás deles) são
+# importados no primeiro uso; pre_carregar() adianta isso em segundo
+# plano enquanto a janela de login está aberta.
+def pre_carregar():
+    try:
+        from supabase_client import get_client
+        importlib.import_module("database")
+        get_client()
+    except Exception as e:
+        print("Pré-carregamento falhou:", e)
+
+# --------------------------------------------------
+# Helpers de data
+# --------------------------------------------------
+def br_to_iso(s):
+    try:
+        return datetime.strptime(s.strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+    except Exception:
+        return None
+
+def iso_to_br(s):
+    try:
+        return datetime.strptime(s[:10], "%Y-%m-%d").strftime("%d/%m/%Y")
+    except Exception:
+        return ""
+
+# --------------------------------------------------
+# Login
+# --------------------------------------------------
+class LoginDialog(tk.Toplevel):
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Login - FCJA")
+        self.resizable(False, False)
+        self.valid = False
+
+        frame = ttk.Frame(self, padding=20)
+        frame.pack()
+
+        try:
+            logo = tk.PhotoImage(file=os.path.join(ROOT, "assets", "logo.png"))
+            lbl = ttk.Label(frame, image=logo)
+            lbl.image = logo
+            lbl.pack(pady=5)
+        except Exception:
+            pass
+
+        ttk.Label(
+            frame,
+            text="Fundação Casa de José Américo",
+            font=("Segoe UI Semibold", 12)
+        ).pack(pady=10)
+
+        ttk.Label(frame, text="Usuário").pack(anchor="w")
+        self.e_user = ttk.Entry(frame)
+        self.e_user.insert(0, "admin")
+        self.e_user.pack(fill="x")
+
+        ttk.Label(frame, text="Senha").pack(anchor="w", pady=(10, 0))
+        self.e_pass = ttk.Entry(frame, show="*")
+        self.e_pass.pack(fill="x")
+
+        ttk.Button(
+            frame,
+            text="Entrar",
+            bootstyle=PRIMARY,
+            command=self.login
+        ).pack(fill="x", pady=15)
+
+    def login(self):
+        from database import get_usuario
+
+        if get_usuario(self.e_user.get(), self.e_pass.get()):
+            self.valid = True
+            self.destroy()
+        else:
+            messagebox.showerror("Erro", "Usuário ou senha inválidos")
+
+# --------------------------------------------------
+# App principal
+# --------------------------------------------------
+class AdminApp(ttk.Frame):
+
+    TABS = ("visitante", "escola", "ies", "pesquisador")
+
+    # colunas (chave, título) de cada aba vêm do esquema (models/esquema.py)
+    COLS = {tab: ESQUEMAS[tab].colunas_desktop for tab in TABS}
+
+    # busca enquanto digita: filtra quando o usuário para de digitar por este tempo
+    ESPERA_BUSCA_MS = 250
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.pack(fill="both", expand=True)
+
+        self.search_text = tk.StringVar()
+        self.date_from = tk.StringVar()
+        self.date_to = tk.StringVar()
+        self._busca_pendente = None
+        self._exportacao = Carregador(self)  # CSV em segundo plano (export_csv)
+        self.search_text.trace_add("write", lambda *_: self._buscar_ao_digitar())
+
+        self.build_filters()
+        self.build_tabs()
+        self.refresh()
+
+    # ----------------- filtros -----------------
+    def build_filters(self):
+        box = ttk.Labelframe(self, text="Filtros", padding=10)
+        box.pack(fill="x", padx=10, pady=5)
+
+        ttk.Label(box, text="Buscar").grid(row=0, column=0, sticky="w")
+        ttk.Entry(box, textvariable=self.search_text, width=30)\
+            .grid(row=1, column=0, padx=5)
+
+        ttk.Label(box, text="Data inicial (DD/MM/AAAA)").grid(row=0, column=1)
+        ttk.Entry(box, textvariable=self.date_from, width=14)\
+            .grid(row=1, column=1, padx=5)
+
+        ttk.Label(box, text="Data final (DD/MM/AAAA)").grid(row=0, column=2)
+        ttk.Entry(box, textvariable=self.date_to, width=14)\
+            .grid(row=1, column=2, padx=5)
+
+        ttk.Button(box, text="Aplicar", bootstyle=PRIMARY,
+                   command=self.refresh).grid(row=1, column=3, padx=5)
+
+        ttk.Button(box, text="Limpar", bootstyle=SECONDARY,
+                   command=self.clear).grid(row=1, column=4, padx=5)
+
+        ttk.Button(box, text="Atualizar", bootstyle=INFO,
+                   command=lambda: self.refresh(sincronizar=True)).grid(row=1, column=5, padx=5)
+
+        ttk.Button(box, text="Exportar CSV", bootstyle=SUCCESS,
+                   command=self.export_csv).grid(row=1, column=6, padx=5)
+
+        # calendário (utils/calendario.py): feriados e fechamentos já descontados
+        self.lbl_proximos = ttk.Label(box, text="", bootstyle=SECONDARY)
+        self.lbl_proximos.grid(row=2, column=0, columnspan=4, sticky="w", padx=5, pady=(8, 0))
+
+        # carregamento em segundo plano (desktop/carregamento.py)
+        self.indicador = IndicadorCarregando(box)
+        self.indicador.grid(row=2, column=4, columnspan=3, sticky="e", padx=5, pady=(8, 0))
+
+    # ----------------- abas -----------------
+    def build_tabs(self):
+        self.nb = ttk.Notebook(self)
+        self.nb.pack(fill="both", expand=True, padx=10, pady=5)
+
+        self.tables = {}
+        self.listas = {}
+        # linhas de cada aba em memória, sincronizadas por id (desktop/cache_local.py)
+        # a partir da primeira vez que a aba é aberta; abas nunca abertas não carregam nada
+        self.caches = {tab: CacheTab(self, tab, ao_completar=self._cache_pronto) for tab in self.TABS}
+
+        for tab in self.TABS:
+            frame = ttk.Frame(self.nb)
+            self.nb.add(frame, text=tab.capitalize())
+
+            tree, yscroll = self._criar_tabela(frame, tab)
+
+            # agendamentos em dia/turno fechado (feriado, fechamento posterior)
+            tree.tag_configure("fechado", foreground="#c0392b")
+
+            self.tables[tab] = tree
+            # só as linhas visíveis viram itens (desktop/lista_virtual.py)
+            self.listas[tab] = ListaVirtual(tree, yscroll, ao_estado=self._estado)
+
+        self.nb.bind("<<NotebookTabChanged>>", lambda e: self.refresh())
+
+    def _criar_tabela(self, frame, tab):
+        """Treeview da aba e a sua barra de rolagem vertical (a lista virtual comanda as duas)."""
+        cols = [c[0] for c in self.COLS[tab]]
+        tree = ttk.Treeview(frame, columns=cols, show="headings")
+        yscroll = ttk.Scrollbar(frame, orient="vertical")
+        yscroll.pack(side="right", fill="y")
+        tree.pack(fill="both", expand=True)
+
+        for key, title in self.COLS[tab]:
+            tree.heading(key, text=title)
+            tree.column(key, width=140)
+        return tree, yscroll
+
+    # ----------------- dados -----------------
+    def _aba(self):
+        return self.TABS[self.nb.index(self.nb.select())]
+
+    def _filtros(self):
+        """Filtros da tela, no formato das fontes (FonteKeyset/FonteCache) e da exportação."""
+        # só uma das datas preenchida: filtra aquele dia
+        d1 = br_to_iso(self.date_from.get())
+        d2 = br_to_iso(self.date_to.get())
+        return {
+            "desde": d1 or d2,
+            "ate": d2 or d1,
+            # sem acento e sem caixa, em nome/instituição, contato e observação (utils/busca.py)
+            "busca": self.search_text.get().strip() or None,
+        }
+
+    def refresh(self, sincronizar=False):
+        """
+        Mostra a aba atual numa lista virtual (desktop/lista_virtual.py): só
+        as linhas visíveis viram itens do Treeview. Com o cache da aba
+        completo, os filtros rodam localmente; senão, os dados chegam do
+        servidor em blocos enquanto o cache sincroniza. Um novo refresh
+        cancela o anterior. `sincronizar` (botão Atualizar) busca já as
+        linhas novas.
+        """
+        if self._busca_pendente is not None:
+            self.after_cancel(self._busca_pendente)
+            self._busca_pendente = None
+        tab = self._aba()
+        filtros = self._filtros()
+
+        dias = get_calendario().proximos_abertos(tab, 5)
+        self.lbl_proximos.config(
+            text="Próximos dias abertos: " + ", ".join(x.strftime("%d/%m") for x in dias)
+        )
+
+        for t, lista in self.listas.items():
+            if t != tab:
+                lista.cancelar()
+        cache = self.caches[tab]
+        if cache.expirado():
+            cache.limpar()
+        if sincronizar or cache.precisa_sincronizar():
+            cache.sincronizar()
+
+        if cache.completo:
+            fonte = FonteCache(cache, self._formatador(tab), **filtros)
+        else:
+            self.indicador.mostrar()
+            fonte = FonteKeyset(self, tab, self._formatador(tab), **filtros)
+        self.listas[tab].definir_fonte(fonte)
+
+    def _cache_pronto(self, cache):
+        """Cache da aba atual ficou completo: a lista passa a ler dele, na mesma posição."""
+        tab = self._aba()
+        lista = self.listas[tab]
+        if cache.tabela != tab or not isinstance(lista.fonte, FonteKeyset):
+            return
+        lista.definir_fonte(FonteCache(cache, lista.fonte.formatar, **lista.fonte.filtros), manter_posicao=True)
+
+    def _buscar_ao_digitar(self):
+        if self._busca_pendente is not None:
+            self.after_cancel(self._busca_pendente)
+        self._busca_pendente = self.after(self.ESPERA_BUSCA_MS, self.refresh)
+
+    def _formatador(self, tab):
+        """(valores, tags) de um registro para o Treeview (na thread de blocos ou, com cache, na do Tk)."""
+        cols = [c[0] for c in self.COLS[tab]]
+        cal = get_calendario()
+
+        def formatar(r):
+            d = parse_data(r.get("data"))
+            fechado = d is not None and not cal.aberto(tab, d, normalizar_turno(r.get("turno")))
+            r["data"] = iso_to_br(r.get("data"))
+            return tuple(r.get(c, "") for c in cols), (("fechado",) if fechado else ())
+
+        return formatar
+
+    def _estado(self, fonte):
+        if fonte is not self.listas[self._aba()].fonte:
+            return
+        if fonte.erro is not None:
+            self.indicador.concluir(f"Erro ao carregar: {fonte.erro}")
+        elif fonte.ativa:
+            self.indicador.mostrar(fonte.progresso())
+        else:
+            self.indicador.concluir(fonte.resumo())
+
+    def clear(self):
+        self.search_text.set("")
+        self.date_from.set("")
+        self.date_to.set("")
+        self.refresh()
+
+    # ----------------- CSV -----------------
+    def export_csv(self):
+        tab = self._aba()
+        fonte = self.listas[tab].fonte
+
+        if fonte is None or fonte.tamanho() == 0:
+            messagebox.showinfo("CSV", "Sem dados para exportar")
+            return
+
+        if self._exportacao.ocupado:
+            messagebox.showinfo("CSV", "Já há uma exportação em andamento")
+            return
+
+        path = os.path.join(
+            os.getcwd(),
+            f"{tab}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+        )
+
+        # o resultado filtrado inteiro, numa thread (a lista virtual só tem a
+        # janela visível): do cache, exatamente as linhas da tela; senão, do
+        # servidor em páginas, com os mesmos filtros
+        registros = fonte.registros() if isinstance(fonte, FonteCache) else None
+        janela = JanelaExportacao(self, f"Exportando {tab}", ao_cancelar=self._exportacao.cancelar)
+
+        def concluir():
+            janela.destroy()
+            self._abrir_csv(path)
+
+        def falhou(e):
+            janela.destroy()
+            messagebox.showerror("CSV", f"Erro ao exportar: {e}")
+
+        self._exportacao.iniciar(
+            lambda cancel: exportar_csv(path, tab, [c[1] for c in self.COLS[tab]],
+                                        fonte.formatar, fonte.filtros, cancel, registros=registros),
+            ao_lote=lambda p: janela.atualizar(*p),
+            ao_fim=concluir,
+            ao_erro=falhou,
+        )
+
+    def _abrir_csv(self, path):
+        os.startfile(path)
+
+# --------------------------------------------------
+# Main
+# --------------------------------------------------
+def executar(app=AdminApp):
+    """Janela principal: login (com o pré-carregamento em paralelo) e depois o admin."""
+    root = tb.Window(themename="flatly")
+    root.geometry("1200x700")
+    root.minsize(1000, 600)
+
+    threading.Thread(target=pre_carregar, daemon=True).start()
+    dlg = LoginDialog(root)
+    root.wait_window(dlg)
+
+    if not dlg.valid:
+        root.destroy()
+        sys.exit()
+
+    app(root)
+    root.mainloop()
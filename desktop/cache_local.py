@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Cache local por aba do admin desktop.
+
+Cada aba guarda as linhas da tabela como registros compactos (a classe
+com __slots__ gerada pelo esquema, models/esquema.py) e sincroniza só o
+que é novo: `id > maior id em cache`, por keyset. Os agendamentos só são
+inseridos (nada os altera depois), então isso basta; para pegar o que
+for mudado direto no banco, o cache inteiro é refeito depois de
+CACHE_TTL_S.
+
+Com o cache completo, trocar de aba e aplicar filtros de data e busca
+não toca na rede: FonteCache filtra localmente (datas por busca binária
+na ordem (data, id), texto pelo índice de trigramas de utils/busca.py)
+e tem a mesma interface da FonteKeyset, então a lista virtual não muda.
+"""
+import os
+import sys
+import time
+from bisect import bisect_left, bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from desktop.carregamento import Cancelamento, Carregador
+from models.esquema import ESQUEMAS
+from utils.busca import IndiceNgramas, texto_registro
+from utils.paginacao import codificar_cursor
+
+CACHE_TTL_S = float(os.getenv("DESKTOP_CACHE_TTL_S", "900"))      # refaz o cache inteiro
+SINCRONIZAR_S = float(os.getenv("DESKTOP_SINCRONIZAR_S", "30"))   # intervalo mínimo entre sincronizações
+PAGINA_SYNC = 1000
+
+# colunas com poucos valores distintos: uma string compartilhada por valor
+_INTERNAR = ("data", "turno", "genero", "horario_chegada", "duracao")
+
+
+class CacheTab:
+    """Linhas de uma tabela em memória, sincronizadas em segundo plano."""
+
+    def __init__(self, widget, tabela: str, ao_completar: Optional[Callable[["CacheTab"], None]] = None):
+        esquema = ESQUEMAS[tabela]
+        self.tabela = tabela
+        self.Registro = esquema.Registro
+        self.colunas = esquema.colunas_leitura
+        self.campos_busca = esquema.campos_busca
+        self.ao_completar = ao_completar
+        self._carregador = Carregador(widget)
+        self.limpar()
+
+    def limpar(self) -> None:
+        if hasattr(self, "_carregador"):
+            self._carregador.cancelar()
+        self.registros: Dict[int, Any] = {}
+        self.indice = IndiceNgramas()
+        self.max_id: Optional[int] = None
+        self.completo = False
+        self.criado_em: Optional[float] = None
+        self.sincronizado_em: Optional[float] = None
+        self.erro: Optional[Exception] = None
+        self.versao = 0
+        self._ordem: Optional[Tuple[List[Tuple[str, int]], List[Any]]] = None
+
+    def __len__(self) -> int:
+        return len(self.registros)
+
+    # ---- sincronização ----
+    @property
+    def sincronizando(self) -> bool:
+        return self._carregador.ocupado
+
+    def expirado(self) -> bool:
+        return self.criado_em is not None and time.monotonic() - self.criado_em > CACHE_TTL_S
+
+    def precisa_sincronizar(self) -> bool:
+        if self.sincronizando:
+            return False
+        return self.sincronizado_em is None or time.monotonic() - self.sincronizado_em > SINCRONIZAR_S
+
+    def sincronizar(self) -> None:
+        """Busca as linhas com id acima do maior em cache (todas, na 1ª vez)."""
+        if self.sincronizando:
+            return
+        if self.criado_em is None:
+            self.criado_em = time.monotonic()
+        apos = self.max_id
+        self.erro = None
+        self._carregador.iniciar(
+            lambda cancel: self._paginas(cancel, apos),
+            ao_lote=self._receber, ao_fim=self._concluir, ao_erro=self._falhou,
+        )
+
+    def _paginas(self, cancel: Cancelamento, apos: Optional[int]):
+        from database import listar_pagina
+
+        cursor = codificar_cursor("id", [apos]) if apos is not None else None
+        while not cancel.cancelado:
+            res = listar_pagina(self.tabela, limite=PAGINA_SYNC, cursor=cursor, ordem="id")
+            if res is None:
+                raise RuntimeError("Banco indisponível.")
+            if res["dados"]:
+                yield [self._preparar(r) for r in res["dados"]]
+            cursor = res["proximo"]
+            if not cursor:
+                return
+
+    def _preparar(self, r: Dict[str, Any]) -> Tuple[Any, str, set]:
+        """Na thread de carga: registro compacto + texto e trigramas da busca."""
+        for c in _INTERNAR:
+            v = r.get(c)
+            if isinstance(v, str):
+                r[c] = sys.intern(v)
+        texto = texto_registro(r, self.campos_busca)
+        return self.Registro.from_row(r), texto, self.indice.gramas(texto)
+
+    def _receber(self, lote: List[Tuple[Any, str, set]]) -> None:
+        for reg, texto, gramas in lote:
+            self.registros[reg.id] = reg
+            self.indice.adicionar(reg.id, texto, gramas)
+        self.max_id = max(self.max_id or 0, lote[-1][0].id)
+        self._ordem = None
+        self.versao += 1
+
+    def _concluir(self) -> None:
+        primeira = not self.completo
+        self.completo = True
+        self.sincronizado_em = time.monotonic()
+        self.versao += 1
+        if primeira and self.ao_completar:
+            self.ao_completar(self)
+
+    def _falhou(self, e: Exception) -> None:
+        self.erro = e
+        self.versao += 1
+
+    # ---- consulta local ----
+    def _ordenado(self) -> Tuple[List[Tuple[str, int]], List[Any]]:
+        """(chaves (data, id) crescentes, registros na mesma ordem); refeito só quando muda."""
+        if self._ordem is None:
+            regs = sorted(self.registros.values(), key=lambda r: (r.data or "", r.id))
+            self._ordem = ([(r.data or "", r.id) for r in regs], regs)
+        return self._ordem
+
+    def filtrar(
+        self,
+        desde: Optional[str] = None,
+        ate: Optional[str] = None,
+        igual: Optional[Dict[str, Any]] = None,
+        busca: Optional[str] = None,
+    ) -> List[Any]:
+        """Registros em ordem (data, id) decrescente, como a lista do servidor."""
+        chaves, regs = self._ordenado()
+        ini = bisect_left(chaves, (desde, -1)) if desde else 0
+        fim = bisect_right(chaves, (ate, sys.maxsize)) if ate else len(regs)
+        vista = regs[ini:fim]
+        for c, v in (igual or {}).items():
+            vista = [r for r in vista if str(getattr(r, c, "") or "") == str(v)]
+        if busca:
+            ids = self.indice.buscar(busca)
+            vista = [r for r in vista if r.id in ids]
+        vista.reverse()
+        return vista
+
+
+class FonteCache:
+    """
+    Mesma interface da FonteKeyset (desktop/lista_virtual.py), servida pelo
+    CacheTab: filtros locais, nada de rede. Se o cache sincroniza novas
+    linhas enquanto a lista está aberta, a vista é refeita.
+    """
+
+    def __init__(
+        self,
+        cache: CacheTab,
+        formatar: Callable[[Dict[str, Any]], Tuple[tuple, tuple]],
+        desde: Optional[str] = None,
+        ate: Optional[str] = None,
+        igual: Optional[Dict[str, Any]] = None,
+        busca: Optional[str] = None,
+    ):
+        self.cache = cache
+        self.tabela = cache.tabela
+        self.formatar = formatar
+        self.filtros = {"desde": desde, "ate": ate, "igual": igual, "busca": busca}
+        self.erro: Optional[Exception] = None
+        self.versao = 0
+        self._vista: List[Any] = []
+        self._visto = -1
+
+    def iniciar(self) -> None:
+        self.drenar()
+
+    def cancelar(self) -> None:
+        pass  # a sincronização do cache é da aba, não desta vista
+
+    @property
+    def ativa(self) -> bool:
+        return self.cache.sincronizando
+
+    def progresso(self) -> str:
+        return f"Sincronizando… {len(self.cache)} em cache"
+
+    def resumo(self) -> str:
+        return f"{len(self._vista)} registro(s)"
+
+    def tamanho(self) -> int:
+        return len(self._vista)
+
+    def linha(self, i: int) -> Optional[Tuple[tuple, tuple]]:
+        if 0 <= i < len(self._vista):
+            return self.formatar(self._vista[i].as_dict())
+        return None
+
+    def pedir(self, inicio: int, fim: int) -> None:
+        pass
+
+    def registros(self) -> List[Any]:
+        """As linhas filtradas da vista, na ordem da tela (a exportação usa estas)."""
+        return list(self._vista)
+
+    def drenar(self) -> None:
+        if self.cache.versao != self._visto:
+            self._visto = self.cache.versao
+            self._vista = self.cache.filtrar(**self.filtros)
+            self.erro = self.cache.erro
+            self.versao += 1
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Carregamento em segundo plano para o admin desktop.
+
+As consultas ao Supabase rodam numa thread; os resultados voltam para o
+Tk por uma fila, drenada no loop principal com `after` (o Tk não pode ser
+tocado fora da thread principal). Cada `iniciar` cancela o pedido
+anterior: lotes de um pedido velho (aba ou filtro que já mudou) são
+descartados e a thread dele para na próxima página. A exportação CSV
+do admin segue o mesmo caminho (exportar_csv + JanelaExportacao).
+"""
+import csv
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import tkinter as tk
+from tkinter import ttk
+
+
+class Cancelamento:
+    """Sinal de cancelamento de um pedido (consultado entre páginas pela thread)."""
+
+    def __init__(self):
+        self._ev = threading.Event()
+
+    def cancelar(self) -> None:
+        self._ev.set()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._ev.is_set()
+
+
+Tarefa = Callable[[Cancelamento], Iterable[List[Any]]]
+
+
+class Carregador:
+    """
+    Roda `tarefa(cancelamento)` — um gerador de lotes — numa thread daemon e
+    entrega cada lote a `ao_lote` na thread do Tk. Por tick do `after`, gasta
+    no máximo `orcamento_ms` entregando lotes, para a janela continuar
+    respondendo enquanto milhares de linhas chegam.
+    """
+
+    def __init__(self, widget, intervalo_ms: int = 30, orcamento_ms: int = 15):
+        self.widget = widget
+        self.intervalo_ms = intervalo_ms
+        self.orcamento_ms = orcamento_ms
+        self._fila: "queue.Queue" = queue.Queue()
+        self._atual: Optional[Cancelamento] = None
+        self._handlers: Dict[str, Optional[Callable]] = {}
+        self._agendado = False
+
+    @property
+    def ocupado(self) -> bool:
+        return self._atual is not None
+
+    def iniciar(
+        self,
+        tarefa: Tarefa,
+        ao_lote: Callable[[List[Any]], None],
+        ao_fim: Optional[Callable[[], None]] = None,
+        ao_erro: Optional[Callable[[Exception], None]] = None,
+    ) -> Cancelamento:
+        self.cancelar()
+        tok = self._atual = Cancelamento()
+        self._handlers = {"lote": ao_lote, "fim": ao_fim, "erro": ao_erro}
+        threading.Thread(target=self._rodar, args=(tok, tarefa), daemon=True, name="carregar").start()
+        self._agendar()
+        return tok
+
+    def cancelar(self) -> None:
+        if self._atual is not None:
+            self._atual.cancelar()
+            self._atual = None
+
+    # ---- thread de trabalho ----
+    def _rodar(self, tok: Cancelamento, tarefa: Tarefa) -> None:
+        try:
+            for lote in tarefa(tok):
+                if tok.cancelado:
+                    return
+                self._fila.put((tok, "lote", lote))
+            self._fila.put((tok, "fim", None))
+        except Exception as e:
+            self._fila.put((tok, "erro", e))
+
+    # ---- thread do Tk ----
+    def _agendar(self) -> None:
+        if not self._agendado:
+            self._agendado = True
+            self.widget.after(self.intervalo_ms, self._drenar)
+
+    def _drenar(self) -> None:
+        self._agendado = False
+        limite = time.monotonic() + self.orcamento_ms / 1000
+        while time.monotonic() < limite:
+            try:
+                tok, tipo, dado = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            if tok is not self._atual:
+                continue  # pedido velho: descarta
+            if tipo != "lote":
+                self._atual = None
+            fn = self._handlers.get(tipo)
+            if fn is None:
+                continue
+            if tipo == "fim":
+                fn()
+            else:
+                fn(dado)
+        if self._atual is not None or not self._fila.empty():
+            self._agendar()
+
+
+def paginas_agendamentos(
+    tabela: str,
+    cancelamento: Cancelamento,
+    desde: Optional[str] = None,
+    ate: Optional[str] = None,
+    igual: Optional[Dict[str, Any]] = None,
+    busca: Optional[str] = None,
+    pagina: int = 500,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Páginas de `tabela` por data (mais recentes primeiro), via keyset; para se cancelado."""
+    from database import listar_pagina
+
+    cursor = None
+    while not cancelamento.cancelado:
+        res = listar_pagina(tabela, limite=pagina, cursor=cursor, desde=desde, ate=ate,
+                             ordem="-data", igual=igual, busca=busca)
+        if res is None:
+            raise RuntimeError("Banco indisponível.")
+        if res["dados"]:
+            yield res["dados"]
+        cursor = res["proximo"]
+        if not cursor:
+            return
+
+
+def exportar_csv(
+    caminho: str,
+    tabela: str,
+    cabecalho: Sequence[str],
+    formatar: Callable[[Dict[str, Any]], Tuple[tuple, tuple]],
+    filtros: Dict[str, Any],
+    cancelamento: Cancelamento,
+    pagina: int = 1000,
+    registros: Optional[Sequence[Any]] = None,
+) -> Iterator[List[Optional[int]]]:
+    """
+    Tarefa do Carregador: grava o resultado filtrado inteiro de `tabela` no
+    CSV (';', UTF-8 com BOM, para o Excel), página a página, direto do
+    servidor — nada passa pelo Treeview. Com `registros` (as linhas já
+    filtradas do cache local, desktop/cache_local.py), grava essas, sem
+    rede: o CSV fica igual à lista da tela. Entrega [linhas gravadas,
+    total] a cada página (total None se a contagem falhar). Cancelada ou
+    com erro, apaga o arquivo pela metade.
+    """
+    if registros is not None:
+        total: Optional[int] = len(registros)
+        paginas = _paginas_cache(registros, cancelamento, pagina)
+    else:
+        from database import contar
+
+        try:
+            total = contar(tabela, **filtros)
+        except Exception as e:
+            print(f"Erro ao contar {tabela}:", e)
+            total = None
+        paginas = paginas_agendamentos(tabela, cancelamento, pagina=pagina, **filtros)
+
+    n = 0
+    ok = False
+    try:
+        with open(caminho, "w", newline="", encoding="utf-8-sig") as f:
+            w = csv.writer(f, delimiter=";")
+            w.writerow(cabecalho)
+            yield [0, total]
+            for linhas in paginas:
+                w.writerows(formatar(r)[0] for r in linhas)
+                n += len(linhas)
+                yield [n, total]
+        ok = not cancelamento.cancelado
+    finally:
+        if not ok:
+            try:
+                os.remove(caminho)
+            except OSError:
+                pass
+
+
+def _paginas_cache(registros: Sequence[Any], cancelamento: Cancelamento, pagina: int) -> Iterator[List[Dict[str, Any]]]:
+    """Registros do cache em páginas de dicts (formatar() altera o dict, não o registro)."""
+    for i in range(0, len(registros), pagina):
+        if cancelamento.cancelado:
+            return
+        yield [r.as_dict() for r in registros[i:i + pagina]]
+
+
+class JanelaExportacao(tk.Toplevel):
+    """Progresso de uma exportação em segundo plano, com botão Cancelar."""
+
+    def __init__(self, master, titulo: str, ao_cancelar: Callable[[], None]):
+        super().__init__(master)
+        self.title(titulo)
+        self.resizable(False, False)
+        self.transient(master)
+        self.ao_cancelar = ao_cancelar
+
+        frm = ttk.Frame(self, padding=15)
+        frm.pack(fill="both", expand=True)
+        self.texto = ttk.Label(frm, text="Contando registros…")
+        self.texto.pack(anchor="w")
+        self.barra = ttk.Progressbar(frm, mode="indeterminate", length=320)
+        self.barra.pack(fill="x", pady=10)
+        self.barra.start(15)
+        ttk.Button(frm, text="Cancelar", command=self.cancelar).pack(anchor="e")
+        self.protocol("WM_DELETE_WINDOW", self.cancelar)
+
+    def atualizar(self, n: int, total: Optional[int]) -> None:
+        if total:
+            if str(self.barra["mode"]) != "determinate":
+                self.barra.stop()
+                self.barra.config(mode="determinate", maximum=total)
+            self.barra["value"] = min(n, total)
+            self.texto.config(text=f"{n} de {total} registro(s)")
+        else:
+            self.texto.config(text=f"{n} registro(s)")
+
+    def cancelar(self) -> None:
+        self.ao_cancelar()
+        self.destroy()
+
+
+class IndicadorCarregando(ttk.Frame):
+    """Barra indeterminada + texto ("Carregando…", "1.234 registro(s)", erro)."""
+
+    def __init__(self, master, **kw):
+        super().__init__(master, **kw)
+        self.barra = ttk.Progressbar(self, mode="indeterminate", length=120)
+        self.texto = ttk.Label(self, text="")
+        self.texto.pack(side="right", padx=(6, 0))
+        self._ativo = False
+
+    def mostrar(self, texto: str = "Carregando…") -> None:
+        if not self._ativo:
+            self._ativo = True
+            self.barra.pack(side="left")
+            self.barra.start(15)
+        self.texto.config(text=texto)
+
+    def concluir(self, texto: str = "") -> None:
+        if self._ativo:
+            self._ativo = False
+            self.barra.stop()
+            self.barra.pack_forget()
+        self.texto.config(text=texto)
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+Treeview virtual para resultados grandes no admin desktop.
+
+Só existem no Treeview os itens da janela visível; rolar troca os
+valores desses itens, então o custo de desenhar não depende do tamanho
+da tabela. Os dados vêm do servidor em blocos por keyset, sem OFFSET:
+  - a barra de rolagem usa o total da contagem (contar()), e o 1º bloco
+    não precisa de mais nada: abrir a aba custa o mesmo com 100 ou 100
+    mil linhas;
+  - o bloco b é pedido com o cursor da última chave (data, id) do bloco
+    b-1 — o marco do bloco. Cada bloco que chega traz o marco do seguinte,
+    então rolar em sequência não faz consultas extras;
+  - num salto (barra, Ctrl+End), os marcos que faltam vêm de uma varredura
+    só das chaves, a partir do marco conhecido mais próximo, que para
+    quando chega ao bloco pedido.
+Memória: um marco por bloco já alcançado (no máximo MAX_LINHAS /
+TAM_BLOCO) e os blocos do cache LRU; os vizinhos da janela (margem) são
+pedidos antes de serem vistos. A lista rola até MAX_LINHAS linhas; além
+disso, os filtros restringem o resultado.
+"""
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from desktop.carregamento import Cancelamento, Carregador
+from utils.paginacao import codificar_cursor
+
+TAM_BLOCO = 100          # linhas por consulta de bloco
+MAX_BLOCOS = 60          # blocos guardados (LRU): ~6 mil linhas
+MARGEM = 50              # linhas pedidas além da janela visível, acima e abaixo
+PAGINA_CHAVES = 1000     # chaves por consulta da varredura
+MAX_LINHAS = 200000      # até onde a lista rola (marcos: MAX_LINHAS / TAM_BLOCO chaves)
+ORDEM = "-data"          # mais recentes primeiro (data, id)
+
+Linha = Tuple[tuple, tuple]  # (valores das colunas, tags)
+Chave = Tuple[Any, int]      # (data, id)
+
+
+class FonteKeyset:
+    """
+    Resultado filtrado de `tabela`, ordenado por (data, id) decrescente.
+    O estado vive na thread do Tk; a rede fica com o Carregador da
+    varredura de chaves e uma thread que busca blocos (e o total).
+    `formatar(registro)` roda nessa thread e devolve (valores, tags)
+    prontos para o Treeview.
+    """
+
+    def __init__(
+        self,
+        widget,
+        tabela: str,
+        formatar: Callable[[Dict[str, Any]], Linha],
+        desde: Optional[str] = None,
+        ate: Optional[str] = None,
+        igual: Optional[Dict[str, Any]] = None,
+        busca: Optional[str] = None,
+    ):
+        self.tabela = tabela
+        self.formatar = formatar
+        self.filtros = {"desde": desde, "ate": ate, "igual": igual, "busca": busca}
+        self.marcos: Dict[int, Chave] = {}  # bloco -> chave da última linha do bloco anterior
+        self.total: Optional[int] = None     # contagem do servidor
+        self.fim: Optional[int] = None       # linhas do resultado, quando a varredura chega ao fim
+        self.erro: Optional[Exception] = None
+        self.versao = 0  # muda quando chegam dados (a lista redesenha)
+
+        self._blocos: "OrderedDict[int, List[Linha]]" = OrderedDict()
+        self._pendentes: Set[int] = set()
+        self._aguardando: Set[int] = set()  # blocos esperando o marco
+        self._foco = 0
+        self._alvo = 0       # bloco até onde a varredura em curso vai (lido na thread dela)
+        self._varrendo_de = 0
+        self._entrada: "queue.LifoQueue" = queue.LifoQueue()  # o pedido mais novo primeiro
+        self._saida: "queue.Queue" = queue.Queue()
+        self._cancel = Cancelamento()
+        self._varredura = Carregador(widget)
+
+    # ---- ciclo de vida ----
+    def iniciar(self) -> None:
+        threading.Thread(target=self._trabalhar, daemon=True, name="blocos").start()
+        self._entrada.put(("contar",))
+        self.pedir(0, TAM_BLOCO)
+
+    def cancelar(self) -> None:
+        self._cancel.cancelar()
+        self._varredura.cancelar()
+        self._entrada.put(None)
+
+    @property
+    def ativa(self) -> bool:
+        """Ainda há algo a chegar (blocos pedidos ou a varredura de um salto)."""
+        return not self._cancel.cancelado and (self._varredura.ocupado or bool(self._pendentes))
+
+    def progresso(self) -> str:
+        if self._varredura.ocupado:
+            return f"Posicionando… linha {max(self.marcos, default=0) * TAM_BLOCO} de {self._alvo * TAM_BLOCO}"
+        total = self.total if self.total is not None else "?"
+        return f"Carregando… {total} registro(s)"
+
+    def resumo(self) -> str:
+        n = self.fim if self.fim is not None else self.total
+        if n is None:
+            return f"{self.tamanho()} registro(s)"
+        if n > MAX_LINHAS:
+            return f"{n} registro(s); a lista mostra os {MAX_LINHAS} primeiros — use os filtros"
+        return f"{n} registro(s)"
+
+    def tamanho(self) -> int:
+        if self.fim is not None:
+            n = self.fim
+        else:
+            n = max(self.total or 0, len(self._blocos.get(0, ())))
+        return min(n, MAX_LINHAS)
+
+    # ---- leitura (thread do Tk) ----
+    def linha(self, i: int) -> Optional[Linha]:
+        b, k = divmod(i, TAM_BLOCO)
+        bloco = self._blocos.get(b)
+        return bloco[k] if bloco is not None and k < len(bloco) else None
+
+    def pedir(self, inicio: int, fim: int) -> None:
+        """Garante (em segundo plano) os blocos que cobrem [inicio, fim)."""
+        inicio = max(0, inicio)
+        fim = min(fim, MAX_LINHAS)
+        self._foco = inicio // TAM_BLOCO
+        for b in range(inicio // TAM_BLOCO, max(inicio, fim - 1) // TAM_BLOCO + 1):
+            if b in self._blocos:
+                self._blocos.move_to_end(b)
+            elif b not in self._pendentes:
+                self._enfileirar(b)
+
+    def _enfileirar(self, b: int) -> None:
+        if self.fim is not None and b * TAM_BLOCO >= self.fim:
+            self._aguardando.discard(b)  # depois do fim do resultado
+            return
+        if b == 0:
+            cursor = None
+        elif b in self.marcos:
+            cursor = codificar_cursor(ORDEM, list(self.marcos[b]))
+        else:
+            self._aguardando.add(b)
+            self._varrer(b)
+            return
+        self._aguardando.discard(b)
+        self._pendentes.add(b)
+        self._entrada.put(("bloco", b, cursor))
+
+    def drenar(self) -> None:
+        """Aplica o que a thread de blocos entregou."""
+        while True:
+            try:
+                msg = self._saida.get_nowait()
+            except queue.Empty:
+                return
+            if msg[0] == "total":
+                self.total = msg[1]
+            elif msg[0] == "bloco":
+                _, b, linhas, ultima = msg
+                self._pendentes.discard(b)
+                self._blocos[b] = linhas
+                while len(self._blocos) > MAX_BLOCOS:
+                    self._blocos.popitem(last=False)
+                if len(linhas) == TAM_BLOCO:
+                    self._marcar({b + 1: ultima})
+                elif self.fim is None:
+                    self.fim = b * TAM_BLOCO + len(linhas)
+            elif msg[0] == "descartado":
+                self._pendentes.discard(msg[1])
+            elif msg[0] == "erro":
+                self._pendentes.discard(msg[1])
+                self.erro = msg[2]
+            self.versao += 1
+
+    # ---- marcos e varredura de chaves ----
+    def _marcar(self, marcos: Dict[int, Chave]) -> None:
+        self.marcos.update(marcos)
+        for b in sorted(self._aguardando & marcos.keys(), key=lambda x: abs(x - self._foco)):
+            self._enfileirar(b)
+
+    def _varrer(self, b: int) -> None:
+        """Busca os marcos até o bloco `b`, a partir do marco conhecido mais próximo antes dele."""
+        if self._varredura.ocupado and self._varrendo_de <= b:
+            self._alvo = max(self._alvo, b)  # a varredura em curso passa por ele
+            return
+        inicio = max((k for k in self.marcos if k < b), default=0)
+        cursor = codificar_cursor(ORDEM, list(self.marcos[inicio])) if inicio else None
+        self._varrendo_de, self._alvo = inicio, b
+        self._varredura.iniciar(lambda cancel: self._paginas_chaves(cancel, inicio, cursor),
+                                ao_lote=self._receber_chaves, ao_fim=self._varredura_concluida,
+                                ao_erro=self._falhou)
+
+    def _paginas_chaves(self, cancel: Cancelamento, inicio: int, cursor: Optional[str]):
+        """Na thread da varredura: páginas só de (data, id); entrega só os marcos (1 a cada TAM_BLOCO)."""
+        from database import listar_pagina
+
+        pos = inicio * TAM_BLOCO  # posição da próxima linha lida
+        while not cancel.cancelado and pos < self._alvo * TAM_BLOCO:
+            res = listar_pagina(self.tabela, colunas=["id", "data"], limite=PAGINA_CHAVES,
+                                cursor=cursor, ordem=ORDEM, **self.filtros)
+            if res is None:
+                raise RuntimeError("Banco indisponível.")
+            dados = res["dados"]
+            marcos = {
+                (pos + k + 1) // TAM_BLOCO: (r.get("data"), r["id"])
+                for k, r in enumerate(dados)
+                if (pos + k + 1) % TAM_BLOCO == 0
+            }
+            pos += len(dados)
+            cursor = res["proximo"]
+            yield marcos, (pos if not cursor else None)
+            if not cursor:
+                return
+
+    def _receber_chaves(self, lote: Tuple[Dict[int, Chave], Optional[int]]) -> None:
+        marcos, fim = lote
+        if fim is not None:
+            self.fim = fim
+            for b in [b for b in self._aguardando if b * TAM_BLOCO >= fim]:
+                self._aguardando.discard(b)
+        self._marcar(marcos)
+        self.versao += 1
+
+    def _varredura_concluida(self) -> None:
+        # blocos pedidos antes do início desta varredura: outra, a partir do marco deles
+        faltam = [b for b in self._aguardando if b not in self.marcos]
+        if faltam:
+            self._varrer(min(faltam, key=lambda x: abs(x - self._foco)))
+        self.versao += 1
+
+    def _falhou(self, e: Exception) -> None:
+        self.erro = e
+        self.versao += 1
+
+    # ---- thread de blocos ----
+    def _trabalhar(self) -> None:
+        from database import contar, listar_pagina
+
+        while True:
+            msg = self._entrada.get()
+            if msg is None or self._cancel.cancelado:
+                return
+            if msg[0] == "contar":
+                try:
+                    self._saida.put(("total", contar(self.tabela, **self.filtros)))
+                except Exception as e:
+                    print(f"Erro ao contar {self.tabela}:", e)
+                continue
+            _, b, cursor = msg
+            if abs(b - self._foco) > MAX_BLOCOS // 2:  # saiu de vista enquanto esperava
+                self._saida.put(("descartado", b))
+                continue
+            try:
+                res = listar_pagina(self.tabela, limite=TAM_BLOCO, cursor=cursor, ordem=ORDEM, **self.filtros)
+                if res is None:
+                    raise RuntimeError("Banco indisponível.")
+                dados = res["dados"]
+                ultima = (dados[-1].get("data"), dados[-1]["id"]) if dados else None
+                self._saida.put(("bloco", b, [self.formatar(r) for r in dados], ultima))
+            except Exception as e:
+                self._saida.put(("erro", b, e))
+
+
+class ListaVirtual:
+    """
+    Liga um Treeview e uma barra de rolagem vertical a uma FonteKeyset.
+    O Treeview tem só as linhas visíveis; a barra e a roda do mouse movem
+    `topo` (a posição da 1ª linha visível no resultado).
+    """
+
+    def __init__(self, tree, barra, ao_estado: Optional[Callable[[FonteKeyset], None]] = None):
+        self.tree = tree
+        self.barra = barra
+        self.ao_estado = ao_estado
+        self.fonte: Optional[FonteKeyset] = None
+        self.topo = 0
+        self.visiveis = 20
+        self._itens: List[str] = []
+        self._versao = -1
+        self._vigiando = False
+
+        tree.configure(yscrollcommand="")
+        barra.configure(command=self._rolar_barra)
+        tree.bind("<Configure>", self._redimensionar, add="+")
+        tree.bind("<MouseWheel>", self._roda)
+        tree.bind("<Button-4>", lambda e: self._mover(-3, limpar=True))
+        tree.bind("<Button-5>", lambda e: self._mover(3, limpar=True))
+        tree.bind("<Up>", lambda e: self._tecla(-1))
+        tree.bind("<Down>", lambda e: self._tecla(1))
+        tree.bind("<Prior>", lambda e: self._mover(-self.visiveis))
+        tree.bind("<Next>", lambda e: self._mover(self.visiveis))
+        tree.bind("<Control-Home>", lambda e: self._ir(0))
+        tree.bind("<Control-End>", lambda e: self._ir(self._total()))
+
+    def definir_fonte(self, fonte: FonteKeyset, manter_posicao: bool = False) -> None:
+        """Troca a fonte; `manter_posicao` guarda o topo (mesmo resultado, outra origem)."""
+        if self.fonte is not None:
+            self.fonte.cancelar()
+        self.fonte = fonte
+        self._versao = -1
+        if not manter_posicao:
+            self.topo = 0
+            self.tree.selection_remove(self.tree.selection())
+        fonte.iniciar()
+        self._redesenhar()
+        self._vigiar()
+
+    def cancelar(self) -> None:
+        if self.fonte is not None:
+            self.fonte.cancelar()
+
+    # ---- desenho ----
+    def _total(self) -> int:
+        return self.fonte.tamanho() if self.fonte else 0
+
+    def _redesenhar(self) -> None:
+        fonte = self.fonte
+        total = self._total()
+        self.topo = max(0, min(self.topo, total - self.visiveis))
+        n = max(0, min(self.visiveis, total - self.topo))
+
+        while len(self._itens) < n:
+            self._itens.append(self.tree.insert("", "end"))
+        if len(self._itens) > n:
+            self.tree.delete(*self._itens[n:])
+            del self._itens[n:]
+
+        vazio = ("…",) * len(self.tree["columns"])
+        for k, iid in enumerate(self._itens):
+            linha = fonte.linha(self.topo + k) if fonte else None
+            valores, tags = linha if linha is not None else (vazio, ())
+            self.tree.item(iid, values=valores, tags=tags)
+
+        if total:
+            self.barra.set(self.topo / total, (self.topo + n) / total)
+        else:
+            self.barra.set(0, 1)
+        if fonte is not None:
+            fonte.pedir(self.topo - MARGEM, self.topo + n + MARGEM)
+            self._versao = fonte.versao
+            if self.ao_estado:
+                self.ao_estado(fonte)
+        self._vigiar()
+
+    def _vigiar(self) -> None:
+        """Enquanto a fonte recebe dados, redesenha quando algo chega."""
+        if self._vigiando or self.fonte is None:
+            return
+        self._vigiando = True
+        self.tree.after(40, self._vigia)
+
+    def _vigia(self) -> None:
+        self._vigiando = False
+        fonte = self.fonte
+        if fonte is None:
+            return
+        fonte.drenar()
+        if fonte.versao != self._versao:
+            self._redesenhar()
+        elif fonte.ativa:
+            self._vigiar()
+        elif self.ao_estado:
+            self.ao_estado(fonte)
+
+    # ---- rolagem ----
+    def _ir(self, topo: int, limpar: bool = False) -> str:
+        if limpar:
+            self.tree.selection_remove(self.tree.selection())
+        self.topo = topo
+        self._redesenhar()
+        return "break"
+
+    def _mover(self, delta: int, limpar: bool = False) -> str:
+        return self._ir(self.topo + delta, limpar)
+
+    def _roda(self, event) -> str:
+        return self._mover(-3 if event.delta > 0 else 3, limpar=True)
+
+    def _tecla(self, delta: int) -> Optional[str]:
+        """Setas: dentro da janela, o Treeview move a seleção; na borda, a lista rola."""
+        foco = self.tree.focus()
+        if foco not in self._itens:
+            return None
+        i = self._itens.index(foco)
+        if (delta < 0 and i == 0) or (delta > 0 and i == len(self._itens) - 1):
+            return self._mover(delta)
+        return None
+
+    def _rolar_barra(self, acao, *args) -> None:
+        total = self._total()
+        if acao == "moveto":
+            self._ir(int(float(args[0]) * total), limpar=True)
+        elif acao == "scroll":
+            passos = int(args[0]) * (self.visiveis if args[1] == "pages" else 1)
+            self._mover(passos, limpar=True)
+
+    def _redimensionar(self, event) -> None:
+        from tkinter import ttk
+
+        try:
+            altura_linha = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        except (TypeError, ValueError):
+            altura_linha = 20
+        # descontando o cabeçalho (~1 linha)
+        visiveis = max(1, event.height // altura_linha - 1)
+        if visiveis != self.visiveis:
+            self.visiveis = visiveis
+            self._redesenhar()
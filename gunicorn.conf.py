@@ -0,0 +1,20 @@
+# gunicorn.conf.py — carregado automaticamente pelo gunicorn (ver Procfile)
+import os
+import shutil
+
+# Métricas do prometheus_client somadas entre os workers (utils/metricas.py)
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/fcja-metrics")
+
+
+def on_starting(server):
+    d = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(d, ignore_errors=True)
+    os.makedirs(d, exist_ok=True)
+
+
+def child_exit(server, worker):
+    try:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
+    except Exception:
+        pass
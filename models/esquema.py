@@ -0,0 +1,308 @@
+# models/esquema.py
+"""
+Esquema declarativo das tabelas de agendamento.
+
+Cada tabela é descrita uma única vez (campos, rótulos, tipos, regra de
+data) e daqui saem:
+  - o montador de payload (função gerada, sem dicts intermediários);
+  - a validação + normalização do formulário (`preparar`);
+  - o INSERT parametrizado usado pelos models (psycopg2);
+  - as colunas do admin desktop e a ordem das colunas nos exports;
+  - os campos da busca textual (nome/instituição, contato, observação);
+  - uma classe de registro com __slots__ para guardar linhas lidas.
+"""
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.validacoes import (
+    DATA_FECHADA,
+    FORA_DA_JANELA,
+    data_agendavel,
+    get_calendario,
+    validar_email,
+    validar_telefone,
+    validar_lote,
+    normalizar_turno,
+    parse_data,
+)
+
+ERRO_JANELA = "Data fora do período de agendamento"
+
+
+class Campo:
+    """
+    tipo: "texto" | "inteiro" | "data" | "turno"
+    desktop: aparece como coluna no admin desktop
+    largura: largura da coluna no desktop
+    aliases: nomes alternativos aceitos no formulário
+    """
+    __slots__ = ("nome", "rotulo", "tipo", "padrao", "desktop", "largura", "aliases")
+
+    def __init__(
+        self,
+        nome: str,
+        rotulo: str,
+        tipo: str = "texto",
+        padrao: Any = "",
+        desktop: bool = True,
+        largura: int = 140,
+        aliases: Tuple[str, ...] = (),
+    ):
+        self.nome = nome
+        self.rotulo = rotulo
+        self.tipo = tipo
+        self.padrao = padrao
+        self.desktop = desktop
+        self.largura = largura
+        self.aliases = aliases
+
+
+def _int(v: Any, padrao: int) -> int:
+    try:
+        return int(v)
+    except Exception:
+        return padrao
+
+
+def _compilar_payload(campos: List[Campo]) -> Callable[[Any], Dict[str, Any]]:
+    """
+    Gera uma função `payload(data)` com um único literal de dict,
+    equivalente aos montadores escritos à mão em database.py.
+    """
+    linhas = []
+    for c in campos:
+        if c.aliases:
+            expr = " or ".join(f"g({n!r})" for n in (c.nome,) + c.aliases)
+            expr = f"({expr})"
+        else:
+            expr = f"g({c.nome!r})"
+
+        if c.tipo == "inteiro":
+            linhas.append(f"        {c.nome!r}: _int({expr}, {int(c.padrao)!r}),")
+        elif c.tipo == "data":
+            linhas.append(f"        {c.nome!r}: {expr},")
+        else:
+            linhas.append(f"        {c.nome!r}: {expr} or {c.padrao!r},")
+
+    fonte = "def payload(data):\n    g = data.get\n    return {\n" + "\n".join(linhas) + "\n    }\n"
+    ns: Dict[str, Any] = {"_int": _int}
+    exec(compile(fonte, "<esquema>", "exec"), ns)
+    return ns["payload"]
+
+
+def _compilar_registro(nome: str, colunas: Tuple[str, ...]) -> type:
+    """Classe de registro compacta (sem __dict__) com as colunas da tabela."""
+
+    def __init__(self, *valores):
+        for c, v in zip(colunas, valores):
+            setattr(self, c, v)
+
+    def __repr__(self):
+        return f"{nome}(" + ", ".join(f"{c}={getattr(self, c, None)!r}" for c in colunas) + ")"
+
+    def from_row(cls, row: Dict[str, Any]):
+        return cls(*[row.get(c) for c in colunas])
+
+    def valores(self, cols=colunas) -> Tuple[Any, ...]:
+        return tuple(getattr(self, c, None) for c in cols)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {c: getattr(self, c, None) for c in colunas}
+
+    return type(nome, (), {
+        "__slots__": colunas,
+        "__init__": __init__,
+        "__repr__": __repr__,
+        "from_row": classmethod(from_row),
+        "valores": valores,
+        "as_dict": as_dict,
+    })
+
+
+# campos pesquisados pela busca textual (utils/busca.py), na ordem em que aparecem
+_CAMPOS_BUSCA = frozenset({
+    "nome", "nome_escola", "nome_ies", "representante", "instituicao",
+    "email", "telefone", "observacao",
+})
+
+
+class Tabela:
+    """
+    regra_data: "visita" (terça a domingo) ou "pesquisa" (segunda a sexta)
+    campo_nome: coluna exibida como nome/instituição
+    campo_qtd: coluna com a quantidade de pessoas (None => 1 por registro)
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        campos: List[Campo],
+        regra_data: str,
+        campo_nome: str,
+        campo_qtd: Optional[str] = None,
+    ):
+        self.nome = nome
+        self.campos = campos
+        self.regra_data = regra_data
+        self.campo_nome = campo_nome
+        self.campo_qtd = campo_qtd
+
+        # colunas gravadas (sem id) e colunas lidas (com id)
+        self.colunas: Tuple[str, ...] = tuple(c.nome for c in campos)
+        self.colunas_leitura: Tuple[str, ...] = ("id",) + self.colunas
+        self.colunas_desktop: List[Tuple[str, str]] = [("id", "ID")] + [
+            (c.nome, c.rotulo) for c in campos if c.desktop
+        ]
+        self.larguras: Dict[str, int] = {"id": 140, **{c.nome: c.largura for c in campos}}
+        self.campos_busca: Tuple[str, ...] = tuple(c for c in self.colunas if c in _CAMPOS_BUSCA)
+
+        self.payload = _compilar_payload(campos)
+        self.Registro = _compilar_registro(nome.capitalize(), self.colunas_leitura)
+        self.sql_insert = (
+            f"INSERT INTO {nome} ({', '.join(self.colunas)}) "
+            f"VALUES ({','.join(['%s'] * len(self.colunas))}) RETURNING *"
+        )
+
+        self._erro_data = f"Data inválida para {regra_data}"
+
+    def preparar(self, data: Any) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Valida e normaliza um formulário (dict ou MultiDict).
+        Retorna (payload, None) ou (None, mensagem de erro).
+        """
+        g = data.get
+        turno = normalizar_turno(g("turno"))
+        if not turno:
+            return None, "Turno inválido"
+
+        # a data é convertida uma única vez (e memorizada em utils/validacoes)
+        d = parse_data(g("data"))
+        if d is None:
+            return None, "Data inválida"
+        if not data_agendavel(d):  # antes do calendário: só anos próximos são compilados
+            return None, ERRO_JANELA
+        if not get_calendario().aberto(self.nome, d, turno):
+            return None, self._erro_fechado(d, turno)
+
+        if not validar_email(g("email") or ""):
+            return None, "E-mail inválido"
+        if not validar_telefone(g("telefone") or ""):
+            return None, "Telefone inválido"
+
+        p = self.payload(data)
+        p["data"] = d.isoformat()
+        p["turno"] = turno
+        return p, None
+
+    def preparar_lote(
+        self, registros: Sequence[Any]
+    ) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """
+        Mesmo contrato de preparar(), para uma lista de registros:
+        valida todos de uma vez (validar_lote) e só monta o payload
+        dos válidos. As mensagens seguem a mesma ordem de precedência.
+        """
+        res = validar_lote(registros, self.nome)
+        e = res.erros
+        payload = self.payload
+        saida: List[Tuple[Optional[Dict[str, Any]], Optional[str]]] = []
+        add = saida.append
+        for reg, et, ed, ee, etl, iso, turno in zip(
+            registros, e["turno"], e["data"], e["email"], e["telefone"], res.data, res.turno
+        ):
+            if not (et or ed or ee or etl):
+                p = payload(reg)
+                p["data"] = iso
+                p["turno"] = turno
+                add((p, None))
+            elif et:
+                add((None, "Turno inválido"))
+            elif ed == DATA_FECHADA:
+                add((None, self._erro_fechado(parse_data(reg.get("data")), turno)))
+            elif ed:
+                add((None, ERRO_JANELA if ed == FORA_DA_JANELA else "Data inválida"))
+            elif ee:
+                add((None, "E-mail inválido"))
+            else:
+                add((None, "Telefone inválido"))
+        return saida
+
+    def _erro_fechado(self, d, turno: Optional[str]) -> str:
+        """Mensagem de data fechada, com o feriado/fechamento quando houver."""
+        motivo = get_calendario().motivo(self.nome, d, turno)
+        return f"{self._erro_data} ({motivo})" if motivo else self._erro_data
+
+    def qtd(self, registro: Dict[str, Any]) -> int:
+        if not self.campo_qtd:
+            return 1
+        return max(_int(registro.get(self.campo_qtd), 0), 0)
+
+
+def _comuns_fim() -> List[Campo]:
+    return [
+        Campo("data", "Data", tipo="data"),
+        Campo("turno", "Turno", tipo="turno"),
+        Campo("horario_chegada", "Horário chegada"),
+        Campo("duracao", "Duração"),
+        Campo("observacao", "Observação", largura=400),
+    ]
+
+
+ESQUEMAS: Dict[str, Tabela] = {
+    "visitante": Tabela(
+        "visitante",
+        [
+            Campo("nome", "Nome", largura=400),
+            Campo("genero", "Gênero", desktop=False),
+            Campo("email", "E-mail"),
+            Campo("telefone", "Telefone"),
+            Campo("endereco", "Endereço", desktop=False),
+            Campo("qtd_pessoas", "Qtd pessoas", tipo="inteiro", padrao=1),
+        ] + _comuns_fim(),
+        regra_data="visita",
+        campo_nome="nome",
+        campo_qtd="qtd_pessoas",
+    ),
+    "escola": Tabela(
+        "escola",
+        [
+            Campo("nome_escola", "Nome escola", largura=400),
+            Campo("representante", "Representante"),
+            Campo("email", "E-mail"),
+            Campo("telefone", "Telefone"),
+            Campo("endereco", "Endereço", desktop=False),
+            Campo("num_alunos", "Alunos", tipo="inteiro", padrao=0),
+        ] + _comuns_fim(),
+        regra_data="visita",
+        campo_nome="nome_escola",
+        campo_qtd="num_alunos",
+    ),
+    "ies": Tabela(
+        "ies",
+        [
+            Campo("nome_ies", "IES", largura=400),
+            Campo("representante", "Representante", aliases=("responsavel",)),
+            Campo("email", "E-mail"),
+            Campo("telefone", "Telefone"),
+            Campo("endereco", "Endereço", desktop=False),
+            Campo("num_alunos", "Alunos", tipo="inteiro", padrao=0),
+        ] + _comuns_fim(),
+        regra_data="visita",
+        campo_nome="nome_ies",
+        campo_qtd="num_alunos",
+    ),
+    "pesquisador": Tabela(
+        "pesquisador",
+        [
+            Campo("nome", "Nome", largura=400),
+            Campo("genero", "Gênero", desktop=False),
+            Campo("email", "E-mail"),
+            Campo("telefone", "Telefone"),
+            Campo("instituicao", "Instituição"),
+            Campo("pesquisa", "Pesquisa", largura=400),
+        ] + _comuns_fim(),
+        regra_data="pesquisa",
+        campo_nome="nome",
+    ),
+}
+
+TIPOS: Tuple[str, ...] = tuple(ESQUEMAS)
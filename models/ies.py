@@ -1,44 +1,22 @@
 # models/ies.py
-from typing import Tuple, List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional
 from database import get_connection
-from utils.validacoes import validar_email, validar_telefone, validar_data_visita, normalizar_turno
+from models.esquema import ESQUEMAS
+
+ESQUEMA = ESQUEMAS['ies']
 
 def cadastrar_ies(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     """
     Insere agendamento do tipo IES. Retorna o registro inserido (dict) ou None.
     """
-    if not validar_email(data.get('email','')): 
-        raise ValueError('E-mail inválido')
-    if not validar_telefone(data.get('telefone','')): 
-        raise ValueError('Telefone inválido')
-    if not validar_data_visita(data.get('data','')): 
-        raise ValueError('Data inválida (terça-dom)')
-    t = normalizar_turno(data.get('turno',''))
-    if not t:
-        raise ValueError('Turno inválido')
+    payload, erro = ESQUEMA.preparar(data)
+    if erro:
+        raise ValueError(erro)
 
     conn = get_connection()
     try:
         with conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO ies
-                  (nome_ies, representante, email, telefone, endereco, num_alunos, data, turno, observacao)
-                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                RETURNING *
-                """,
-                (
-                    data.get('nome_ies'),
-                    data.get('representante'),
-                    data.get('email'),
-                    data.get('telefone'),
-                    data.get('endereco'),
-                    int(data.get('num_alunos') or 0),
-                    data.get('data'),
-                    t,
-                    data.get('observacao'),
-                )
-            )
+            cur.execute(ESQUEMA.sql_insert, [payload[c] for c in ESQUEMA.colunas])
             row = cur.fetchone()
             conn.commit()
             return row
@@ -1,28 +1,27 @@
 # supabase_client.py
 import os
-from pathlib import Path
-from dotenv import load_dotenv
-from supabase import create_client, Client
-from typing import Optional
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
 
-# -------------------------------------------------
-# Carregar .env da RAIZ do projeto
-# (funciona em Python normal e em .exe do PyInstaller)
-# -------------------------------------------------
-BASE_DIR = Path(__file__).resolve().parent
-
-# se estiver rodando como .exe (PyInstaller)
-if hasattr(os, "_MEIPASS"):
-    ENV_PATH = Path(os._MEIPASS) / ".env"
-else:
-    ENV_PATH = BASE_DIR / ".env"
+from utils.env import carregar_env
 
-load_dotenv(dotenv_path=ENV_PATH)
+# .env da raiz do projeto (ou ao lado do .exe do PyInstaller); ver utils/env.py
+carregar_env()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")  # opcional
 
+# Pool HTTP (um por processo/worker)
+POOL_MAX_CONEXOES = int(os.getenv("SUPABASE_POOL_MAX", "10"))
+POOL_KEEPALIVE_S = float(os.getenv("SUPABASE_KEEPALIVE_S", "60"))
+# Timeout de cada requisição HTTP ao Supabase (segundos)
+SUPABASE_TIMEOUT_S = float(os.getenv("SUPABASE_TIMEOUT_S", "10"))
+# Falhas seguidas de um cliente antes de recriá-lo
+FALHAS_PARA_RECRIAR = 3
+
 
 def _warn_missing_env():
     print(
@@ -33,40 +32,216 @@ def _warn_missing_env():
 
 
 # -------------------------------------------------
-# Cliente público (anon) → usado no app normal
+# Registro de clientes (lazy, por processo)
 # -------------------------------------------------
-supabase: Optional[Client] = None
+# Os clientes são criados no primeiro uso, dentro do processo que vai
+# usá-los (depois do fork do gunicorn), e reaproveitados: cada processo
+# mantém um único pool HTTP com keep-alive, compartilhado pelos clientes
+# anon e admin. Um cliente que falha várias vezes seguidas é recriado,
+# junto com o pool (conexões quebradas são a causa mais comum) e, por
+# isso, com o outro cliente, que usava o mesmo pool.
+class _RegistroClientes:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pid: Optional[int] = None
+        self._http = None
+        self._clientes: Dict[str, Any] = {}
+        self._falhas: Dict[str, int] = {}
+        self._stats: Dict[str, Any] = {}
+        self._avisou = False
 
-if SUPABASE_URL and SUPABASE_ANON_KEY:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-    except Exception as e:
-        print("[ERRO] Falha ao criar cliente Supabase:", e)
-        supabase = None
-else:
-    _warn_missing_env()
+    def _resetar_se_fork(self) -> None:
+        pid = os.getpid()
+        if self._pid != pid:
+            # processo novo: não reaproveita sockets herdados do pai
+            self._pid = pid
+            self._http = None
+            self._clientes = {}
+            self._falhas = {}
+            self._stats = {"criados": 0, "recriados": 0, "falhas": 0, "desde": time.time()}
+
+    def _http_client(self):
+        if self._http is None:
+            try:
+                import httpx
+                self._http = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=POOL_MAX_CONEXOES,
+                        max_keepalive_connections=POOL_MAX_CONEXOES,
+                        keepalive_expiry=POOL_KEEPALIVE_S,
+                    ),
+                    timeout=httpx.Timeout(SUPABASE_TIMEOUT_S, connect=min(SUPABASE_TIMEOUT_S, 5.0)),
+                )
+            except Exception as e:
+                print("[supabase_client] Pool HTTP indisponível, usando padrão:", e)
+        return self._http
+
+    def _criar(self, chave: str):
+        from supabase import create_client, ClientOptions
+
+        key = SUPABASE_ANON_KEY if chave == "anon" else SUPABASE_SERVICE_ROLE_KEY
+        http = self._http_client()
+        if http is not None:
+            try:
+                return create_client(SUPABASE_URL, key, options=ClientOptions(httpx_client=http))
+            except TypeError:
+                # versão do supabase-py sem suporte a httpx_client
+                pass
+        return create_client(
+            SUPABASE_URL, key, options=ClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT_S)
+        )
+
+    def obter(self, chave: str):
+        if chave == "anon" and not (SUPABASE_URL and SUPABASE_ANON_KEY):
+            if not self._avisou:
+                self._avisou = True
+                _warn_missing_env()
+            return None
+        if chave == "admin" and not (SUPABASE_URL and SUPABASE_SERVICE_ROLE_KEY):
+            return None
+
+        with self._lock:
+            self._resetar_se_fork()
+            cli = self._clientes.get(chave)
+            if cli is None:
+                try:
+                    cli = self._criar(chave)
+                except Exception as e:
+                    print(f"[ERRO] Falha ao criar cliente Supabase ({chave}):", e)
+                    return None
+                self._clientes[chave] = cli
+                self._falhas[chave] = 0
+                self._stats["criados"] += 1
+            return cli
+
+    def reportar_falha(self, chave: str = "anon") -> None:
+        with self._lock:
+            self._resetar_se_fork()
+            self._stats["falhas"] += 1
+            self._falhas[chave] = self._falhas.get(chave, 0) + 1
+            if self._falhas[chave] >= FALHAS_PARA_RECRIAR and chave in self._clientes:
+                # descarta clientes e pool; o próximo obter() cria outros
+                self._descartar_pool()
+                self._stats["recriados"] += 1
+
+    def _descartar_pool(self) -> None:
+        """Sob o lock. O pool velho é fechado depois que as requisições em curso terminam."""
+        velho, self._http = self._http, None
+        self._clientes = {}
+        self._falhas = {}
+        if velho is not None:
+            t = threading.Timer(2 * SUPABASE_TIMEOUT_S, velho.close)
+            t.daemon = True
+            t.start()
+
+    def reportar_sucesso(self, chave: str = "anon") -> None:
+        if self._falhas.get(chave):
+            self._falhas[chave] = 0
+
+    def estatisticas(self) -> Dict[str, Any]:
+        with self._lock:
+            self._resetar_se_fork()
+            st = dict(self._stats)
+            st["pid"] = self._pid
+            st["clientes"] = sorted(self._clientes)
+            st["falhas_seguidas"] = dict(self._falhas)
+            st["pool_max"] = POOL_MAX_CONEXOES
+            try:
+                conns = self._http._transport._pool.connections  # type: ignore[union-attr]
+                st["conexoes_abertas"] = len(conns)
+                st["conexoes_ociosas"] = sum(1 for c in conns if c.is_idle())
+            except Exception:
+                pass
+            return st
+
+
+_registro = _RegistroClientes()
 
 
 # -------------------------------------------------
-# Cliente administrativo (service_role) → SOMENTE LOGIN
+# Cliente assíncrono (modo ASGI, web/app_async.py)
 # -------------------------------------------------
-def create_admin_client() -> Optional[Client]:
-    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-        return None
-    try:
-        return create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
-    except Exception:
+# Um por event loop: o httpx.AsyncClient fica preso ao loop que o criou.
+# Chave fraca: quando o loop é coletado, o cliente vai junto.
+_async_clientes: "weakref.WeakKeyDictionary[Any, Any]" = weakref.WeakKeyDictionary()
+
+
+async def get_async_client():
+    import asyncio
+
+    if not (SUPABASE_URL and SUPABASE_ANON_KEY):
         return None
+    loop = asyncio.get_running_loop()
+    cli = _async_clientes.get(loop)
+    if cli is None:
+        import httpx
+        from supabase import acreate_client, AsyncClientOptions
+
+        http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONEXOES,
+                max_keepalive_connections=POOL_MAX_CONEXOES,
+                keepalive_expiry=POOL_KEEPALIVE_S,
+            ),
+            timeout=httpx.Timeout(SUPABASE_TIMEOUT_S, connect=min(SUPABASE_TIMEOUT_S, 5.0)),
+        )
+        try:
+            opts = AsyncClientOptions(httpx_client=http)
+        except TypeError:
+            opts = AsyncClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT_S)
+        cli = await acreate_client(SUPABASE_URL, SUPABASE_ANON_KEY, options=opts)
+        _async_clientes[loop] = cli
+    return cli
+
+
+# -------------------------------------------------
+# Cliente público (anon) → usado no app normal
+# -------------------------------------------------
+def get_client():
+    return _registro.obter("anon")
+
+
+# -------------------------------------------------
+# Cliente administrativo (service_role) → SOMENTE LOGIN
+# -------------------------------------------------
+def get_admin_client():
+    return _registro.obter("admin")
+
+
+def create_admin_client():
+    """Compatibilidade: agora reaproveita o cliente admin do registro."""
+    return get_admin_client()
+
+
+def reportar_falha(chave: str = "anon") -> None:
+    _registro.reportar_falha(chave)
+
+
+def reportar_sucesso(chave: str = "anon") -> None:
+    _registro.reportar_sucesso(chave)
+
+
+def estatisticas_pool() -> Dict[str, Any]:
+    return _registro.estatisticas()
+
+
+def __getattr__(nome: str):
+    # compatibilidade com `from supabase_client import supabase`
+    if nome == "supabase":
+        return get_client()
+    raise AttributeError(nome)
 
 
 # -------------------------------------------------
 # Health Check opcional (ping)
 # -------------------------------------------------
 def health_check() -> bool:
-    if not supabase:
+    cli = get_client()
+    if not cli:
         return False
     try:
-        resp = supabase.table("health").select("id").limit(1).execute()
+        resp = cli.table("health").select("id").limit(1).execute()
         return bool(resp.data)
     except Exception:
-        return False
\ No newline at end of file
+        reportar_falha("anon")
+        return False
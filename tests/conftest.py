@@ -0,0 +1,73 @@
+# tests/conftest.py
+"""Os testes importam os módulos do projeto a partir da raiz (como os scripts)."""
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+class _Consulta:
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.filtros = []
+        self.desc = False
+        self.n = None
+
+    def select(self, colunas="*"):
+        return self
+
+    def order(self, coluna, desc=False):
+        self.desc = desc
+        return self
+
+    def limit(self, n):
+        self.n = n
+        return self
+
+    def gt(self, coluna, v):
+        self.filtros.append(lambda r: r[coluna] > v)
+        return self
+
+    def lt(self, coluna, v):
+        self.filtros.append(lambda r: r[coluna] < v)
+        return self
+
+    def lte(self, coluna, v):
+        self.filtros.append(lambda r: r[coluna] <= v)
+        return self
+
+    def execute(self):
+        linhas = sorted(
+            (r for r in self.linhas if all(f(r) for f in self.filtros)),
+            key=lambda r: r["id"], reverse=self.desc,
+        )
+        return type("Resposta", (), {"data": [dict(r) for r in linhas[: self.n]]})()
+
+
+class ClienteFalso:
+    """Cliente supabase-py de mentira: tabelas em memória, só o que a exportação usa."""
+
+    def __init__(self, tabelas):
+        self.tabelas = tabelas
+        self.consultas = 0
+
+    def table(self, nome):
+        self.consultas += 1
+        return _Consulta(self.tabelas.setdefault(nome, []))
+
+
+def linhas_visitante(ids):
+    return [
+        {"id": i, "nome": f"Visitante {i}", "email": f"v{i}@exemplo.com", "data": "2030-03-05",
+         "turno": "tarde", "qtd_pessoas": i % 5 + 1, "observacao": "vírgula, \"aspas\"\nquebra"}
+        for i in ids
+    ]
+
+
+@pytest.fixture
+def cliente_falso():
+    return ClienteFalso({"visitante": linhas_visitante(range(1, 24))})
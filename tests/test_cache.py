@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+
+import database
+from utils import cache as cache_mod
+from utils.cache import TTLCache
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio(monkeypatch):
+    r = Relogio()
+    monkeypatch.setattr(cache_mod.time, "monotonic", r)
+    return r
+
+
+def test_expira_depois_do_ttl(relogio):
+    c = TTLCache(30)
+    c.set("visitante", [1, 2])
+    relogio.agora += 29.9
+    assert c.get("visitante") == [1, 2]
+    relogio.agora += 0.2
+    assert c.get("visitante") is None
+    assert not c.contem("visitante")
+
+
+def test_ttl_por_item_e_invalidar(relogio):
+    c = TTLCache(30)
+    c.set("a", 1, ttl=5)
+    c.set("b", None)  # None guardado é diferente de ausente
+    relogio.agora += 6
+    assert c.get("a", "padrao") == "padrao"
+    assert c.contem("b")
+    c.invalidar("b")
+    assert not c.contem("b")
+
+
+def test_ultimos_serve_do_cache_e_consulta_em_paralelo(monkeypatch):
+    consultas = []
+    juntas = threading.Barrier(len(database.TABELAS), timeout=5)
+
+    def buscar(tabela, limit):
+        consultas.append(tabela)
+        juntas.wait()  # só passa se todas as tabelas forem consultadas ao mesmo tempo
+        return [{"id": i, "tabela": tabela} for i in range(limit)]
+
+    monkeypatch.setattr(database, "_cache_ultimos", TTLCache(60))
+    monkeypatch.setattr(database, "_supabase_ok", lambda: True)
+    monkeypatch.setattr(database, "_buscar_ultimos", buscar)
+
+    dados = database.ultimos_registros(5)
+    assert sorted(consultas) == sorted(database.TABELAS)
+    assert all(len(dados[t]) == 5 for t in database.TABELAS)
+
+    # segunda chamada (e com limite menor): tudo do cache
+    dados = database.ultimos_registros(3)
+    assert len(consultas) == len(database.TABELAS)
+    assert all(len(dados[t]) == 3 for t in database.TABELAS)
+
+    # inserção invalida só a tabela dela
+    database._cache_ultimos.invalidar("escola")
+    juntas = threading.Barrier(1)
+    database.ultimos_registros(5)
+    assert consultas[len(database.TABELAS):] == ["escola"]
+
+
+def test_ultimos_nao_guarda_falha(monkeypatch):
+    def buscar(tabela, limit):
+        if tabela == "ies":
+            raise TimeoutError("timeout")
+        return [{"id": 1}]
+
+    monkeypatch.setattr(database, "_cache_ultimos", TTLCache(60))
+    monkeypatch.setattr(database, "_supabase_ok", lambda: True)
+    monkeypatch.setattr(database, "_buscar_ultimos", buscar)
+
+    dados = database.ultimos_registros(5)
+    assert dados["ies"] == []
+    assert database._cache_ultimos.get("ies") is None
+    assert database._cache_ultimos.get("escola") is not None
@@ -0,0 +1,89 @@
+from datetime import date, timedelta
+
+import pytest
+
+from models.esquema import ERRO_JANELA, ESQUEMAS
+from utils import calendario
+from utils.calendario import Calendario, get_calendario, pascoa
+from utils.validacoes import DATA_FECHADA, FORA_DA_JANELA, janela_agendamento, validar_lote
+
+AGENDAS = {"visita": "visita", "pesquisa": "pesquisa"}
+
+
+@pytest.fixture
+def cal():
+    recesso = {"inicio": "2029-12-26", "fim": "2030-01-02", "tipos": ["pesquisa"], "motivo": "Recesso"}
+    return Calendario(AGENDAS, fechamentos=[recesso])
+
+
+def test_virada_do_ano(cal):
+    # 31/12/2029 é segunda: visita fechada pela regra da semana, pesquisa pelo recesso
+    assert not cal.aberto("visita", date(2029, 12, 31))
+    assert cal.motivo("visita", date(2029, 12, 31)) is None
+    assert cal.motivo("pesquisa", date(2029, 12, 31)) == "Recesso"
+    # 01/01 é feriado; o recesso atravessa o ano e vale também em 2030
+    assert cal.motivo("visita", date(2030, 1, 1)) == "Confraternização Universal"
+    assert cal.turnos_abertos("visita", date(2030, 1, 2)) == ["manhã", "tarde"]
+    assert cal.turnos_abertos("pesquisa", date(2030, 1, 2)) == []
+    assert cal.proximos_abertos("pesquisa", 1, a_partir=date(2029, 12, 24)) == [date(2029, 12, 24)]
+    assert cal.proximos_abertos("pesquisa", 2, a_partir=date(2029, 12, 26)) == [date(2030, 1, 3), date(2030, 1, 4)]
+
+
+def test_ano_bissexto(cal):
+    assert pascoa(2028) == date(2028, 4, 16)
+    # 29/02/2028 é terça de Carnaval (Páscoa - 47)
+    assert cal.motivo("visita", date(2028, 2, 29)) == "Carnaval"
+    assert cal.aberto("visita", date(2028, 3, 1))
+    # último índice do bitmap de um ano de 366 dias
+    assert cal.aberto("visita", date(2028, 12, 31))
+    assert not cal.aberto("pesquisa", date(2028, 12, 31))
+
+
+def test_limites_do_tipo_date(cal):
+    assert cal.aberto("visita", date(9999, 12, 31))
+    assert cal.motivo("pesquisa", date(1, 1, 1)) == "Confraternização Universal"
+
+
+def test_cache_de_anos_limitado(cal):
+    for ano in range(2020, 2040):
+        cal.aberto("visita", date(ano, 6, 1))
+    assert len(cal._anos) == calendario.MAX_ANOS_CACHE
+    assert list(cal._anos) == list(range(2040 - calendario.MAX_ANOS_CACHE, 2040))
+
+
+def _proximo_aberto(agenda="visitante"):
+    return get_calendario().proximos_abertos(agenda, 1, a_partir=date.today() + timedelta(days=1), turno="tarde")[0]
+
+
+def _form(data):
+    return {
+        "nome": "Ana", "email": "ana@exemplo.com", "telefone": "(83) 99999-0000",
+        "data": data, "turno": "tarde", "genero": "Feminino",
+    }
+
+
+def test_preparar_rejeita_datas_fora_da_janela():
+    esquema = ESQUEMAS["visitante"]
+    ontem = (date.today() - timedelta(days=1)).isoformat()
+    assert esquema.preparar(_form(ontem)) == (None, ERRO_JANELA)
+    assert esquema.preparar(_form("31/12/9999")) == (None, ERRO_JANELA)
+    d = _proximo_aberto()
+    payload, erro = esquema.preparar(_form(d.strftime("%d/%m/%Y")))
+    assert erro is None and payload["data"] == d.isoformat()
+
+
+def test_validar_lote_marca_fora_da_janela():
+    _, fim = janela_agendamento()
+    segunda = _proximo_aberto("pesquisa")
+    while segunda.weekday() != 0:
+        segunda += timedelta(days=1)
+    datas = ["31/12/9999", "2000-01-01", (fim + timedelta(days=1)).isoformat(), _proximo_aberto().isoformat(),
+             segunda.isoformat(), "x"]
+    res = validar_lote([{"data": d, "turno": "tarde"} for d in datas], "visitante")
+    assert list(res.erros["data"]) == [FORA_DA_JANELA] * 3 + [0, DATA_FECHADA, 1]
+
+
+def test_preparar_lote_mesma_mensagem():
+    esquema = ESQUEMAS["escola"]
+    res = esquema.preparar_lote([{"data": "9999-12-31", "turno": "tarde"}])
+    assert res == [(None, ERRO_JANELA)]
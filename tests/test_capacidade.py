@@ -0,0 +1,119 @@
+import threading
+import time
+
+import pytest
+
+import database
+from utils.capacidade import OcupacaoIndex, Reserva, TurnoLotado, ocupado_no_banco
+
+DATA = "2030-03-05"
+
+
+def _indice(capacidade=50, registros=()):
+    ix = OcupacaoIndex(capacidade=capacidade)
+    ix.carregar(registros)
+    return ix
+
+
+def test_reservar_e_atomico_entre_threads():
+    ix = _indice(capacidade=50)
+    barreira = threading.Barrier(40)
+    aceitas = []
+
+    def pedir():
+        barreira.wait()
+        if ix.reservar(DATA, "tarde", 7):
+            aceitas.append(1)
+
+    threads = [threading.Thread(target=pedir) for _ in range(40)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(aceitas) == 7  # 7 * 7 = 49 <= 50 < 56
+    assert ix.ocupacao(DATA, "tarde") == 49
+
+
+def test_inserir_concorrente_nao_passa_da_capacidade(monkeypatch):
+    """A corrida do formulário: várias requisições para o mesmo turno ao mesmo tempo."""
+    ix = _indice(capacidade=50)
+    gravados = []
+
+    def inserir_lento(tabela, payload):
+        time.sleep(0.01)  # a janela entre verificar e gravar
+        gravados.append(payload)
+        return dict(payload, id=len(gravados))
+
+    monkeypatch.setattr(database, "_supabase_ok", lambda: True)
+    monkeypatch.setattr(database, "get_ocupacao", lambda: ix)
+    monkeypatch.setattr(database, "_inserir", inserir_lento)
+
+    barreira = threading.Barrier(20)
+    lotados = []
+
+    def agendar():
+        barreira.wait()
+        try:
+            database.inserir("escola", {"data": DATA, "turno": "manhã", "num_alunos": 10}, preparado=True)
+        except TurnoLotado:
+            lotados.append(1)
+
+    threads = [threading.Thread(target=agendar) for _ in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(gravados) == 5
+    assert len(lotados) == 15
+    assert sum(p["num_alunos"] for p in gravados) == ix.ocupacao(DATA, "manhã") == 50
+
+
+def test_falha_na_insercao_devolve_a_vaga(monkeypatch):
+    ix = _indice(capacidade=10)
+    monkeypatch.setattr(database, "_supabase_ok", lambda: True)
+    monkeypatch.setattr(database, "get_ocupacao", lambda: ix)
+    monkeypatch.setattr(database, "_inserir", lambda tabela, payload: None)
+
+    assert database.inserir("escola", {"data": DATA, "turno": "tarde", "num_alunos": 8}, preparado=True) is None
+    assert ix.ocupacao(DATA, "tarde") == 0
+    assert ix.reservar(DATA, "tarde", 10)
+
+
+def test_reserva_desfeita_em_excecao_e_confirmada_no_sucesso():
+    ix = _indice(capacidade=10)
+    with pytest.raises(RuntimeError):
+        with Reserva(ix, "escola", {"data": DATA, "turno": "tarde", "num_alunos": 6}):
+            raise RuntimeError("rede caiu")
+    assert ix.ocupacao(DATA, "tarde") == 0
+
+    with Reserva(ix, "escola", {"data": DATA, "turno": "tarde", "num_alunos": 6}) as vaga:
+        vaga.confirmar()
+    assert ix.ocupacao(DATA, "tarde") == 6
+    with pytest.raises(TurnoLotado) as e:
+        Reserva(ix, "escola", {"data": DATA, "turno": "tarde", "num_alunos": 5})
+    assert e.value.restante == 4
+
+
+def test_recusa_do_banco_ajusta_o_indice():
+    """Outro worker lotou o turno: o gatilho informa a ocupação real."""
+    ix = _indice(capacidade=50)
+
+    class APIError(Exception):
+        message = "TURNO_LOTADO:45"
+
+    assert ocupado_no_banco(APIError()) == 45
+    with pytest.raises(TurnoLotado) as e:
+        with Reserva(ix, "escola", {"data": DATA, "turno": "manhã", "num_alunos": 10}):
+            raise TurnoLotado(0, ocupado_no_banco(APIError()))
+    assert e.value.restante == 5
+    assert ix.ocupacao(DATA, "manhã") == 45
+
+
+def test_recarregar_mantem_reservas_pendentes():
+    ix = _indice(capacidade=10)
+    assert ix.reservar(DATA, "tarde", 4)
+    ix.carregar([("escola", {"data": DATA, "turno": "tarde", "num_alunos": 5})])
+    assert ix.ocupacao(DATA, "tarde") == 9
+    assert not ix.cabe(DATA, "tarde", 2)
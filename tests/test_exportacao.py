@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import consultar
+from utils.exportacao import MarcasDagua
+
+
+@pytest.fixture
+def exportar(monkeypatch, tmp_path, cliente_falso):
+    monkeypatch.setattr(consultar, "get_client", lambda: cliente_falso)
+
+    def rodar(fmt, limit, incremental=False):
+        saida = tmp_path / f"visitante.{fmt}"
+        res = consultar.export_table("visitante", fmt, str(saida), limit, pagina=5, progresso=False,
+                                     incremental=incremental)
+        return res, saida
+
+    return rodar
+
+
+@pytest.mark.parametrize("fmt", ["json", "jsonl"])
+def test_limit_exporta_os_mais_recentes(exportar, tmp_path, fmt):
+    res, saida = exportar(fmt, 12)
+    texto = saida.read_text(encoding="utf-8")
+    linhas = json.loads(texto) if fmt == "json" else [json.loads(x) for x in texto.splitlines()]
+    assert [r["id"] for r in linhas] == list(range(23, 11, -1))
+    # a marca d'água é o maior id exportado
+    assert res.ultimo_id == 23
+    assert MarcasDagua(tmp_path).obter(saida.name)["ultimo_id"] == 23
+
+
+def test_limit_incremental_continua_da_marca(exportar, cliente_falso, tmp_path):
+    from conftest import linhas_visitante
+
+    exportar("jsonl", None)
+    cliente_falso.tabelas["visitante"] += linhas_visitante(range(24, 40))
+    res, saida = exportar("jsonl", 5, incremental=True)
+    assert (res.linhas, res.ultimo_id) == (5, 28)
+    ids = [json.loads(x)["id"] for x in saida.read_text(encoding="utf-8").splitlines()]
+    assert ids == list(range(1, 29))
@@ -0,0 +1,69 @@
+import gzip
+import json
+
+import pytest
+
+import consultar
+from conftest import linhas_visitante
+from utils.exportacao import faixas_id
+
+
+@pytest.mark.parametrize("menor,maior,partes", [(1, 100, 4), (7, 9, 8), (1, 1, 3), (10, 1000, 7)])
+def test_faixas_cobrem_todos_os_ids_sem_sobrepor(menor, maior, partes):
+    faixas = faixas_id(menor, maior, partes)
+    assert len(faixas) == min(partes, maior - menor + 1)
+    assert faixas[0][0] is None and faixas[-1][1] is None  # pontas abertas
+    for (_, ate), (apos, _) in zip(faixas, faixas[1:]):
+        assert ate == apos  # contíguas: (apos, ate]
+
+    def faixa_de(i):
+        return [f for f in faixas if (f[0] is None or i > f[0]) and (f[1] is None or i <= f[1])]
+
+    assert all(len(faixa_de(i)) == 1 for i in range(menor - 5, maior + 5))
+
+
+@pytest.fixture
+def exportar(monkeypatch, tmp_path, cliente_falso):
+    # ids esparsos: faixas com buracos e uma parte pequena
+    cliente_falso.tabelas["visitante"] = linhas_visitante([*range(1, 30), *range(100, 131), 500, 1000])
+    monkeypatch.setattr(consultar, "get_client", lambda: cliente_falso)
+    monkeypatch.setattr(consultar, "_tabelas_public", lambda: ["visitante"])
+
+    def rodar(fmt, jobs, pasta):
+        return consultar.export_all(fmt, str(tmp_path / pasta), None, jobs=jobs, pagina=7, linhas_por_parte=10)
+
+    return rodar
+
+
+def _ler(caminho, fmt):
+    return gzip.decompress(caminho.read_bytes()) if fmt.endswith(".gz") else caminho.read_bytes()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json", "jsonl", "csv.gz"])
+def test_exportacao_paralela_igual_a_sequencial(exportar, tmp_path, fmt):
+    (seq,) = exportar(fmt, 1, "seq")
+    (par,) = exportar(fmt, 4, "par")
+    assert seq["partes"] == 1 and par["partes"] == 4
+    assert seq["erro"] is par["erro"] is None
+    assert seq["linhas"] == par["linhas"] == 62
+    assert _ler(tmp_path / "par" / f"visitante.{fmt}", fmt) == _ler(tmp_path / "seq" / f"visitante.{fmt}", fmt)
+    if fmt == "json":
+        assert [r["id"] for r in json.loads(_ler(tmp_path / "par" / "visitante.json", fmt))][-3:] == [130, 500, 1000]
+    # sem arquivos de parte sobrando; a marca d'água é a do maior id
+    assert sorted(p.name for p in (tmp_path / "par").iterdir()) == [".marcas-exportacao.json", f"visitante.{fmt}"]
+    marca = consultar.MarcasDagua(tmp_path / "par").obter(f"visitante.{fmt}")
+    assert (marca["ultimo_id"], marca["linhas"]) == (1000, 62)
+
+
+def test_falha_numa_parte_nao_grava_saida_nem_marca(exportar, tmp_path, monkeypatch):
+    original = consultar._exportar_faixa
+
+    def faixa(table, fmt, out_path, limit, pagina, prog, apos_id=None, ate_id=None, anexar=False, desc=False):
+        if apos_id is not None and ate_id is None:
+            raise TimeoutError("timeout na última faixa")
+        return original(table, fmt, out_path, limit, pagina, prog, apos_id, ate_id, anexar, desc)
+
+    monkeypatch.setattr(consultar, "_exportar_faixa", faixa)
+    (r,) = exportar("csv", 4, "par")
+    assert isinstance(r["erro"], TimeoutError)
+    assert list((tmp_path / "par").iterdir()) == []
@@ -0,0 +1,84 @@
+import pytest
+
+from utils import idempotencia
+from utils.idempotencia import DUPLICADO, EM_ANDAMENTO, EnvioIdempotente, RegistroIdempotencia
+
+PAYLOAD = {"email": "Ana@Exemplo.com ", "data": "2030-03-05", "turno": "tarde"}
+OK = {"mensagem": "Agendamento realizado com sucesso!", "categoria": "success"}
+
+
+@pytest.fixture
+def registro(tmp_path):
+    return RegistroIdempotencia(str(tmp_path / "idem.sqlite3"))
+
+
+def _envio(registro, token="tok-1"):
+    return EnvioIdempotente(registro, token, ttl_token=3600, janela=600)
+
+
+def test_reservar_concluir_e_liberar(registro):
+    assert registro.reservar("k", 60) == (True, None)
+    assert registro.reservar("k", 60) == (False, None)  # em andamento
+    registro.concluir("k", OK)
+    assert registro.reservar("k", 60) == (False, OK)
+    registro.liberar("k")
+    assert registro.reservar("k", 60) == (True, None)
+
+
+def test_reserva_expirada_pode_ser_refeita(registro, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr(idempotencia.time, "time", lambda: agora[0])
+    assert registro.reservar("k", 10)[0]
+    registro.concluir("k", OK)
+    agora[0] += 10.1
+    assert registro.reservar("k", 10) == (True, None)
+
+
+def test_mesmo_token_devolve_o_resultado_original(registro):
+    primeiro = _envio(registro)
+    assert primeiro.reservar_token() is None
+    assert primeiro.reservar_conteudo("escola", PAYLOAD) is None
+
+    # reenvio durante a gravação
+    assert _envio(registro).reservar_token() == EM_ANDAMENTO
+
+    primeiro.concluir(OK)
+    assert _envio(registro).reservar_token() == OK
+
+
+def test_mesmo_conteudo_com_outro_token_e_duplicado(registro):
+    primeiro = _envio(registro)
+    primeiro.reservar_token()
+    primeiro.reservar_conteudo("escola", PAYLOAD)
+    primeiro.concluir(OK)
+
+    outro = _envio(registro, token="tok-2")
+    assert outro.reservar_token() is None
+    # email normalizado: mesmo hash
+    assert outro.reservar_conteudo("escola", dict(PAYLOAD, email="ana@exemplo.com")) == DUPLICADO
+    # o token novo passa a responder igual
+    assert _envio(registro, token="tok-2").reservar_token() == DUPLICADO
+    # outro tipo de agendamento não conflita
+    assert _envio(registro, token="tok-3").reservar_conteudo("visitante", PAYLOAD) is None
+
+
+def test_falha_libera_as_chaves(registro):
+    envio = _envio(registro)
+    envio.reservar_token()
+    envio.reservar_conteudo("escola", PAYLOAD)
+    envio.liberar()
+
+    novo = _envio(registro)
+    assert novo.reservar_token() is None
+    assert novo.reservar_conteudo("escola", PAYLOAD) is None
+
+
+def test_registro_quebrado_nao_bloqueia_o_envio():
+    class Quebrado:
+        def reservar(self, chave, ttl):
+            raise OSError("disco cheio")
+
+    envio = _envio(Quebrado())
+    assert envio.reservar_token() is None
+    assert envio.reservar_conteudo("escola", PAYLOAD) is None
+    assert _envio(None).reservar_token() is None
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+import consultar
+from conftest import linhas_visitante
+from utils.exportacao import MarcasDagua
+
+
+class APIError(Exception):
+    code = "42501"  # erro definitivo: a exportação não repete
+
+
+@pytest.fixture
+def exportar(monkeypatch, tmp_path, cliente_falso):
+    monkeypatch.setattr(consultar, "get_client", lambda: cliente_falso)
+
+    def rodar(fmt, incremental=True, delta=False, pasta="out"):
+        saida = tmp_path / pasta / f"visitante.{fmt}"
+        return consultar.export_table("visitante", fmt, str(saida), None, pagina=5, progresso=False,
+                                      incremental=incremental, delta=delta)
+
+    return rodar
+
+
+def _novas(cliente, ids):
+    cliente.tabelas["visitante"] += linhas_visitante(ids)
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_retoma_da_marca_e_anexa(exportar, cliente_falso, tmp_path, fmt):
+    assert exportar(fmt).linhas == 23
+
+    _novas(cliente_falso, range(24, 31))
+    res = exportar(fmt)
+    assert (res.linhas, res.ultimo_id) == (7, 30)
+    # sem linhas novas: nada muda
+    assert exportar(fmt).linhas == 0
+
+    # igual a uma exportação completa feita agora
+    exportar(fmt, incremental=False, pasta="completo")
+    arquivo = tmp_path / "out" / f"visitante.{fmt}"
+    assert arquivo.read_bytes() == (tmp_path / "completo" / f"visitante.{fmt}").read_bytes()
+    marca = MarcasDagua(tmp_path / "out").obter(f"visitante.{fmt}")
+    assert (marca["ultimo_id"], marca["linhas"]) == (30, 30)
+
+
+def test_json_vira_arquivo_delta(exportar, cliente_falso, tmp_path):
+    exportar("json")
+    _novas(cliente_falso, range(24, 27))
+    res = exportar("json")
+    delta = tmp_path / "out" / "visitante.delta-23.json"
+    assert res.caminho == delta
+    assert [r["id"] for r in json.loads(delta.read_text(encoding="utf-8"))] == [24, 25, 26]
+    assert len(json.loads((tmp_path / "out" / "visitante.json").read_text(encoding="utf-8"))) == 23
+
+    # o próximo delta parte da nova marca; delta vazio não deixa arquivo
+    assert exportar("json").linhas == 0
+    assert not (tmp_path / "out" / "visitante.delta-26.json").exists()
+    assert MarcasDagua(tmp_path / "out").obter("visitante.json")["ultimo_id"] == 26
+
+
+def test_full_ignora_a_marca(exportar, cliente_falso):
+    exportar("csv")
+    _novas(cliente_falso, [24])
+    res = exportar("csv", incremental=False)
+    assert (res.linhas, res.ultimo_id) == (24, 24)
+
+
+def test_falha_no_anexo_desfaz_e_nao_avanca_a_marca(exportar, cliente_falso, tmp_path, monkeypatch):
+    exportar("csv")
+    arquivo = tmp_path / "out" / "visitante.csv"
+    antes = arquivo.read_bytes()
+
+    _novas(cliente_falso, range(24, 40))
+    tabela = cliente_falso.table
+
+    def cai_na_segunda_pagina(nome):
+        if cliente_falso.consultas >= 2:
+            raise APIError("permission denied")
+        return tabela(nome)
+
+    cliente_falso.consultas = 0
+    monkeypatch.setattr(cliente_falso, "table", cai_na_segunda_pagina)
+    assert exportar("csv") is None  # sem fallback psycopg2 aqui
+    assert arquivo.read_bytes() == antes
+    assert MarcasDagua(tmp_path / "out").obter("visitante.csv")["ultimo_id"] == 23
+
+    # a próxima execução retoma do mesmo ponto
+    monkeypatch.setattr(cliente_falso, "table", tabela)
+    assert exportar("csv").linhas == 16
@@ -0,0 +1,125 @@
+import time
+
+import pytest
+
+import database
+from desktop import lista_virtual
+from desktop.lista_virtual import TAM_BLOCO, FonteKeyset
+from utils.paginacao import chave_registro, codificar_cursor, decodificar_cursor
+
+
+class Widget:
+    """Só o `after` do Tk: os callbacks rodam quando o teste chama processar()."""
+
+    def __init__(self):
+        self.agendados = []
+
+    def after(self, ms, fn):
+        self.agendados.append(fn)
+
+
+class Tabela:
+    """listar_pagina/contar de mentira, em ordem (data, id) decrescente."""
+
+    def __init__(self, n):
+        linhas = [{"id": i, "data": f"2030-01-{i // 1000 % 28 + 1:02d}", "nome": f"n{i}"} for i in range(1, n + 1)]
+        self.linhas = sorted(linhas, key=lambda r: (r["data"], r["id"]), reverse=True)
+        self.posicao = {(r["data"], r["id"]): k for k, r in enumerate(self.linhas)}
+        self.chaves_lidas = 0
+        self.blocos_lidos = 0
+
+    def listar_pagina(self, tabela, colunas=None, limite=50, cursor=None, ordem="-id", **filtros):
+        inicio = self.posicao[tuple(decodificar_cursor(cursor, ordem))] + 1 if cursor else 0
+        dados = [dict(r) for r in self.linhas[inicio:inicio + limite]]
+        if colunas == ["id", "data"]:
+            self.chaves_lidas += len(dados)
+        else:
+            self.blocos_lidos += 1
+        proximo = codificar_cursor(ordem, chave_registro(ordem, dados[-1])) if len(dados) == limite else None
+        return {"dados": dados, "proximo": proximo}
+
+    def contar(self, tabela, **filtros):
+        return len(self.linhas)
+
+
+@pytest.fixture
+def abrir(monkeypatch):
+    def abrir(n):
+        tabela = Tabela(n)
+        monkeypatch.setattr(database, "listar_pagina", tabela.listar_pagina)
+        monkeypatch.setattr(database, "contar", tabela.contar)
+        widget = Widget()
+        fonte = FonteKeyset(widget, "visitante", lambda r: ((r["id"],), ()))
+        fonte.iniciar()
+        processar(fonte, widget)
+        return fonte, widget, tabela
+
+    return abrir
+
+
+def processar(fonte, widget, prazo=10.0):
+    """Roda o laço do Tk até não haver nada a chegar."""
+    limite = time.monotonic() + prazo
+    while time.monotonic() < limite:
+        agendados, widget.agendados = widget.agendados, []
+        for fn in agendados:
+            fn()
+        fonte.drenar()
+        if not fonte.ativa and not widget.agendados and fonte.total is not None:
+            return
+        time.sleep(0.002)
+    raise AssertionError("a fonte não terminou de carregar")
+
+
+def _ids(fonte, inicio, fim):
+    return [fonte.linha(i)[0][0] for i in range(inicio, fim)]
+
+
+def test_abrir_nao_varre_as_chaves(abrir):
+    fonte, _, tabela = abrir(5000)
+    assert fonte.tamanho() == 5000  # pela contagem
+    assert tabela.chaves_lidas == 0 and tabela.blocos_lidos == 1
+    assert _ids(fonte, 0, 3) == [r["id"] for r in tabela.linhas[:3]]
+
+
+def test_rolar_em_sequencia_usa_o_marco_do_bloco_anterior(abrir):
+    fonte, widget, tabela = abrir(5000)
+    for b in range(1, 4):
+        fonte.pedir(b * TAM_BLOCO, (b + 1) * TAM_BLOCO)
+        processar(fonte, widget)
+    assert tabela.chaves_lidas == 0 and tabela.blocos_lidos == 4
+    assert _ids(fonte, 0, 400) == [r["id"] for r in tabela.linhas[:400]]
+
+
+def test_salto_varre_so_ate_o_bloco_pedido(abrir):
+    fonte, widget, tabela = abrir(60000)
+    fonte.pedir(30000, 30020)
+    processar(fonte, widget)
+    assert _ids(fonte, 30000, 30020) == [r["id"] for r in tabela.linhas[30000:30020]]
+    assert tabela.chaves_lidas <= 30000 + lista_virtual.PAGINA_CHAVES
+    assert len(fonte.marcos) <= 30000 // TAM_BLOCO + lista_virtual.PAGINA_CHAVES // TAM_BLOCO + 1
+
+    # outro salto à frente parte do marco mais próximo, não do início
+    lidas = tabela.chaves_lidas
+    fonte.pedir(45000, 45020)
+    processar(fonte, widget)
+    assert _ids(fonte, 45000, 45020) == [r["id"] for r in tabela.linhas[45000:45020]]
+    assert tabela.chaves_lidas - lidas <= 15000 + lista_virtual.PAGINA_CHAVES
+
+
+def test_salto_alem_do_fim_real(abrir):
+    fonte, widget, tabela = abrir(1050)
+    tabela.linhas = tabela.linhas[:950]  # apagaram linhas depois da contagem
+    fonte.pedir(1000, 1050)
+    processar(fonte, widget)
+    assert fonte.fim == 950 and fonte.tamanho() == 950
+
+
+def test_lista_limitada_a_max_linhas(abrir, monkeypatch):
+    monkeypatch.setattr(lista_virtual, "MAX_LINHAS", 2000)
+    fonte, widget, tabela = abrir(5000)
+    assert fonte.tamanho() == 2000
+    assert "2000 primeiros" in fonte.resumo()
+    fonte.pedir(1950, 2100)
+    processar(fonte, widget)
+    assert fonte.linha(1999) is not None and max(fonte.marcos) <= 2000 // TAM_BLOCO + 10
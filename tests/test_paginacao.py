@@ -0,0 +1,106 @@
+import base64
+import re
+
+import pytest
+
+from utils.paginacao import ORDENS, aplicar_keyset, chave_registro, codificar_cursor, decodificar_cursor
+
+
+class Consulta:
+    """Query do supabase-py de mentira: grava as chamadas e sabe filtrar uma lista."""
+
+    def __init__(self, linhas):
+        self.linhas = linhas
+        self.chamadas = []
+
+    def gt(self, col, v):
+        self.chamadas.append(("gt", col, v))
+        return self
+
+    def lt(self, col, v):
+        self.chamadas.append(("lt", col, v))
+        return self
+
+    def or_(self, filtro):
+        self.chamadas.append(("or", filtro))
+        return self
+
+    def order(self, col, desc=False):
+        self.chamadas.append(("order", col, desc))
+        return self
+
+    def executar(self, limite):
+        linhas = self.linhas
+        for c in self.chamadas:
+            if c[0] in ("gt", "lt"):
+                op = c[0]
+                linhas = [r for r in linhas if (r["id"] > c[2] if op == "gt" else r["id"] < c[2])]
+            elif c[0] == "or":
+                op, d, _, i = re.fullmatch(r"data\.(\w+)\.([\d-]+),and\(data\.eq\.([\d-]+),id\.\w+\.(\d+)\)", c[1]).groups()
+                i = int(i)
+                if op == "gt":
+                    linhas = [r for r in linhas if (r["data"], r["id"]) > (d, i)]
+                else:
+                    linhas = [r for r in linhas if (r["data"], r["id"]) < (d, i)]
+        ordens = [c for c in self.chamadas if c[0] == "order"]
+        desc = ordens[0][2]
+        linhas = sorted(linhas, key=lambda r: tuple(r[c[1]] for c in ordens), reverse=desc)
+        return linhas[:limite]
+
+
+LINHAS = [{"id": i, "data": f"2030-03-{1 + i % 4:02d}"} for i in range(1, 24)]
+
+
+def test_cursor_ida_e_volta():
+    for ordem, (cols, _) in ORDENS.items():
+        chave = [7] if cols == ("id",) else ["2030-03-05", 7]
+        token = codificar_cursor(ordem, chave)
+        assert re.fullmatch(r"[A-Za-z0-9_-]+", token)  # url-safe, sem padding
+        assert decodificar_cursor(token, ordem) == chave
+
+
+@pytest.mark.parametrize("token,ordem", [
+    (codificar_cursor("id", [7]), "-id"),               # cursor de outra ordenação
+    (codificar_cursor("data", [7]), "data"),            # chave com colunas a menos
+    ("nao-e-cursor", "id"),
+    (base64.urlsafe_b64encode(b'{"o":"id"}').decode(), "id"),
+])
+def test_cursor_invalido(token, ordem):
+    with pytest.raises(ValueError):
+        decodificar_cursor(token, ordem)
+
+
+def test_aplicar_keyset_sem_cursor_so_ordena():
+    q = aplicar_keyset(Consulta([]), "-data", None)
+    assert q.chamadas == [("order", "data", True), ("order", "id", True)]
+
+
+def test_aplicar_keyset_com_cursor():
+    q = aplicar_keyset(Consulta([]), "-id", codificar_cursor("-id", [50]))
+    assert q.chamadas == [("lt", "id", 50), ("order", "id", True)]
+
+    q = aplicar_keyset(Consulta([]), "data", codificar_cursor("data", ["2030-03-02", 9]))
+    assert q.chamadas[0] == ("or", "data.gt.2030-03-02,and(data.eq.2030-03-02,id.gt.9)")
+
+
+def test_aplicar_keyset_rejeita_ordem_e_data_invalidas():
+    with pytest.raises(ValueError):
+        aplicar_keyset(Consulta([]), "nome", None)
+    with pytest.raises(ValueError):
+        aplicar_keyset(Consulta([]), "data", codificar_cursor("data", ["2030-03-02),id.gt.0", 9]))
+
+
+@pytest.mark.parametrize("ordem", list(ORDENS))
+def test_paginas_cobrem_tudo_sem_repetir(ordem):
+    """Muitas linhas com a mesma data: a chave (data, id) não pula nem repete nas bordas."""
+    vistos, cursor = [], None
+    while True:
+        pagina = aplicar_keyset(Consulta(LINHAS), ordem, cursor).executar(5)
+        vistos += pagina
+        if len(pagina) < 5:
+            break
+        cursor = codificar_cursor(ordem, chave_registro(ordem, pagina[-1]))
+
+    cols, desc = ORDENS[ordem]
+    esperado = sorted(LINHAS, key=lambda r: tuple(r[c] for c in cols), reverse=desc)
+    assert vistos == esperado
@@ -0,0 +1,169 @@
+import asyncio
+import json
+
+import pytest
+
+from utils import resiliencia
+from utils.resiliencia import Circuito, CircuitoAberto, erro_de_programa, erro_transitorio, executar, executar_async
+
+
+class APIError(Exception):
+    """Imita postgrest.exceptions.APIError (a classificação olha o nome da classe e `code`)."""
+
+    def __init__(self, code, message=""):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class HTTPStatusError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = type("Resposta", (), {"status_code": status})()
+
+
+@pytest.fixture(autouse=True)
+def sem_espera(monkeypatch):
+    monkeypatch.setattr(resiliencia.time, "sleep", lambda s: None)
+
+
+@pytest.mark.parametrize("erro", [
+    APIError("502", "<html>Bad Gateway</html>"),  # página do gateway embrulhada pelo postgrest
+    APIError("503"),
+    HTTPStatusError(504),
+    HTTPStatusError(429),
+    HTTPStatusError(408),
+    APIError("57014", "canceling statement due to statement timeout"),
+    APIError("08006"),
+    APIError("40P01"),
+    TimeoutError("read timeout"),
+    ConnectionResetError(),
+    json.JSONDecodeError("Expecting value", "<html>", 0),
+])
+def test_transitorios(erro):
+    assert erro_transitorio(erro)
+
+
+@pytest.mark.parametrize("erro", [
+    APIError("23505", "duplicate key value"),
+    APIError("PGRST204", "column not found"),
+    APIError("42501", "permission denied"),
+    HTTPStatusError(400),
+    HTTPStatusError(404),
+    CircuitoAberto("aberto"),
+    TypeError("bug"),
+    KeyError("id"),
+])
+def test_definitivos(erro):
+    assert not erro_transitorio(erro)
+
+
+def test_erro_de_programa():
+    assert erro_de_programa(TypeError()) and erro_de_programa(KeyError())
+    assert not erro_de_programa(json.JSONDecodeError("x", "", 0))
+    assert not erro_de_programa(APIError("500"))
+
+
+def _falhando(erro, chamadas):
+    def fn():
+        chamadas.append(1)
+        raise erro
+    return fn
+
+
+def test_5xx_repete_e_abre_o_circuito():
+    c = Circuito("teste", min_chamadas=3, tempo_aberto=60)
+    chamadas = []
+    with pytest.raises(APIError):
+        executar(_falhando(APIError("502"), chamadas), c, idempotente=True, tentativas=3)
+    assert len(chamadas) == 3
+    assert c.estado()["estado"] == "aberto"
+
+    with pytest.raises(CircuitoAberto):
+        executar(lambda: "ok", c)
+    assert c.estado()["rejeitadas"] == 1
+
+
+def test_nao_idempotente_nao_repete():
+    c = Circuito("teste")
+    chamadas = []
+    with pytest.raises(APIError):
+        executar(_falhando(APIError("503"), chamadas), c, idempotente=False)
+    assert len(chamadas) == 1
+
+
+def test_4xx_conta_como_sucesso_e_nao_repete():
+    c = Circuito("teste", min_chamadas=1)
+    chamadas = []
+    for _ in range(5):
+        with pytest.raises(APIError):
+            executar(_falhando(APIError("23505"), chamadas), c, idempotente=True)
+    assert len(chamadas) == 5
+    st = c.estado()
+    assert (st["estado"], st["taxa_erro"], st["amostras"]) == ("fechado", 0.0, 5)
+
+
+def test_erro_de_programa_nao_toca_no_disjuntor():
+    c = Circuito("teste", min_chamadas=1)
+    chamadas = []
+    with pytest.raises(TypeError):
+        executar(_falhando(TypeError("argumento errado"), chamadas), c, idempotente=True)
+    assert len(chamadas) == 1
+    assert c.estado()["amostras"] == 0
+
+
+def test_meio_aberto_fecha_com_sucesso(monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr(resiliencia.time, "monotonic", lambda: agora[0])
+    c = Circuito("teste", min_chamadas=2, tempo_aberto=30)
+    c.falha()
+    c.falha()
+    assert not c.permitir()
+
+    agora[0] += 30
+    assert c.permitir()        # a chamada de teste
+    assert not c.permitir()    # só uma por vez
+    c.sucesso()
+    assert c.estado()["estado"] == "fechado"
+
+
+def test_async_repete_5xx():
+    c = Circuito("teste", min_chamadas=10)
+    chamadas = []
+
+    async def fn():
+        chamadas.append(1)
+        if len(chamadas) < 3:
+            raise HTTPStatusError(503)
+        return "ok"
+
+    assert asyncio.run(executar_async(fn, c, idempotente=True, tentativas=3, espera_base=0)) == "ok"
+    assert len(chamadas) == 3
+    assert c.estado()["taxa_erro"] == round(2 / 3, 3)
+
+
+def test_erro_de_programa_na_chamada_de_teste_libera_o_meio_aberto(monkeypatch):
+    agora = [100.0]
+    monkeypatch.setattr(resiliencia.time, "monotonic", lambda: agora[0])
+    c = Circuito("teste", min_chamadas=2, tempo_aberto=30)
+    c.falha()
+    c.falha()
+    agora[0] += 30
+
+    with pytest.raises(TypeError):
+        executar(_falhando(TypeError("bug"), []), c)
+    assert c.estado()["estado"] == "meio-aberto"
+    # a próxima chamada vira o novo teste, em vez de CircuitoAberto para sempre
+    assert executar(lambda: "ok", c) == "ok"
+    assert c.estado()["estado"] == "fechado"
+
+    c.falha()
+    c.falha()
+    agora[0] += 30
+
+    async def bug():
+        raise KeyError("id")
+
+    with pytest.raises(KeyError):
+        asyncio.run(executar_async(bug, c))
+    assert c.permitir()
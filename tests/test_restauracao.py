@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from models.esquema import ESQUEMAS
+from utils.capacidade import sql_capacidade
+from utils.exportacao import exportar_postgres, restaurar_postgres
+
+psycopg2 = pytest.importorskip("psycopg2")
+import psycopg2.errors  # noqa: E402
+from psycopg2.extras import RealDictCursor  # noqa: E402
+
+URL = os.getenv("TEST_DATABASE_URL")
+pytestmark = pytest.mark.skipif(not URL, reason="TEST_DATABASE_URL não definida (Postgres descartável para o teste)")
+
+TABELA = "restauracao_teste"
+LINHAS = [
+    ("Ana", "2030-03-05"),
+    ("vírgula, \"aspas\"\ne quebra de linha", "2030-12-31"),
+    (None, None),
+]
+
+
+@pytest.fixture
+def conn():
+    c = psycopg2.connect(URL, cursor_factory=RealDictCursor)
+    with c.cursor() as cur:
+        cur.execute(f"CREATE TEMP TABLE {TABELA} (id serial PRIMARY KEY, nome text, data date)")
+        cur.executemany(f"INSERT INTO {TABELA} (nome, data) VALUES (%s, %s)", LINHAS)
+        cur.execute(f"DELETE FROM {TABELA} WHERE id = 2")  # buraco nos ids
+    c.commit()
+    yield c
+    c.close()
+
+
+def _linhas(conn):
+    with conn.cursor() as cur:
+        cur.execute(f"SELECT id, nome, data::text FROM {TABELA} ORDER BY id")
+        return [tuple(r.values()) for r in cur.fetchall()]
+
+
+@pytest.mark.parametrize("fmt", ["csv", "csv.gz"])
+def test_exportar_e_restaurar_ida_e_volta(conn, tmp_path, fmt):
+    originais = _linhas(conn)
+    arquivo = tmp_path / f"{TABELA}.{fmt}"
+    assert exportar_postgres(conn, TABELA, fmt, arquivo).linhas == 2
+
+    assert restaurar_postgres(conn, TABELA, arquivo, truncar=True) == 2
+    assert _linhas(conn) == originais
+
+    # a sequência continua depois do maior id restaurado
+    with conn.cursor() as cur:
+        cur.execute(f"INSERT INTO {TABELA} (nome) VALUES ('nova') RETURNING id")
+        assert cur.fetchone()["id"] == 4
+    conn.rollback()
+
+
+def test_restaurar_sem_truncar_desfaz_tudo_em_conflito(conn, tmp_path):
+    arquivo = tmp_path / f"{TABELA}.csv"
+    exportar_postgres(conn, TABELA, "csv", arquivo)
+    antes = _linhas(conn)
+    with pytest.raises(psycopg2.IntegrityError):
+        restaurar_postgres(conn, TABELA, arquivo)
+    assert _linhas(conn) == antes
+
+
+def test_csv_vazio(conn, tmp_path):
+    vazio = tmp_path / "vazio.csv"
+    vazio.write_text("", encoding="utf-8")
+    with pytest.raises(ValueError):
+        restaurar_postgres(conn, TABELA, vazio)
+
+
+@pytest.fixture
+def agenda():
+    """Schema descartável com as quatro tabelas de agendamento e o gatilho de capacidade (10 por turno)."""
+    c = psycopg2.connect(URL, cursor_factory=RealDictCursor)
+    with c.cursor() as cur:
+        cur.execute("DROP SCHEMA IF EXISTS restauracao_agenda CASCADE; CREATE SCHEMA restauracao_agenda")
+        cur.execute("SET search_path TO restauracao_agenda")
+        for t, e in ESQUEMAS.items():
+            qtd = f", {e.campo_qtd} integer" if e.campo_qtd else ""
+            cur.execute(f"CREATE TABLE {t} (id serial PRIMARY KEY, data date, turno text, chave_envio text{qtd})")
+        cur.execute(sql_capacidade(capacidade=10))
+        cur.executemany(
+            "INSERT INTO escola (data, turno, num_alunos) VALUES (%s, %s, %s)",
+            [("2030-03-05", "manhã", 4), ("2030-03-05", "manhã", 4), ("2030-03-05", "tarde", 3)],
+        )
+        cur.execute("INSERT INTO pesquisador (data, turno) VALUES ('2030-03-05', 'manhã')")
+    c.commit()
+    yield c
+    c.rollback()
+    with c.cursor() as cur:
+        cur.execute("DROP SCHEMA restauracao_agenda CASCADE")
+    c.commit()
+    c.close()
+
+
+def _ocupacao(conn):
+    with conn.cursor() as cur:
+        cur.execute("SELECT data::text, turno, pessoas FROM ocupacao_turno WHERE pessoas <> 0 ORDER BY 1, 2")
+        return [tuple(r.values()) for r in cur.fetchall()]
+
+
+def test_restaurar_com_gatilho_de_capacidade(agenda, tmp_path):
+    """Turno lotado no backup: a carga não é recusada nem conta as linhas de novo."""
+    arquivo = tmp_path / "escola.csv"
+    exportar_postgres(agenda, "escola", "csv", arquivo)
+    lotado = [("2030-03-05", "manhã", 9), ("2030-03-05", "tarde", 3)]
+    assert _ocupacao(agenda) == lotado
+
+    assert restaurar_postgres(agenda, "escola", arquivo, truncar=True) == 3
+    assert _ocupacao(agenda) == lotado
+
+    # sem truncar, numa tabela vazia: a parcela é a das linhas carregadas
+    with agenda.cursor() as cur:
+        cur.execute("DELETE FROM escola")
+        cur.execute("UPDATE ocupacao_turno SET pessoas = 1 WHERE turno = 'manhã'")
+        cur.execute("UPDATE ocupacao_turno SET pessoas = 0 WHERE turno = 'tarde'")
+    agenda.commit()
+    restaurar_postgres(agenda, "escola", arquivo)
+    assert _ocupacao(agenda) == lotado
+
+    # o gatilho voltou a valer
+    with pytest.raises(psycopg2.errors.RaiseException, match="TURNO_LOTADO:9"):
+        with agenda.cursor() as cur:
+            cur.execute("INSERT INTO escola (data, turno, num_alunos) VALUES ('2030-03-05', 'manhã', 2)")
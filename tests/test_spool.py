@@ -0,0 +1,123 @@
+import sqlite3
+import time
+
+import pytest
+
+from utils.spool import COLUNA_CHAVE, Spool
+
+
+class Banco:
+    """Tabela remota de mentira com índice único na chave de idempotência."""
+
+    def __init__(self):
+        self.linhas = {}
+        self.falhas = []  # exceções a levantar nas próximas chamadas (None = responde)
+        self.chamadas = []
+
+    def enviar(self, tabela, payloads):
+        self.chamadas.append(len(payloads))
+        novas = []
+        for p in payloads:
+            if p.get("nome") == "ruim":
+                raise ValueError("violates check constraint")
+            if p[COLUNA_CHAVE] not in self.linhas:
+                self.linhas[p[COLUNA_CHAVE]] = dict(p, id=len(self.linhas) + 1)
+                novas.append(self.linhas[p[COLUNA_CHAVE]])
+        if self.falhas:
+            e = self.falhas.pop(0)
+            if e is not None:
+                raise e  # gravou, mas a resposta se perdeu
+        return novas
+
+
+def _timeout(tabela, payloads):
+    raise TimeoutError("timeout")
+
+
+@pytest.fixture
+def banco():
+    return Banco()
+
+
+@pytest.fixture
+def spool(tmp_path, banco):
+    s = Spool(str(tmp_path / "spool.sqlite3"), banco.enviar, max_tentativas=3)
+    s.iniciar = lambda: None  # sem thread: os testes chamam flush()
+    return s
+
+
+def test_envia_em_lote_e_grava_remote_id(spool, banco):
+    ids = [spool.enfileirar("visitante", {"nome": f"v{i}"}) for i in range(3)]
+    assert spool.pendentes() == 3
+    assert spool.flush() == 3
+    assert banco.chamadas == [3]
+    assert [spool.status(i)["status"] for i in ids] == ["enviado"] * 3
+    assert sorted(spool.status(i)["remote_id"] for i in ids) == [1, 2, 3]
+    assert spool.pendentes() == 0
+
+
+def test_falha_transitoria_agenda_nova_tentativa_com_backoff(spool):
+    envio = spool.enfileirar("visitante", {"nome": "v"})
+    spool.enviar = _timeout
+
+    antes = time.time()
+    assert spool.flush() == 0
+    st = spool.status(envio)
+    assert (st["status"], st["tentativas"]) == ("pendente", 1)
+    with sqlite3.connect(spool.caminho) as conn:
+        proxima = conn.execute("SELECT proxima_tentativa FROM envios WHERE id=?", (envio,)).fetchone()[0]
+    assert proxima >= antes + 2  # 2 ** tentativas
+
+    # ainda não é hora: nada é reenviado
+    assert spool.flush() == 0
+    assert spool.status(envio)["tentativas"] == 1
+
+
+def test_desiste_depois_de_max_tentativas(spool):
+    envio = spool.enfileirar("visitante", {"nome": "v"})
+    spool.enviar = _timeout
+    for _ in range(3):
+        with sqlite3.connect(spool.caminho) as conn:
+            conn.execute("UPDATE envios SET proxima_tentativa = 0")
+        spool.flush()
+    st = spool.status(envio)
+    assert (st["status"], st["tentativas"]) == ("erro", 3)
+    assert "timeout" in st["erro"]
+
+
+def test_lote_com_linha_ruim_isola_a_linha(spool, banco):
+    boa1 = spool.enfileirar("visitante", {"nome": "a"})
+    ruim = spool.enfileirar("visitante", {"nome": "ruim"})
+    boa2 = spool.enfileirar("visitante", {"nome": "b"})
+    assert spool.flush() == 2
+    assert spool.status(boa1)["status"] == spool.status(boa2)["status"] == "enviado"
+    assert spool.status(ruim)["status"] == "pendente"
+    assert spool.status(ruim)["tentativas"] == 1
+
+
+def test_reenvio_depois_de_timeout_nao_duplica(spool, banco):
+    """O lote entrou no banco, mas a resposta estourou o timeout: o reenvio linha a linha não duplica."""
+    ids = [spool.enfileirar("visitante", {"nome": f"v{i}"}) for i in range(3)]
+    banco.falhas = [TimeoutError("read timeout")]
+    assert spool.flush() == 3
+    assert len(banco.linhas) == 3
+    assert banco.chamadas == [3, 1, 1, 1]
+    assert all(spool.status(i)["status"] == "enviado" for i in ids)
+
+
+def test_reservar_com_banco_travado_preserva_o_erro_original(tmp_path, banco):
+    class SpoolImpaciente(Spool):
+        def _conn(self):
+            conn = sqlite3.connect(self.caminho, timeout=0.05, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            return conn
+
+    s = SpoolImpaciente(str(tmp_path / "spool.sqlite3"), banco.enviar)
+    trava = sqlite3.connect(s.caminho, isolation_level=None)
+    trava.execute("BEGIN IMMEDIATE")
+    try:
+        with pytest.raises(sqlite3.OperationalError, match="locked"):
+            s._reservar()
+    finally:
+        trava.execute("ROLLBACK")
+        trava.close()
@@ -0,0 +1,148 @@
+# utils/busca.py
+"""
+Busca sem acento e sem diferença de maiúsculas ("jose" acha "José da Silva").
+
+- normalizar(): a mesma forma dos dois lados — termo digitado e texto
+  indexado —, equivalente ao lower(unaccent(...)) do banco;
+- IndiceNgramas: índice de trigramas em memória (cache do desktop). Cada
+  palavra do termo é procurada pelas listas dos trigramas mais raros e
+  confirmada por substring; sem nenhum acerto, cai para a busca aproximada
+  (fração de trigramas em comum, como o pg_trgm), que tolera erros de
+  digitação;
+- sql_indice(): DDL da coluna gerada `busca` com índice GIN de trigramas
+  no Postgres/Supabase (python consultar.py sql-busca).
+"""
+import math
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+N = 3                     # tamanho do n-grama
+LIMIAR_APROXIMADO = 0.6   # fração mínima de trigramas em comum na busca aproximada
+COLUNA_BUSCA = "busca"    # coluna gerada no banco (sql_indice)
+
+# caracteres com sentido na sintaxe de filtros do PostgREST / LIKE
+_PROIBIDOS = re.compile(r"[,()*%\\\"']")
+
+
+def normalizar(texto: Any) -> str:
+    """Sem acentos, em minúsculas, com espaços simples."""
+    if texto is None:
+        return ""
+    s = str(texto)
+    if not s.isascii():
+        s = "".join(c for c in unicodedata.normalize("NFKD", s) if not unicodedata.combining(c))
+    return " ".join(s.casefold().split())
+
+
+def palavras(termo: Any) -> List[str]:
+    """Palavras do termo, sem os caracteres reservados dos filtros (cada uma precisa aparecer)."""
+    return [p for p in (_PROIBIDOS.sub("", w) for w in str(termo or "").split()) if p]
+
+
+def texto_registro(registro: Any, campos: Iterable[str]) -> str:
+    """Texto normalizado dos campos de busca de um registro (dict ou objeto)."""
+    get = registro.get if isinstance(registro, dict) else (lambda c: getattr(registro, c, None))
+    return normalizar(" ".join(str(v) for v in (get(c) for c in campos) if v))
+
+
+class IndiceNgramas:
+    """
+    Índice invertido de n-gramas: para cada trigrama, os ids (array, em
+    ordem de inserção) cujo texto o contém. Só cresce — os agendamentos
+    não são editados —; um id repetido é ignorado.
+    """
+
+    def __init__(self, n: int = N):
+        self.n = n
+        self.textos: Dict[int, str] = {}
+        self._listas: Dict[str, array] = {}
+
+    def __len__(self) -> int:
+        return len(self.textos)
+
+    def gramas(self, texto: str) -> Set[str]:
+        n = self.n
+        return {texto[i:i + n] for i in range(len(texto) - n + 1)}
+
+    def adicionar(self, id_: int, texto: str, gramas: Optional[Set[str]] = None) -> None:
+        """`texto` já normalizado; `gramas` pode vir pronto de outra thread."""
+        if id_ in self.textos:
+            return
+        self.textos[id_] = texto
+        listas = self._listas
+        for g in (gramas if gramas is not None else self.gramas(texto)):
+            lst = listas.get(g)
+            if lst is None:
+                listas[g] = array("q", (id_,))
+            else:
+                lst.append(id_)
+
+    def buscar(self, termo: str, aproximado: bool = True) -> Set[int]:
+        """Ids em que todas as palavras do termo aparecem (ou quase, se nada bater)."""
+        ps = [q for q in (normalizar(p) for p in palavras(termo)) if q]
+        if not ps:
+            return set(self.textos)
+        res: Optional[Set[int]] = None
+        for p in sorted(ps, key=len, reverse=True):  # a mais longa filtra mais
+            ids = self._exatos(p) if res is None else {i for i in res if p in self.textos[i]}
+            res = ids
+            if not res:
+                break
+        if not res and aproximado:
+            res = self._aproximados(ps)
+        return res or set()
+
+    def _exatos(self, p: str) -> Set[int]:
+        textos = self.textos
+        if len(p) < self.n:
+            return {i for i, t in textos.items() if p in t}
+        listas = sorted((self._listas.get(g) for g in self.gramas(p)),
+                        key=lambda lst: len(lst) if lst is not None else -1)
+        if listas[0] is None:
+            return set()
+        candidatos = set(listas[0])
+        if len(listas) > 1 and len(candidatos) > 64:
+            candidatos.intersection_update(listas[1])
+        return {i for i in candidatos if p in textos[i]}
+
+    def _aproximados(self, ps: List[str]) -> Set[int]:
+        res: Optional[Set[int]] = None
+        for p in ps:
+            gs = self.gramas(p)
+            if len(gs) < 2:  # curta demais para aproximar
+                ids = self._exatos(p)
+            else:
+                cont: Counter = Counter()
+                for g in gs:
+                    lst = self._listas.get(g)
+                    if lst is not None:
+                        cont.update(lst)
+                minimo = math.ceil(LIMIAR_APROXIMADO * len(gs))
+                ids = {i for i, c in cont.items() if c >= minimo}
+            res = ids if res is None else res & ids
+            if not res:
+                return set()
+        return res or set()
+
+
+def sql_indice(tabela: str, campos: Iterable[str]) -> str:
+    """
+    DDL (Postgres) da coluna `busca` = lower(unaccent(campos)) com índice GIN
+    de trigramas. Com ela no banco, ligue BUSCA_INDEXADA=1: o filtro vira um
+    ilike indexado numa coluna só, sem acento.
+    """
+    expr = " || ' ' || ".join(f"coalesce({c}::text, '')" for c in campos)
+    return f"""\
+CREATE EXTENSION IF NOT EXISTS unaccent;
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+-- unaccent() não é IMMUTABLE; colunas geradas e índices exigem
+CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text
+    LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$;
+ALTER TABLE {tabela} ADD COLUMN IF NOT EXISTS {COLUNA_BUSCA} text
+    GENERATED ALWAYS AS (lower(f_unaccent({expr}))) STORED;
+CREATE INDEX IF NOT EXISTS ix_{tabela}_{COLUNA_BUSCA} ON {tabela} USING gin ({COLUNA_BUSCA} gin_trgm_ops);
+"""
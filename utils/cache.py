@@ -0,0 +1,43 @@
+# utils/cache.py
+"""
+Cache simples em memória com expiração (TTL), thread-safe.
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+_AUSENTE = object()
+
+
+class TTLCache:
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._dados: Dict[Hashable, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, chave: Hashable, padrao: Any = None) -> Any:
+        item = self._dados.get(chave)
+        if item is None:
+            return padrao
+        expira, valor = item
+        if expira < time.monotonic():
+            with self._lock:
+                self._dados.pop(chave, None)
+            return padrao
+        return valor
+
+    def contem(self, chave: Hashable) -> bool:
+        return self.get(chave, _AUSENTE) is not _AUSENTE
+
+    def set(self, chave: Hashable, valor: Any, ttl: Optional[float] = None) -> None:
+        expira = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._dados[chave] = (expira, valor)
+
+    def invalidar(self, chave: Hashable) -> None:
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._dados.clear()
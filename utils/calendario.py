@@ -0,0 +1,273 @@
+# utils/calendario.py
+"""
+Calendário de funcionamento: em que dias (e turnos) cada tipo de
+agendamento está aberto.
+
+Junta três fontes e as compila, por ano, num bitmap de dias abertos por
+agenda e turno (um byte por dia do ano), de modo que a consulta é O(1):
+  - regra da semana (visita: terça a domingo; pesquisa: segunda a sexta);
+  - feriados nacionais, móveis (Carnaval, Sexta-feira Santa, Corpus
+    Christi) e da Paraíba;
+  - fechamentos e aberturas extraordinárias do arquivo JSON
+    (CALENDARIO_PATH, padrão calendario.json na raiz do projeto).
+
+Formato do arquivo (todas as chaves de cada item são opcionais, menos a data):
+    {
+      "fechamentos": [
+        {"data": "2026-12-24", "turno": "tarde", "motivo": "Véspera de Natal"},
+        {"inicio": "2026-12-26", "fim": "2026-12-31", "motivo": "Recesso"},
+        {"data": "2026-08-10", "tipos": ["escola", "ies"], "motivo": "Montagem de exposição"}
+      ],
+      "aberturas": [
+        {"data": "2026-09-07", "tipos": ["visitante"], "motivo": "Evento especial"}
+      ]
+    }
+"""
+import calendar
+import json
+import os
+import threading
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+CALENDARIO_PATH = os.getenv("CALENDARIO_PATH") or str(ROOT / "calendario.json")
+
+TURNOS: Tuple[str, ...] = ("manhã", "tarde")
+
+# anos compilados mantidos em memória (o compilado há mais tempo sai primeiro)
+MAX_ANOS_CACHE = 8
+
+# Tabela indexada por date.weekday() (segunda = 0): True = aberto
+DIAS_ABERTOS: Dict[str, tuple] = {
+    "visita": (False, True, True, True, True, True, True),     # terça a domingo
+    "pesquisa": (True, True, True, True, True, False, False),  # segunda a sexta
+}
+
+# ---------- Feriados ----------
+FERIADOS_FIXOS: Dict[Tuple[int, int], str] = {
+    (1, 1): "Confraternização Universal",
+    (4, 21): "Tiradentes",
+    (5, 1): "Dia do Trabalho",
+    (8, 5): "Fundação do Estado da Paraíba",
+    (9, 7): "Independência do Brasil",
+    (10, 12): "Nossa Senhora Aparecida",
+    (11, 2): "Finados",
+    (11, 15): "Proclamação da República",
+    (11, 20): "Dia Nacional de Zumbi e da Consciência Negra",
+    (12, 25): "Natal",
+}
+
+
+def pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher, calendário gregoriano)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados(ano: int) -> Dict[date, str]:
+    """Feriados nacionais, móveis e estaduais (PB) do ano."""
+    f = {date(ano, m, d): nome for (m, d), nome in FERIADOS_FIXOS.items()}
+    p = pascoa(ano)
+    f[p - timedelta(days=48)] = "Carnaval"
+    f[p - timedelta(days=47)] = "Carnaval"
+    f[p - timedelta(days=2)] = "Sexta-feira Santa"
+    f[p + timedelta(days=60)] = "Corpus Christi"
+    return f
+
+# ---------- Arquivo de fechamentos/aberturas ----------
+def _dias_do_item(item: Dict[str, Any]) -> Iterable[date]:
+    if item.get("data"):
+        yield date.fromisoformat(item["data"])
+        return
+    d = date.fromisoformat(item["inicio"])
+    fim = date.fromisoformat(item.get("fim") or item["inicio"])
+    while d <= fim:
+        yield d
+        d += timedelta(days=1)
+
+
+def ler_arquivo(caminho: str) -> Dict[str, List[Dict[str, Any]]]:
+    p = Path(caminho)
+    if not p.exists():
+        return {"fechamentos": [], "aberturas": []}
+    with open(p, encoding="utf-8") as f:
+        dados = json.load(f)
+    return {
+        "fechamentos": list(dados.get("fechamentos") or []),
+        "aberturas": list(dados.get("aberturas") or []),
+    }
+
+
+_Ano = Tuple[Dict[str, Dict[str, bytearray]], Dict[Tuple[str, str, date], str], int]
+
+
+class Calendario:
+    """
+    `agendas` mapeia o nome da agenda para a regra da semana: os tipos
+    ("visitante" -> "visita") e as próprias regras ("visita" -> "visita").
+    Itens do arquivo com "tipos" só valem para essas agendas; sem "tipos",
+    valem para todas. O bitmap de cada ano é montado no primeiro uso; no
+    máximo MAX_ANOS_CACHE anos ficam em memória.
+    """
+
+    def __init__(
+        self,
+        agendas: Dict[str, str],
+        fechamentos: Optional[List[Dict[str, Any]]] = None,
+        aberturas: Optional[List[Dict[str, Any]]] = None,
+    ):
+        self.agendas = dict(agendas)
+        self.fechamentos = fechamentos or []
+        self.aberturas = aberturas or []
+        # ano -> (agenda -> turno -> bytearray (1 = aberto), índice = dia do ano - 1;
+        #         (agenda, turno, date) -> motivo do fechamento;
+        #         ordinal de 1º de janeiro (índice do dia = toordinal() - isso)),
+        # em ordem de compilação (o primeiro é o próximo a sair)
+        self._anos: Dict[int, _Ano] = {}
+        self._lock = threading.Lock()
+
+    def _compilar(self, ano: int) -> _Ano:
+        inicio = date(ano, 1, 1)
+        n = 366 if calendar.isleap(ano) else 365  # sem date(ano + 1, ...): ano 9999 é válido
+        fer = feriados(ano)
+        motivos: Dict[Tuple[str, str, date], str] = {}
+        mapa: Dict[str, Dict[str, bytearray]] = {}
+
+        for agenda, regra in self.agendas.items():
+            semana = DIAS_ABERTOS[regra]
+            base = bytearray(
+                1 if semana[(inicio + timedelta(days=i)).weekday()] else 0 for i in range(n)
+            )
+            for d, nome in fer.items():
+                if base[d.toordinal() - inicio.toordinal()]:
+                    base[d.toordinal() - inicio.toordinal()] = 0
+                    for t in TURNOS:
+                        motivos[(agenda, t, d)] = nome
+            mapa[agenda] = {t: bytearray(base) for t in TURNOS}
+
+        def aplicar(itens, valor):
+            for item in itens:
+                tipos = item.get("tipos")
+                turnos = [item["turno"]] if item.get("turno") else list(TURNOS)
+                for d in _dias_do_item(item):
+                    if d.year != ano:
+                        continue
+                    i = d.toordinal() - inicio.toordinal()
+                    for agenda in mapa:
+                        if tipos and agenda not in tipos:
+                            continue
+                        for t in turnos:
+                            if t not in mapa[agenda]:
+                                continue
+                            mapa[agenda][t][i] = valor
+                            if valor:
+                                motivos.pop((agenda, t, d), None)
+                            else:
+                                motivos[(agenda, t, d)] = item.get("motivo") or "Fechado"
+
+        aplicar(self.fechamentos, 0)
+        aplicar(self.aberturas, 1)
+        return mapa, motivos, inicio.toordinal()
+
+    def _ano(self, ano: int) -> _Ano:
+        compilado = self._anos.get(ano)
+        if compilado is None:
+            with self._lock:
+                anos = self._anos
+                compilado = anos.get(ano)
+                if compilado is None:
+                    compilado = self._compilar(ano)
+                    while len(anos) >= MAX_ANOS_CACHE:
+                        anos.pop(next(iter(anos)))
+                    anos[ano] = compilado
+        return compilado
+
+    def aberto(self, agenda: str, d: date, turno: Optional[str] = None) -> bool:
+        """O(1). Sem turno: aberto se algum turno do dia estiver aberto."""
+        mapa, _, ord0 = self._ano(d.year)
+        turnos = mapa[agenda]
+        i = d.toordinal() - ord0
+        if turno is not None:
+            bm = turnos.get(turno)
+            return bool(bm and bm[i])
+        return any(bm[i] for bm in turnos.values())
+
+    def motivo(self, agenda: str, d: date, turno: Optional[str] = None) -> Optional[str]:
+        """Nome do feriado/fechamento, se o dia estiver fechado por um."""
+        motivos = self._ano(d.year)[1]
+        for t in ([turno] if turno else TURNOS):
+            m = motivos.get((agenda, t, d))
+            if m:
+                return m
+        return None
+
+    def turnos_abertos(self, agenda: str, d: date) -> List[str]:
+        mapa, _, ord0 = self._ano(d.year)
+        turnos = mapa[agenda]
+        i = d.toordinal() - ord0
+        return [t for t, bm in turnos.items() if bm[i]]
+
+    def proximos_abertos(
+        self,
+        agenda: str,
+        n: int,
+        a_partir: Optional[date] = None,
+        turno: Optional[str] = None,
+        limite_dias: int = 730,
+    ) -> List[date]:
+        """Os próximos `n` dias abertos a partir de `a_partir` (inclusive, padrão hoje)."""
+        d = a_partir or date.today()
+        saida: List[date] = []
+        for _ in range(limite_dias):
+            if len(saida) >= n:
+                break
+            if self.aberto(agenda, d, turno):
+                saida.append(d)
+            d += timedelta(days=1)
+        return saida
+
+
+_calendario: Optional[Calendario] = None
+_calendario_lock = threading.Lock()
+
+
+def get_calendario() -> Calendario:
+    """Calendário do projeto: agendas de models/esquema.py + arquivo de fechamentos."""
+    global _calendario
+    if _calendario is None:
+        with _calendario_lock:
+            if _calendario is None:
+                _calendario = _criar()
+    return _calendario
+
+
+def _criar() -> Calendario:
+    from models.esquema import ESQUEMAS  # import tardio: esquema -> validacoes -> calendario
+
+    agendas = {regra: regra for regra in DIAS_ABERTOS}
+    agendas.update({tipo: t.regra_data for tipo, t in ESQUEMAS.items()})
+    try:
+        arquivo = ler_arquivo(CALENDARIO_PATH)
+    except Exception as e:
+        print(f"Erro ao ler {CALENDARIO_PATH}:", e)
+        arquivo = {}
+    return Calendario(agendas, arquivo.get("fechamentos"), arquivo.get("aberturas"))
+
+
+def recarregar() -> Calendario:
+    """Relê o arquivo de fechamentos (ex.: depois de editá-lo)."""
+    global _calendario
+    with _calendario_lock:
+        _calendario = _criar()
+    return _calendario
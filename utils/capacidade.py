@@ -0,0 +1,337 @@
+# utils/capacidade.py
+"""
+Índice de ocupação por (data, turno).
+
+Mantém em memória a soma de pessoas agendadas em cada turno, somando
+qtd_pessoas (visitante), num_alunos (escola/ies) e 1 por pesquisador.
+O índice é carregado do banco (e recarregado de tempos em tempos) e
+atualizado a cada inserção, de modo que a verificação de capacidade no
+POST é uma consulta O(1) ao dicionário.
+
+Cada worker tem o seu índice, então ele é só o filtro rápido: a vaga é
+reservada nele de forma atômica antes da inserção (Reserva), mas o
+limite que vale para todos os workers é o do gatilho no banco
+(sql_capacidade), que trava o contador do (data, turno) com FOR UPDATE
+e recusa a inserção que passaria da capacidade.
+"""
+import calendar
+import os
+import re
+import threading
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from models.esquema import ESQUEMAS
+from utils.calendario import TURNOS, get_calendario
+
+# Capacidade máxima de pessoas por turno (somando os quatro tipos)
+CAPACIDADE_TURNO = int(os.getenv("CAPACIDADE_TURNO", "120"))
+
+# Coluna que representa a quantidade de pessoas em cada tabela
+# (None => cada registro conta como 1 pessoa)
+CAMPO_QTD: Dict[str, Optional[str]] = {t: e.campo_qtd for t, e in ESQUEMAS.items()}
+
+
+def _chave(data: Any, turno: Any) -> Tuple[str, str]:
+    if isinstance(data, date):
+        data = data.isoformat()
+    return (str(data or "")[:10], (turno or "").strip().lower())
+
+
+def qtd_registro(tabela: str, registro: Dict[str, Any]) -> int:
+    """Quantidade de pessoas que um registro ocupa no turno."""
+    return ESQUEMAS[tabela].qtd(registro)
+
+
+class TurnoLotado(Exception):
+    """
+    Não há vaga no turno. `ocupado` vem preenchido quando quem recusou foi
+    o gatilho do banco (outro worker já tinha ocupado as vagas).
+    """
+
+    def __init__(self, restante: int, ocupado: Optional[int] = None):
+        super().__init__(restante, ocupado)
+        self.restante = restante
+        self.ocupado = ocupado
+
+    def __str__(self) -> str:
+        return f"Turno lotado para esta data: restam {self.restante} vaga(s)."
+
+
+# mensagem do RAISE EXCEPTION do gatilho (sql_capacidade)
+_LOTADO_BANCO = re.compile(r"TURNO_LOTADO:(\d+)")
+
+
+def ocupado_no_banco(e: BaseException) -> Optional[int]:
+    """Ocupação informada pelo gatilho quando o banco recusou a inserção (senão None)."""
+    m = _LOTADO_BANCO.search(f"{getattr(e, 'message', '') or ''} {e}")
+    return int(m.group(1)) if m else None
+
+
+class OcupacaoIndex:
+    """
+    Índice em memória (data, turno) -> pessoas agendadas.
+
+    Thread-safe; cada worker do gunicorn mantém o seu próprio índice.
+    Vagas reservadas e ainda não inseridas ficam em `_pendentes` e contam
+    na ocupação; sobrevivem a um recarregamento do banco.
+    """
+
+    def __init__(self, capacidade: int = CAPACIDADE_TURNO):
+        self.capacidade = capacidade
+        self._ocupacao: Dict[Tuple[str, str], int] = {}
+        self._pendentes: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self.carregado = False
+        self.carregado_em: Optional[float] = None  # time.monotonic() do último carregar()
+        # muda a cada alteração: caches derivados (disponibilidade) comparam com ela
+        self.versao = 0
+
+    def carregar(self, registros: Iterable[Tuple[str, Dict[str, Any]]]) -> None:
+        """
+        Reconstrói o índice a partir de pares (tabela, registro).
+        Os registros precisam apenas de 'data', 'turno' e da coluna de quantidade.
+        """
+        novo: Dict[Tuple[str, str], int] = {}
+        for tabela, r in registros:
+            k = _chave(r.get("data"), r.get("turno"))
+            novo[k] = novo.get(k, 0) + qtd_registro(tabela, r)
+
+        with self._lock:
+            self._ocupacao = novo
+            self.carregado = True
+            self.carregado_em = time.monotonic()
+            self.versao += 1
+
+    def ocupacao(self, data: Any, turno: Any) -> int:
+        k = _chave(data, turno)
+        return self._ocupacao.get(k, 0) + self._pendentes.get(k, 0)
+
+    def restante(self, data: Any, turno: Any) -> int:
+        return max(self.capacidade - self.ocupacao(data, turno), 0)
+
+    def cabe(self, data: Any, turno: Any, qtd: int) -> bool:
+        """True se ainda há lugar para `qtd` pessoas no turno."""
+        return self.ocupacao(data, turno) + max(int(qtd or 0), 0) <= self.capacidade
+
+    def reservar(self, data: Any, turno: Any, qtd: int) -> bool:
+        """Verifica e reserva `qtd` lugares numa operação só (sob o lock)."""
+        k = _chave(data, turno)
+        qtd = max(int(qtd or 0), 0)
+        with self._lock:
+            if self._ocupacao.get(k, 0) + self._pendentes.get(k, 0) + qtd > self.capacidade:
+                return False
+            self._pendentes[k] = self._pendentes.get(k, 0) + qtd
+            return True
+
+    def confirmar(self, data: Any, turno: Any, qtd: int) -> None:
+        """A inserção da reserva deu certo: a vaga passa a ocupada."""
+        k = _chave(data, turno)
+        qtd = max(int(qtd or 0), 0)
+        with self._lock:
+            self._tirar_pendente(k, qtd)
+            self._ocupacao[k] = self._ocupacao.get(k, 0) + qtd
+            self.versao += 1
+
+    def liberar(self, data: Any, turno: Any, qtd: int) -> None:
+        """A inserção da reserva falhou: devolve a vaga."""
+        with self._lock:
+            self._tirar_pendente(_chave(data, turno), max(int(qtd or 0), 0))
+
+    def _tirar_pendente(self, k: Tuple[str, str], qtd: int) -> None:
+        resto = self._pendentes.get(k, 0) - qtd
+        if resto > 0:
+            self._pendentes[k] = resto
+        else:
+            self._pendentes.pop(k, None)
+
+    def ajustar(self, data: Any, turno: Any, ocupado: int) -> None:
+        """O banco informou a ocupação real (maior que a vista por este worker)."""
+        k = _chave(data, turno)
+        with self._lock:
+            if ocupado > self._ocupacao.get(k, 0):
+                self._ocupacao[k] = ocupado
+                self.versao += 1
+
+    def registrar(self, tabela: str, registro: Dict[str, Any]) -> None:
+        """Soma um registro recém-inserido ao índice."""
+        k = _chave(registro.get("data"), registro.get("turno"))
+        qtd = qtd_registro(tabela, registro)
+        with self._lock:
+            self._ocupacao[k] = self._ocupacao.get(k, 0) + qtd
+            self.versao += 1
+
+
+class Reserva:
+    """
+    Vaga de um registro reservada no índice, como contexto em volta da
+    inserção: `confirmar()` quando ela der certo; se o bloco terminar sem
+    confirmar (falha ou exceção), a vaga volta. Levanta TurnoLotado já na
+    criação se não couber. Um TurnoLotado do banco dentro do bloco ajusta
+    o índice à ocupação real e recalcula `restante`.
+    """
+
+    def __init__(self, ocupacao: OcupacaoIndex, tabela: str, registro: Dict[str, Any]):
+        self.ocupacao = ocupacao
+        self.data = registro.get("data")
+        self.turno = registro.get("turno")
+        self.qtd = qtd_registro(tabela, registro)
+        if not ocupacao.reservar(self.data, self.turno, self.qtd):
+            raise TurnoLotado(ocupacao.restante(self.data, self.turno))
+        self._aberta = True
+
+    def confirmar(self) -> None:
+        if self._aberta:
+            self._aberta = False
+            self.ocupacao.confirmar(self.data, self.turno, self.qtd)
+
+    def desfazer(self) -> None:
+        if self._aberta:
+            self._aberta = False
+            self.ocupacao.liberar(self.data, self.turno, self.qtd)
+
+    def __enter__(self) -> "Reserva":
+        return self
+
+    def __exit__(self, tipo, e, tb) -> bool:
+        self.desfazer()
+        if isinstance(e, TurnoLotado) and e.ocupado is not None:
+            self.ocupacao.ajustar(self.data, self.turno, e.ocupado)
+            e.restante = self.ocupacao.restante(self.data, self.turno)
+        return False
+
+
+GATILHO_VAGA = "tg_{}_vaga"
+
+
+def _sql_pessoas(tabela: str) -> str:
+    """(data, turno, qtd) de cada agendamento de `tabela`, como o gatilho conta."""
+    campo = CAMPO_QTD[tabela]
+    qtd = f"greatest(coalesce({campo}, 0), 0)" if campo else "1"
+    return (
+        f"SELECT data::date AS data, lower(trim(turno)) AS turno, {qtd} AS qtd FROM {tabela}"
+        " WHERE data IS NOT NULL AND turno IS NOT NULL"
+    )
+
+
+def sql_parcela_ocupacao(tabela: str, sinal: int) -> str:
+    """
+    Soma (sinal 1) ou subtrai (sinal -1) de ocupacao_turno as pessoas que
+    `tabela` tem hoje em cada (data, turno). A restauração usa os dois em
+    volta do COPY, com o gatilho desligado: tira a parcela antiga, carrega,
+    põe a nova.
+    """
+    return (
+        "INSERT INTO ocupacao_turno (data, turno, pessoas)\n"
+        f"SELECT data, turno, {int(sinal)} * sum(qtd) FROM ({_sql_pessoas(tabela)}) AS a\n"
+        "GROUP BY data, turno\n"
+        "ON CONFLICT (data, turno) DO UPDATE SET pessoas = ocupacao_turno.pessoas + EXCLUDED.pessoas"
+    )
+
+
+def sql_capacidade(capacidade: int = CAPACIDADE_TURNO) -> str:
+    """
+    DDL (Postgres) do limite compartilhado por todos os workers: contador
+    por (data, turno), preenchido com os agendamentos existentes, e um
+    gatilho BEFORE INSERT nas quatro tabelas que trava a linha do contador
+    (SELECT ... FOR UPDATE), recusa com TURNO_LOTADO:<ocupado> se passar
+    de `capacidade` e soma a quantidade. A inserção e o contador ficam na
+    mesma transação: se a inserção falhar, a soma é desfeita junto. Um
+    reenvio do spool (chave_envio já gravada, descartado pelo ON CONFLICT)
+    não conta de novo.
+    """
+    partes = []
+    gatilhos = []
+    for t, e in ESQUEMAS.items():
+        partes.append("    " + _sql_pessoas(t))
+        arg = f"'{e.campo_qtd}'" if e.campo_qtd else ""
+        gatilhos.append(
+            f"DROP TRIGGER IF EXISTS {GATILHO_VAGA.format(t)} ON {t};\n"
+            f"CREATE TRIGGER {GATILHO_VAGA.format(t)} BEFORE INSERT ON {t}\n"
+            f"    FOR EACH ROW EXECUTE FUNCTION reservar_vaga_turno({arg});"
+        )
+    uniao = "\n    UNION ALL\n".join(partes)
+    return f"""\
+CREATE TABLE IF NOT EXISTS ocupacao_turno (
+    data    date NOT NULL,
+    turno   text NOT NULL,
+    pessoas integer NOT NULL DEFAULT 0,
+    PRIMARY KEY (data, turno)
+);
+
+CREATE OR REPLACE FUNCTION reservar_vaga_turno() RETURNS trigger
+LANGUAGE plpgsql AS $$
+DECLARE
+    qtd      integer := 1;
+    ocupado  integer;
+    turno_n  text := lower(trim(NEW.turno));
+    chave    text := to_jsonb(NEW) ->> 'chave_envio';
+    repetido boolean;
+BEGIN
+    IF chave IS NOT NULL THEN
+        EXECUTE format('SELECT EXISTS (SELECT 1 FROM %I.%I WHERE chave_envio = $1)',
+                       TG_TABLE_SCHEMA, TG_TABLE_NAME)
+            INTO repetido USING chave;
+        IF repetido THEN
+            RETURN NEW;
+        END IF;
+    END IF;
+    IF TG_NARGS > 0 THEN
+        qtd := greatest(coalesce((to_jsonb(NEW) ->> TG_ARGV[0])::integer, 0), 0);
+    END IF;
+    INSERT INTO ocupacao_turno (data, turno) VALUES (NEW.data::date, turno_n)
+        ON CONFLICT (data, turno) DO NOTHING;
+    SELECT pessoas INTO ocupado FROM ocupacao_turno
+        WHERE data = NEW.data::date AND turno = turno_n
+        FOR UPDATE;
+    IF ocupado + qtd > {int(capacidade)} THEN
+        RAISE EXCEPTION 'TURNO_LOTADO:%', ocupado USING ERRCODE = 'P0001';
+    END IF;
+    UPDATE ocupacao_turno SET pessoas = pessoas + qtd
+        WHERE data = NEW.data::date AND turno = turno_n;
+    RETURN NEW;
+END $$;
+
+{chr(10).join(gatilhos)}
+
+-- contadores a partir dos agendamentos que já existem
+INSERT INTO ocupacao_turno (data, turno, pessoas)
+SELECT data, turno, sum(qtd) FROM (
+{uniao}
+) AS a
+GROUP BY data, turno
+ON CONFLICT (data, turno) DO UPDATE SET pessoas = EXCLUDED.pessoas;
+"""
+
+
+def disponibilidade_mes(
+    ocupacao: OcupacaoIndex, tipo: str, ano: int, mes: int, hoje: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Situação de cada dia do mês para `tipo`: aberto/fechado (calendário)
+    e vagas restantes por turno (índice de ocupação). Dias passados e
+    turnos fechados vêm com vagas None. Só consultas O(1) por dia/turno.
+    """
+    hoje = hoje or date.today()
+    cal = get_calendario()
+    dias = []
+    for dia in range(1, calendar.monthrange(ano, mes)[1] + 1):
+        d = date(ano, mes, dia)
+        turnos: Dict[str, Optional[int]] = {}
+        for t in TURNOS:
+            aberto = d >= hoje and cal.aberto(tipo, d, t)
+            turnos[t] = ocupacao.restante(d, t) if aberto else None
+        aberto = any(v is not None for v in turnos.values())
+        dias.append({
+            "data": d.isoformat(),
+            "aberto": aberto,
+            "motivo": cal.motivo(tipo, d) if (d >= hoje and not aberto) else None,
+            "vagas": turnos,
+        })
+    return {
+        "tipo": tipo,
+        "mes": f"{ano:04d}-{mes:02d}",
+        "capacidade": ocupacao.capacidade,
+        "dias": dias,
+    }
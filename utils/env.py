@@ -0,0 +1,38 @@
+# utils/env.py
+"""
+Carregamento único do .env, compartilhado por supabase_client, database,
+consultar e os apps desktop. Procura o arquivo ao lado do executável
+(PyInstaller), no diretório atual e na raiz do projeto; a primeira
+chamada carrega, as seguintes não fazem nada.
+"""
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+_carregado = False
+
+
+def carregar_env() -> None:
+    global _carregado
+    if _carregado:
+        return
+    _carregado = True
+
+    candidatos = []
+    if hasattr(sys, "_MEIPASS"):
+        # .exe do PyInstaller: .env empacotado e ao lado do executável
+        candidatos += [Path(sys._MEIPASS) / ".env", Path(sys.executable).resolve().parent / ".env"]
+    elif sys.argv and sys.argv[0]:
+        candidatos.append(Path(sys.argv[0]).resolve().parent / ".env")
+    candidatos += [Path.cwd() / ".env", ROOT / ".env"]
+
+    existentes = [p for p in candidatos if p.exists()]
+    if not existentes:
+        return
+    try:
+        from dotenv import load_dotenv
+    except Exception:
+        print("[env] python-dotenv não instalado; usando só as variáveis do ambiente.")
+        return
+    load_dotenv(dotenv_path=existentes[0], override=False)
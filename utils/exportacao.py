@@ -0,0 +1,753 @@
+# utils/exportacao.py
+"""
+Exportação em streaming de tabelas (CSV, JSON ou JSON Lines).
+
+A tabela é lida em páginas por keyset (`id > último id`, ordem crescente),
+nunca inteira: cada página é escrita no arquivo e descartada, então a
+memória fica constante mesmo para anos de histórico, e o limite de linhas
+por resposta do PostgREST deixa de importar. O progresso (linhas, linhas/s)
+é reportado periodicamente.
+
+A fonte das páginas é uma função `buscar(apos_id, n) -> [registros]`
+(Supabase/PostgREST). No Postgres direto (psycopg2) o CSV sai por
+`COPY ... TO STDOUT` e o JSON por um cursor nomeado; `restaurar_postgres`
+faz o caminho inverso com `COPY ... FROM STDIN`.
+
+Formatos: csv, json, jsonl; csv/jsonl comprimidos (.gz; .zst com o pacote
+opcional zstandard); parquet (pacote opcional pyarrow) com colunas tipadas
+pelo esquema e gravado em row groups conforme as páginas chegam.
+
+Exportação incremental: o maior id exportado de cada arquivo fica num
+arquivo de marcas d'água ao lado da saída; a próxima execução busca só
+`id > marca` e anexa ao arquivo (ou grava um arquivo delta).
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.esquema import ESQUEMAS
+from utils.capacidade import GATILHO_VAGA, sql_parcela_ocupacao
+from utils.resiliencia import Circuito, executar
+from utils.validacoes import parse_data
+
+TAMANHO_PAGINA = 1000
+FORMATOS = ("csv", "json", "jsonl", "csv.gz", "jsonl.gz", "csv.zst", "jsonl.zst", "parquet")
+LINHAS_POR_GRUPO = 50000  # parquet: linhas por row group (memória ~ um grupo)
+
+Buscar = Callable[[Optional[int], int], List[Dict[str, Any]]]
+
+_circuito = Circuito("exportacao")
+
+
+def base_formato(fmt: str) -> str:
+    """'csv.gz' -> 'csv'."""
+    return fmt.split(".", 1)[0]
+
+
+def compressao(fmt: str) -> Optional[str]:
+    """'csv.gz' -> 'gz'; sem compressão -> None."""
+    return fmt.split(".", 1)[1] if "." in fmt else None
+
+
+def anexavel(fmt: str) -> bool:
+    """CSV e JSONL (comprimidos ou não) aceitam linhas no fim; JSON e parquet não."""
+    return base_formato(fmt) in ("csv", "jsonl")
+
+
+def _zstandard():
+    try:
+        import zstandard
+    except Exception:
+        raise RuntimeError("zstandard não instalado (necessário para os formatos .zst).")
+    return zstandard
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except Exception:
+        raise RuntimeError("pyarrow não instalado (necessário para o formato parquet).")
+    return pyarrow, pyarrow.parquet
+
+
+def abrir_texto(caminho: Path, modo: str, comp: Optional[str] = None) -> IO[str]:
+    """
+    Abre `caminho` em texto UTF-8 ("r", "w" ou "a"), com compressão opcional.
+    Anexar a .gz/.zst acrescenta um membro/quadro novo — leitores padrão
+    (gzip, zstd -d) leem o arquivo inteiro como um fluxo só.
+    """
+    if comp == "gz":
+        return gzip.open(caminho, modo + "t", encoding="utf-8", newline="", compresslevel=6)
+    if comp == "zst":
+        zstd = _zstandard()
+        bruto = open(caminho, modo + "b")
+        if modo == "r":
+            leitor = zstd.ZstdDecompressor().stream_reader(bruto, read_across_frames=True, closefd=True)
+            return io.TextIOWrapper(leitor, encoding="utf-8", newline="")
+        escritor = zstd.ZstdCompressor(level=3).stream_writer(bruto, closefd=True)
+        return io.TextIOWrapper(escritor, encoding="utf-8", newline="")
+    if comp:
+        raise ValueError(f"Compressão desconhecida: {comp}")
+    return open(caminho, modo, newline="", encoding="utf-8")
+
+
+# ---------- Fontes ----------
+def fonte_supabase(
+    cliente, tabela: str, colunas: str = "*", ate_id: Optional[int] = None, desc: bool = False
+) -> Buscar:
+    """
+    Páginas via PostgREST; leituras são repetidas em erro transitório.
+    Com `desc`, do maior id para o menor (`apos_id` vira "id < apos_id").
+    """
+
+    def buscar(apos_id: Optional[int], n: int) -> List[Dict[str, Any]]:
+        q = cliente.table(tabela).select(colunas).order("id", desc=desc).limit(n)
+        if apos_id is not None:
+            q = q.lt("id", apos_id) if desc else q.gt("id", apos_id)
+        if ate_id is not None:
+            q = q.lte("id", ate_id)
+        resp = executar(q.execute, _circuito, idempotente=True, prazo=60)
+        return getattr(resp, "data", None) or []
+
+    return buscar
+
+
+def limites_supabase(cliente, tabela: str) -> Optional[Tuple[int, int]]:
+    """(menor id, maior id) da tabela, ou None se vazia."""
+    def ponta(desc: bool):
+        q = cliente.table(tabela).select("id").order("id", desc=desc).limit(1)
+        d = getattr(executar(q.execute, _circuito, idempotente=True, prazo=60), "data", None) or []
+        return d[0]["id"] if d else None
+
+    menor = ponta(False)
+    return None if menor is None else (menor, ponta(True))
+
+
+def limites_postgres(conn, tabela: str) -> Optional[Tuple[int, int]]:
+    """Idem, via psycopg2."""
+    from psycopg2 import sql
+
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT min(id) AS menor, max(id) AS maior FROM {}").format(sql.Identifier(tabela)))
+        r = cur.fetchone()
+    return None if not r or r["menor"] is None else (r["menor"], r["maior"])
+
+
+def faixas_id(menor: int, maior: int, partes: int) -> List[Tuple[Optional[int], Optional[int]]]:
+    """
+    Divide [menor, maior] em `partes` faixas (apos_id, ate_id] contíguas.
+    A última fica aberta (ate_id None) para pegar linhas inseridas durante a exportação.
+    """
+    partes = max(1, min(partes, maior - menor + 1))
+    vao = maior - menor + 1
+    cortes = [menor - 1 + (vao * i) // partes for i in range(partes + 1)]
+    faixas: List[Tuple[Optional[int], Optional[int]]] = [
+        (cortes[i], cortes[i + 1]) for i in range(partes)
+    ]
+    faixas[0] = (None, faixas[0][1])
+    faixas[-1] = (faixas[-1][0], None)
+    return faixas
+
+
+def paginas(
+    buscar: Buscar,
+    tamanho_pagina: int = TAMANHO_PAGINA,
+    apos_id: Optional[int] = None,
+    limite: Optional[int] = None,
+) -> Iterator[List[Dict[str, Any]]]:
+    """Gera páginas na ordem de id da fonte até acabar (ou até `limite` linhas)."""
+    restante = limite if (limite and limite > 0) else None
+    while True:
+        n = min(tamanho_pagina, restante) if restante is not None else tamanho_pagina
+        rows = buscar(apos_id, n)
+        if not rows:
+            return
+        yield rows
+        apos_id = rows[-1]["id"]
+        if restante is not None:
+            restante -= len(rows)
+            if restante <= 0:
+                return
+        # página menor que `n` não significa fim: o PostgREST corta em max-rows.
+        # Só uma página vazia encerra.
+
+
+# ---------- Escritores ----------
+class EscritorCSV:
+    """
+    Cabeçalho: colunas do esquema (se for tabela de agendamento) + extras da 1ª página.
+    Com `colunas` (anexando a um arquivo existente), usa essas e não escreve cabeçalho.
+    """
+
+    def __init__(self, f: IO[str], tabela: str, delimitador: str = ",", colunas: Optional[List[str]] = None):
+        self.f = f
+        self.tabela = tabela
+        self.delimitador = delimitador
+        self._w: Optional[csv.DictWriter] = None
+        if colunas:
+            self._w = csv.DictWriter(f, fieldnames=colunas, delimiter=delimitador, extrasaction="ignore")
+
+    def _iniciar(self, primeira: Optional[Dict[str, Any]]) -> None:
+        colunas = list(ESQUEMAS[self.tabela].colunas_leitura) if self.tabela in ESQUEMAS else []
+        if primeira:
+            colunas += [k for k in primeira.keys() if k not in colunas]
+        self._w = csv.DictWriter(self.f, fieldnames=colunas, delimiter=self.delimitador, extrasaction="ignore")
+        self._w.writeheader()
+
+    def escrever(self, rows: List[Dict[str, Any]]) -> None:
+        if self._w is None:
+            self._iniciar(rows[0] if rows else None)
+        self._w.writerows(rows)
+
+    def fechar(self) -> None:
+        if self._w is None:
+            self._iniciar(None)
+
+
+class EscritorJSONL:
+    def __init__(self, f: IO[str]):
+        self.f = f
+
+    def escrever(self, rows: List[Dict[str, Any]]) -> None:
+        dumps = json.dumps
+        self.f.write("".join(dumps(r, ensure_ascii=False, default=str) + "\n" for r in rows))
+
+    def fechar(self) -> None:
+        pass
+
+
+class EscritorJSON:
+    """Array JSON escrito aos poucos (um registro por linha), sem montar a lista inteira."""
+
+    def __init__(self, f: IO[str]):
+        self.f = f
+        self._primeiro = True
+        f.write("[")
+
+    def escrever(self, rows: List[Dict[str, Any]]) -> None:
+        dumps = json.dumps
+        for r in rows:
+            self.f.write(("\n" if self._primeiro else ",\n") + dumps(r, ensure_ascii=False, default=str))
+            self._primeiro = False
+
+    def fechar(self) -> None:
+        self.f.write("\n]\n")
+
+
+class EscritorParquet:
+    """
+    Parquet com colunas tipadas: id e campos "inteiro" do esquema em int64,
+    "data" em date32, o resto texto (colunas extras da 1ª página também).
+    As páginas se acumulam até `linhas_por_grupo` e viram um row group.
+    """
+
+    def __init__(self, caminho: Path, tabela: str, linhas_por_grupo: int = LINHAS_POR_GRUPO):
+        self.pa, self.pq = _pyarrow()
+        self.caminho = caminho
+        self.tabela = tabela
+        self.linhas_por_grupo = linhas_por_grupo
+        self._buffer: List[Dict[str, Any]] = []
+        self._conversores: List[Tuple[str, Callable[[Any], Any]]] = []
+        self._w = None
+
+    def _iniciar(self, primeira: Optional[Dict[str, Any]]) -> None:
+        pa = self.pa
+        por_tipo = {
+            "inteiro": (pa.int64(), _int_ou_none),
+            "data": (pa.date32(), parse_data),
+        }
+        texto = (pa.string(), _texto_ou_none)
+        tipos: Dict[str, Tuple[Any, Callable[[Any], Any]]] = {"id": por_tipo["inteiro"]}
+        if self.tabela in ESQUEMAS:
+            for c in ESQUEMAS[self.tabela].campos:
+                tipos[c.nome] = por_tipo.get(c.tipo, texto)
+        for k in (primeira or {}):
+            tipos.setdefault(k, texto)
+        self._conversores = [(nome, conv) for nome, (_, conv) in tipos.items()]
+        self._schema = pa.schema([(nome, tipo) for nome, (tipo, _) in tipos.items()])
+        self._w = self.pq.ParquetWriter(str(self.caminho), self._schema, compression="zstd")
+
+    def _descarregar(self) -> None:
+        rows, self._buffer = self._buffer, []
+        cols = {nome: [conv(r.get(nome)) for r in rows] for nome, conv in self._conversores}
+        self._w.write_table(self.pa.Table.from_pydict(cols, schema=self._schema), row_group_size=len(rows))
+
+    def escrever(self, rows: List[Dict[str, Any]]) -> None:
+        if self._w is None:
+            self._iniciar(rows[0] if rows else None)
+        self._buffer.extend(rows)
+        if len(self._buffer) >= self.linhas_por_grupo:
+            self._descarregar()
+
+    def fechar(self) -> None:
+        if self._w is None:
+            self._iniciar(None)
+        if self._buffer:
+            self._descarregar()
+        self._w.close()
+
+    def abortar(self) -> None:
+        if self._w is not None:
+            self._w.close()
+
+
+def _int_ou_none(v: Any) -> Optional[int]:
+    if v is None or v == "":
+        return None
+    try:
+        return int(v)
+    except (TypeError, ValueError):
+        return None
+
+
+def _texto_ou_none(v: Any) -> Optional[str]:
+    if v is None or isinstance(v, str):
+        return v
+    if isinstance(v, (dict, list)):
+        return json.dumps(v, ensure_ascii=False, default=str)
+    return str(v)
+
+
+def formato_parte(fmt: str) -> str:
+    """
+    Partes de uma exportação paralela: sem compressão (ela é aplicada na
+    junção), e JSON é gravado como JSONL e vira array na junção.
+    """
+    base = base_formato(fmt)
+    return "jsonl" if base == "json" else base
+
+
+def juntar_partes(partes: List[Path], fmt: str, destino: Path) -> None:
+    """
+    Junta as partes (na ordem dada, que é a ordem de id) em `destino`,
+    em streaming, e apaga as partes. CSV: mantém só o 1º cabeçalho.
+    Parquet: copia os row groups de cada parte.
+    """
+    if fmt == "parquet":
+        _juntar_parquet(partes, destino)
+    else:
+        _juntar_texto(partes, fmt, destino)
+    for parte in partes:
+        try:
+            os.remove(parte)
+        except OSError:
+            pass
+
+
+def _juntar_parquet(partes: List[Path], destino: Path) -> None:
+    _, pq = _pyarrow()
+    w = None
+    try:
+        for parte in partes:
+            pf = pq.ParquetFile(str(parte))
+            if w is None:
+                w = pq.ParquetWriter(str(destino), pf.schema_arrow, compression="zstd")
+            for i in range(pf.num_row_groups):
+                w.write_table(pf.read_row_group(i))
+    finally:
+        if w is not None:
+            w.close()
+
+
+def _juntar_texto(partes: List[Path], fmt: str, destino: Path) -> None:
+    base = base_formato(fmt)
+    with abrir_texto(destino, "w", compressao(fmt)) as out:
+        if base == "json":
+            out.write("[")
+        primeiro = True
+        for i, parte in enumerate(partes):
+            with open(parte, newline="", encoding="utf-8") as f:
+                if base == "csv":
+                    cabecalho = f.readline()
+                    if i == 0:
+                        out.write(cabecalho)
+                    shutil.copyfileobj(f, out, 1 << 20)
+                elif base == "json":
+                    for linha in f:
+                        out.write(("\n" if primeiro else ",\n") + linha.rstrip("\n"))
+                        primeiro = False
+                else:
+                    shutil.copyfileobj(f, out, 1 << 20)
+        if base == "json":
+            out.write("\n]\n")
+
+
+def cabecalho_csv(caminho: Path, fmt: str = "csv") -> List[str]:
+    with abrir_texto(caminho, "r", compressao(fmt)) as f:
+        return next(csv.reader(f), [])
+
+
+def novo_escritor(fmt: str, f: IO[str], tabela: str, colunas: Optional[List[str]] = None):
+    fmt = base_formato(fmt)
+    if fmt == "csv":
+        return EscritorCSV(f, tabela, colunas=colunas)
+    if fmt == "jsonl":
+        return EscritorJSONL(f)
+    return EscritorJSON(f)
+
+
+# ---------- Progresso ----------
+class Progresso:
+    """Imprime linhas exportadas e vazão a cada `intervalo` segundos (stderr)."""
+
+    def __init__(self, nome: str, intervalo: float = 2.0, saida: IO[str] = sys.stderr, ativo: bool = True):
+        self.nome = nome
+        self.intervalo = intervalo
+        self.saida = saida
+        self.ativo = ativo
+        self.linhas = 0
+        self.inicio = time.monotonic()
+        self._ultimo = self.inicio
+
+    def somar(self, n: int) -> None:
+        self.linhas += n
+        agora = time.monotonic()
+        if self.ativo and agora - self._ultimo >= self.intervalo:
+            self._ultimo = agora
+            print(f"  {self.nome}: {self.linhas} linha(s), {self.vazao():,.0f} linhas/s", file=self.saida, flush=True)
+
+    def segundos(self) -> float:
+        return time.monotonic() - self.inicio
+
+    def vazao(self) -> float:
+        s = self.segundos()
+        return self.linhas / s if s > 0 else 0.0
+
+
+class ResultadoExportacao:
+    def __init__(self, tabela: str, caminho: Path, linhas: int, segundos: float, ultimo_id: Optional[int]):
+        self.tabela = tabela
+        self.caminho = caminho
+        self.linhas = linhas
+        self.segundos = segundos
+        self.ultimo_id = ultimo_id
+
+    @property
+    def vazao(self) -> float:
+        return self.linhas / self.segundos if self.segundos > 0 else 0.0
+
+
+def exportar(
+    buscar: Buscar,
+    tabela: str,
+    fmt: str,
+    caminho: Path,
+    limite: Optional[int] = None,
+    tamanho_pagina: int = TAMANHO_PAGINA,
+    apos_id: Optional[int] = None,
+    progresso: Optional[Progresso] = None,
+    anexar: bool = False,
+) -> ResultadoExportacao:
+    """
+    Escreve a tabela em `caminho` página a página. Memória: uma página.
+    Com `anexar`, acrescenta ao fim de um CSV/JSONL existente (mesmas colunas, sem cabeçalho).
+    """
+    if fmt not in FORMATOS:
+        raise ValueError(f"Formato inválido. Use {', '.join(FORMATOS)}.")
+    if anexar and not anexavel(fmt):
+        raise ValueError(f"Não dá para anexar a um arquivo {fmt}; use um arquivo delta.")
+    return gravar_paginas(
+        paginas(buscar, tamanho_pagina, apos_id, limite), tabela, fmt, caminho, apos_id, progresso, anexar
+    )
+
+
+def gravar_paginas(
+    pgs: Iterable[List[Dict[str, Any]]],
+    tabela: str,
+    fmt: str,
+    caminho: Path,
+    apos_id: Optional[int] = None,
+    progresso: Optional[Progresso] = None,
+    anexar: bool = False,
+) -> ResultadoExportacao:
+    """Grava páginas (listas de registros em ordem de id) em `caminho`."""
+    progresso = progresso or Progresso(tabela)
+    ultimo_id = apos_id
+    with _abrir_escritor(caminho, fmt, tabela, anexar) as escritor:
+        for rows in pgs:
+            escritor.escrever(rows)
+            # maior id gravado (a marca d'água), também numa leitura decrescente
+            ultimo_id = max(i for i in (ultimo_id, rows[0]["id"], rows[-1]["id"]) if i is not None)
+            progresso.somar(len(rows))
+    return ResultadoExportacao(tabela, caminho, progresso.linhas, progresso.segundos(), ultimo_id)
+
+
+@contextmanager
+def _abrir_escritor(caminho: Path, fmt: str, tabela: str, anexar: bool):
+    """Escritor do formato pronto para `escrever`; `fechar` é chamado se tudo der certo."""
+    if fmt == "parquet":
+        caminho.parent.mkdir(parents=True, exist_ok=True)
+        escritor = EscritorParquet(caminho, tabela)
+        try:
+            yield escritor
+        except BaseException:
+            escritor.abortar()
+            raise
+        escritor.fechar()
+        return
+    with _abrir_saida(caminho, fmt, anexar) as (f, colunas):
+        escritor = novo_escritor(fmt, f, tabela, colunas)
+        yield escritor
+        escritor.fechar()
+
+
+@contextmanager
+def _abrir_saida(caminho: Path, fmt: str, anexar: bool):
+    """
+    Abre `caminho` para escrita (ou para anexar, devolvendo as colunas do
+    cabeçalho CSV existente). Se falhar no meio de um anexo, desfaz o que
+    foi anexado: a marca d'água não avançou.
+    """
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    anexar = anexar and caminho.exists()
+    colunas = cabecalho_csv(caminho, fmt) if anexar and base_formato(fmt) == "csv" else None
+    tamanho_antes = caminho.stat().st_size if anexar else 0
+    try:
+        with abrir_texto(caminho, "a" if anexar else "w", compressao(fmt)) as f:
+            yield f, colunas
+    except BaseException:
+        if anexar:
+            os.truncate(caminho, tamanho_antes)
+        raise
+
+
+# ---------- Postgres direto (COPY / cursor nomeado) ----------
+def _filtro_id(apos_id: Optional[int], ate_id: Optional[int]):
+    from psycopg2 import sql
+
+    partes = [sql.SQL("id > {}").format(sql.Literal(apos_id if apos_id is not None else -1))]
+    if ate_id is not None:
+        partes.append(sql.SQL("id <= {}").format(sql.Literal(ate_id)))
+    return sql.SQL(" AND ").join(partes)
+
+
+def _faixa_ids(
+    conn, tabela: str, apos_id: Optional[int], ate_id: Optional[int], limite: Optional[int], desc: bool = False
+) -> Tuple[Optional[int], Optional[int], int]:
+    """
+    (menor id, maior id, linhas) que a exportação vai incluir: fixa a faixa antes do COPY.
+    Com `limite` e `desc`, são as `limite` linhas de maior id.
+    """
+    from psycopg2 import sql
+
+    sub = sql.SQL("SELECT id FROM {} WHERE {} ORDER BY id {}").format(
+        sql.Identifier(tabela), _filtro_id(apos_id, ate_id), sql.SQL("DESC" if desc else "ASC")
+    )
+    if limite and limite > 0:
+        sub = sql.SQL("{} LIMIT {}").format(sub, sql.Literal(limite))
+    with conn.cursor() as cur:
+        cur.execute(sql.SQL("SELECT min(id) AS piso, max(id) AS teto, count(*) AS n FROM ({}) s").format(sub))
+        r = cur.fetchone()
+    return (r["piso"], r["teto"], r["n"]) if r else (None, None, 0)
+
+
+def exportar_postgres(
+    conn,
+    tabela: str,
+    fmt: str,
+    caminho: Path,
+    limite: Optional[int] = None,
+    tamanho_pagina: int = TAMANHO_PAGINA,
+    apos_id: Optional[int] = None,
+    ate_id: Optional[int] = None,
+    progresso: Optional[Progresso] = None,
+    anexar: bool = False,
+    desc: bool = False,
+) -> ResultadoExportacao:
+    """
+    Caminho administrativo (psycopg2), sem páginas de ida e volta:
+      - CSV (comprimido ou não): `COPY (SELECT ...) TO STDOUT` direto para o
+        arquivo — o servidor formata e o Python só repassa (e comprime) o texto;
+      - JSON/JSONL/parquet: cursor nomeado (do lado do servidor), lido em blocos de
+        `tamanho_pagina` e gravado pelo escritor de sempre.
+    A faixa (apos_id, teto] é fixada antes, então `ultimo_id` é exato.
+    Com `desc`, as linhas saem do maior id para o menor (com `limite`: as mais recentes).
+    """
+    from psycopg2 import sql
+    from psycopg2.extras import RealDictCursor
+
+    if fmt not in FORMATOS:
+        raise ValueError(f"Formato inválido. Use {', '.join(FORMATOS)}.")
+    progresso = progresso or Progresso(tabela)
+    piso, teto, n = _faixa_ids(conn, tabela, apos_id, ate_id, limite, desc)
+    if teto is None:  # nada na faixa: arquivo vazio (ou anexo sem linhas)
+        return gravar_paginas(iter(()), tabela, fmt, caminho, apos_id, progresso, anexar)
+
+    filtro = _filtro_id(piso - 1, teto)
+    ordem = sql.SQL("DESC" if desc else "ASC")
+    if base_formato(fmt) != "csv":
+        consulta = sql.SQL("SELECT * FROM {} WHERE {} ORDER BY id {}").format(sql.Identifier(tabela), filtro, ordem)
+        with conn.cursor(name=f"exportar_{tabela}", cursor_factory=RealDictCursor) as cur:
+            cur.itersize = tamanho_pagina
+            cur.execute(consulta)
+            blocos = iter(lambda: cur.fetchmany(tamanho_pagina), [])
+            res = gravar_paginas(blocos, tabela, fmt, caminho, apos_id, progresso, anexar)
+        conn.commit()  # fecha a transação do cursor nomeado
+        return res
+
+    with _abrir_saida(caminho, fmt, anexar) as (f, colunas):
+        lista = sql.SQL(", ").join(map(sql.Identifier, colunas)) if colunas else sql.SQL("*")
+        copia = sql.SQL("COPY (SELECT {} FROM {} WHERE {} ORDER BY id {}) TO STDOUT WITH (FORMAT csv, HEADER {})").format(
+            lista, sql.Identifier(tabela), filtro, ordem, sql.SQL("false" if colunas else "true")
+        )
+        with conn.cursor() as cur:
+            cur.copy_expert(copia.as_string(conn), f, size=1 << 20)
+        progresso.somar(n)
+    return ResultadoExportacao(tabela, caminho, progresso.linhas, progresso.segundos(), teto)
+
+
+def restaurar_postgres(conn, tabela: str, caminho: Path, truncar: bool = False) -> int:
+    """
+    Carrega um CSV (.csv, .csv.gz ou .csv.zst) com cabeçalho, como o de uma exportação, via `COPY FROM STDIN`,
+    numa transação só. Os ids do arquivo são mantidos e a sequência de `id` é
+    ajustada para depois do maior. Retorna as linhas carregadas.
+
+    Tabelas de agendamento com o gatilho de capacidade (sql_capacidade): o
+    gatilho fica desligado durante a carga (não recusa o backup nem conta
+    as linhas duas vezes) e a parcela da tabela em ocupacao_turno é refeita
+    na mesma transação. O ALTER TABLE trava a tabela até o COMMIT, então
+    nenhuma inserção escapa da contagem enquanto isso.
+    """
+    from psycopg2 import sql
+
+    comp = {".gz": "gz", ".zst": "zst"}.get(caminho.suffix)
+    colunas = cabecalho_csv(caminho, f"csv.{comp}" if comp else "csv")
+    if not colunas:
+        raise ValueError(f"{caminho}: CSV vazio ou sem cabeçalho.")
+    alvo = sql.Identifier(tabela)
+    try:
+        with conn.cursor() as cur:
+            gatilho = _gatilho_vaga(cur, tabela)
+            if gatilho:
+                cur.execute(sql.SQL("ALTER TABLE {} DISABLE TRIGGER {}").format(alvo, sql.Identifier(gatilho)))
+                cur.execute(sql_parcela_ocupacao(tabela, -1))
+            if truncar:
+                cur.execute(sql.SQL("TRUNCATE {}").format(alvo))
+            copia = sql.SQL("COPY {} ({}) FROM STDIN WITH (FORMAT csv, HEADER true)").format(
+                alvo, sql.SQL(", ").join(map(sql.Identifier, colunas))
+            )
+            with abrir_texto(caminho, "r", comp) as f:
+                cur.copy_expert(copia.as_string(conn), f, size=1 << 20)
+            linhas = cur.rowcount
+            if gatilho:
+                cur.execute(sql_parcela_ocupacao(tabela, 1))
+                cur.execute(sql.SQL("ALTER TABLE {} ENABLE TRIGGER {}").format(alvo, sql.Identifier(gatilho)))
+            if "id" in colunas:
+                cur.execute(
+                    sql.SQL("SELECT setval(pg_get_serial_sequence({}, 'id'), GREATEST((SELECT max(id) FROM {}), 1))").format(
+                        sql.Literal(alvo.as_string(conn)), alvo
+                    )
+                )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return linhas
+
+
+def _gatilho_vaga(cur, tabela: str) -> Optional[str]:
+    """Nome do gatilho de capacidade de `tabela`, se estiver instalado."""
+    if tabela not in ESQUEMAS:
+        return None
+    nome = GATILHO_VAGA.format(tabela)
+    cur.execute(
+        "SELECT 1 FROM pg_trigger WHERE tgrelid = to_regclass(%s) AND tgname = %s AND NOT tgisinternal",
+        (tabela, nome),
+    )
+    return nome if cur.fetchone() else None
+
+
+# ---------- Marcas d'água ----------
+ARQUIVO_MARCAS = ".marcas-exportacao.json"
+
+
+class MarcasDagua:
+    """
+    Estado da exportação incremental, num JSON na pasta de saída:
+        {"visitante.csv": {"tabela", "formato", "ultimo_id", "linhas", "em"}}
+    A chave é o nome do arquivo exportado: a marca vale para aquele arquivo.
+    Como os agendamentos só são inseridos (nunca alterados), o maior id basta.
+    Seguro entre threads; grava de forma atômica (arquivo temporário + replace).
+    """
+
+    def __init__(self, pasta: Path):
+        self.caminho = Path(pasta) / ARQUIVO_MARCAS
+        self._lock = threading.Lock()
+        try:
+            with open(self.caminho, encoding="utf-8") as f:
+                self._dados: Dict[str, Dict[str, Any]] = json.load(f)
+        except (OSError, ValueError):
+            self._dados = {}
+
+    def obter(self, arquivo: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            m = self._dados.get(arquivo)
+            return dict(m) if m else None
+
+    def gravar(self, arquivo: str, tabela: str, fmt: str, ultimo_id: Optional[int], linhas: int) -> None:
+        with self._lock:
+            self._dados[arquivo] = {
+                "tabela": tabela,
+                "formato": fmt,
+                "ultimo_id": ultimo_id,
+                "linhas": linhas,
+                "em": datetime.now().isoformat(timespec="seconds"),
+            }
+            self.caminho.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.caminho.with_name(self.caminho.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._dados, f, ensure_ascii=False, indent=2, sort_keys=True)
+            os.replace(tmp, self.caminho)
+
+
+class PlanoIncremental:
+    """Onde e a partir de que id exportar: arquivo de saída, `apos_id`, anexar ou não."""
+
+    def __init__(self, saida: Path, apos_id: Optional[int], anexar: bool, linhas_antes: int = 0):
+        self.saida = saida
+        self.apos_id = apos_id
+        self.anexar = anexar
+        self.linhas_antes = linhas_antes
+
+    @property
+    def modo(self) -> str:
+        if self.apos_id is None:
+            return "completo"
+        return "anexado" if self.anexar else "delta"
+
+    def registrar(self, marcas: MarcasDagua, destino: Path, tabela: str, fmt: str, res: ResultadoExportacao) -> None:
+        """Atualiza a marca de `destino`; um delta vazio é apagado."""
+        if self.modo == "delta" and res.linhas == 0:
+            try:
+                os.remove(self.saida)
+            except OSError:
+                pass
+        ultimo = res.ultimo_id if res.ultimo_id is not None else self.apos_id
+        marcas.gravar(destino.name, tabela, fmt, ultimo, self.linhas_antes + res.linhas)
+
+
+def planejar(destino: Path, tabela: str, fmt: str, marcas: MarcasDagua, incremental: bool, delta: bool) -> PlanoIncremental:
+    """
+    Sem marca (ou --full), exportação completa em `destino`. Com marca:
+    anexa ao próprio `destino` (CSV/JSONL) ou, com `delta`,
+    grava `<tabela>.delta-<marca>.<fmt>` ao lado (as linhas com id > marca).
+    JSON e parquet não aceitam anexo: sempre viram delta.
+    """
+    m = marcas.obter(destino.name) if incremental else None
+    if not m or m.get("formato") != fmt or m.get("ultimo_id") is None or not destino.exists():
+        return PlanoIncremental(destino, None, False)
+    if delta or not anexavel(fmt):
+        saida = destino.with_name(f"{tabela}.delta-{m['ultimo_id']}.{fmt}")
+        return PlanoIncremental(saida, m["ultimo_id"], False, int(m.get("linhas") or 0))
+    return PlanoIncremental(destino, m["ultimo_id"], True, int(m.get("linhas") or 0))
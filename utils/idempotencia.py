@@ -0,0 +1,162 @@
+# utils/idempotencia.py
+"""
+Registro de idempotência para envios de formulário.
+
+Guarda, por chave, o resultado de um envio já processado (ou o fato de
+que ele está em andamento), com expiração e limite de tamanho. Serve
+para dois casos:
+  - token do formulário: o mesmo POST reenviado devolve o resultado original;
+  - hash do conteúdo (email, data, turno, tipo): evita duplicatas acidentais
+    dentro de uma janela de tempo.
+Fica num SQLite local (WAL) para ser compartilhado pelos workers do gunicorn.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotencia (
+    chave TEXT PRIMARY KEY,
+    resultado TEXT,
+    expira REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_idempotencia_expira ON idempotencia (expira);
+"""
+
+
+def hash_conteudo(tipo: str, email: str, data: str, turno: str) -> str:
+    bruto = "|".join([tipo, (email or "").strip().lower(), data or "", turno or ""])
+    return hashlib.sha256(bruto.encode("utf-8")).hexdigest()
+
+
+class RegistroIdempotencia:
+    def __init__(self, caminho: str, max_itens: int = 10000):
+        self.caminho = str(caminho)
+        self.max_itens = max_itens
+        self._escritas = 0
+
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._conn()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.caminho, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def reservar(self, chave: str, ttl: float) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """
+        Tenta reservar `chave` por `ttl` segundos.
+        Retorna (True, None) se a chave é nova (siga com o envio), ou
+        (False, resultado) se já existe: resultado None = ainda em andamento.
+        """
+        agora = time.time()
+        with closing(self._conn()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT resultado, expira FROM idempotencia WHERE chave = ?", (chave,)
+            ).fetchone()
+            if row and row[1] > agora:
+                conn.execute("COMMIT")
+                return False, json.loads(row[0]) if row[0] else None
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotencia (chave, resultado, expira) VALUES (?, NULL, ?)",
+                (chave, agora + ttl),
+            )
+            conn.execute("COMMIT")
+        self._limpar_periodicamente()
+        return True, None
+
+    def concluir(self, chave: str, resultado: Dict[str, Any]) -> None:
+        with closing(self._conn()) as conn:
+            conn.execute(
+                "UPDATE idempotencia SET resultado = ? WHERE chave = ?",
+                (json.dumps(resultado, ensure_ascii=False), chave),
+            )
+
+    def liberar(self, chave: str) -> None:
+        """Desfaz a reserva (ex.: envio falhou e pode ser tentado de novo)."""
+        with closing(self._conn()) as conn:
+            conn.execute("DELETE FROM idempotencia WHERE chave = ?", (chave,))
+
+    def _limpar_periodicamente(self) -> None:
+        self._escritas += 1
+        if self._escritas % 100:
+            return
+        with closing(self._conn()) as conn:
+            conn.execute("DELETE FROM idempotencia WHERE expira <= ?", (time.time(),))
+            # mantém no máximo max_itens (descarta os que expiram primeiro)
+            conn.execute(
+                "DELETE FROM idempotencia WHERE chave IN ("
+                " SELECT chave FROM idempotencia ORDER BY expira DESC LIMIT -1 OFFSET ?)",
+                (self.max_itens,),
+            )
+
+
+EM_ANDAMENTO = {"mensagem": "Seu agendamento já está sendo processado.", "categoria": "info"}
+DUPLICADO = {"mensagem": "Este agendamento já foi recebido.", "categoria": "info"}
+
+
+class EnvioIdempotente:
+    """
+    Acompanha um POST do formulário pelas duas chaves (token e conteúdo).
+    Os métodos reservar_* retornam o resultado a devolver ao usuário quando
+    o envio é repetido, ou None para seguir com a gravação. Falhas no
+    registro local não bloqueiam o agendamento: só desligam a proteção.
+    """
+
+    def __init__(self, registro: Optional[RegistroIdempotencia], token: Optional[str], ttl_token: float, janela: float):
+        self.registro = registro
+        self.token = (token or "").strip()[:64]
+        self.ttl_token = ttl_token
+        self.janela = janela
+        self._chaves = []
+
+    def _reservar(self, chave: str, ttl: float, se_concluido: Optional[Dict[str, Any]]):
+        if self.registro is None:
+            return None
+        try:
+            novo, anterior = self.registro.reservar(chave, ttl)
+        except Exception as e:
+            print("Erro idempotência (reservar):", e)
+            return None
+        if novo:
+            self._chaves.append(chave)
+            return None
+        if anterior is None:
+            return EM_ANDAMENTO
+        return se_concluido or anterior
+
+    def reservar_token(self) -> Optional[Dict[str, Any]]:
+        if not self.token:
+            return None
+        return self._reservar("token:" + self.token, self.ttl_token, None)
+
+    def reservar_conteudo(self, tipo: str, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        chave = "conteudo:" + hash_conteudo(tipo, payload.get("email"), payload.get("data"), payload.get("turno"))
+        resultado = self._reservar(chave, self.janela, DUPLICADO)
+        if resultado is not None:
+            # o token deste POST passa a responder igual
+            self.concluir(resultado)
+        return resultado
+
+    def concluir(self, resultado: Dict[str, Any]) -> None:
+        for chave in self._chaves:
+            try:
+                self.registro.concluir(chave, resultado)
+            except Exception as e:
+                print("Erro idempotência (concluir):", e)
+        self._chaves = []
+
+    def liberar(self) -> None:
+        for chave in self._chaves:
+            try:
+                self.registro.liberar(chave)
+            except Exception as e:
+                print("Erro idempotência (liberar):", e)
+        self._chaves = []
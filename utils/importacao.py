@@ -0,0 +1,236 @@
+# utils/importacao.py
+"""
+Importação em lote de agendamentos (CSV ou XLSX).
+
+O arquivo é lido linha a linha (nunca inteiro em memória), cada linha é
+validada pelo esquema da tabela (models/esquema.py, que usa as funções
+de utils/validacoes) e as linhas válidas são inseridas em lotes
+multi-linha. Erros são reportados por número de linha.
+
+Com o índice de ocupação (utils/capacidade.OcupacaoIndex), cada linha
+reserva a sua vaga como o formulário faz: linhas de turnos lotados são
+recusadas e reportadas, e as reservas só viram ocupação se o lote
+entrar. Se o gatilho do banco recusar um lote (outro worker lotou o
+turno), as linhas desse lote são reenviadas uma a uma.
+"""
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+
+from models.esquema import ESQUEMAS
+from utils.capacidade import OcupacaoIndex, TurnoLotado
+
+TAMANHO_LOTE = 500
+MAX_ERROS_GUARDADOS = 1000
+
+
+class ResultadoImportacao:
+    """Totais da importação e os primeiros erros (linha, mensagem)."""
+
+    def __init__(self):
+        self.lidas = 0
+        self.inseridas = 0
+        self.invalidas = 0
+        self.lotadas = 0  # válidas, mas recusadas por falta de vaga no turno
+        self.erros: List[Tuple[int, str]] = []
+
+    def erro(self, linha: int, msg: str) -> None:
+        self.invalidas += 1
+        self._guardar(linha, msg)
+
+    def lotada(self, linha: int, e: TurnoLotado) -> None:
+        self.lotadas += 1
+        self._guardar(linha, str(e))
+
+    def _guardar(self, linha: int, msg: str) -> None:
+        if len(self.erros) < MAX_ERROS_GUARDADOS:
+            self.erros.append((linha, msg))
+
+    @property
+    def recusadas(self) -> int:
+        return self.invalidas + self.lotadas
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "lidas": self.lidas,
+            "inseridas": self.inseridas,
+            "invalidas": self.invalidas,
+            "lotadas": self.lotadas,
+            "erros": [{"linha": l, "erro": m} for l, m in self.erros],
+        }
+
+
+def _mapa_cabecalho(tipo: str) -> Dict[str, str]:
+    """Aceita o nome da coluna, o rótulo do desktop ou um alias."""
+    mapa = {}
+    for c in ESQUEMAS[tipo].campos:
+        for nome in (c.nome, c.rotulo) + c.aliases:
+            mapa[nome.strip().lower()] = c.nome
+    return mapa
+
+
+def _celula(v: Any) -> Any:
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    if isinstance(v, float) and v.is_integer():
+        return str(int(v))
+    return str(v).strip()
+
+
+def _linhas_csv(stream: IO[bytes]) -> Iterator[List[Any]]:
+    texto = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    primeira = texto.readline()
+    delim = ";" if primeira.count(";") > primeira.count(",") else ","
+    yield next(csv.reader([primeira], delimiter=delim), [])
+    for row in csv.reader(texto, delimiter=delim):
+        yield row
+
+
+def _linhas_xlsx(stream: IO[bytes]) -> Iterator[List[Any]]:
+    # openpyxl é opcional e pesado: só é importado quando chega um .xlsx
+    try:
+        import openpyxl
+    except Exception:
+        raise RuntimeError("openpyxl não instalado (necessário para importar .xlsx).")
+    wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        for row in wb.active.iter_rows(values_only=True):
+            yield [_celula(v) for v in row]
+    finally:
+        wb.close()
+
+
+def ler_registros(stream: IO[bytes], nome_arquivo: str, tipo: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Gera (número da linha no arquivo, dict campo->valor) a partir de um
+    arquivo .csv ou .xlsx aberto em modo binário. A linha 1 é o cabeçalho.
+    """
+    nome = (nome_arquivo or "").lower()
+    linhas = _linhas_xlsx(stream) if nome.endswith((".xlsx", ".xlsm")) else _linhas_csv(stream)
+
+    mapa = _mapa_cabecalho(tipo)
+    cabecalho = next(linhas, None)
+    if not cabecalho:
+        return
+    campos = [mapa.get(str(h or "").strip().lower()) for h in cabecalho]
+
+    for n, row in enumerate(linhas, start=2):
+        if not any(str(v).strip() for v in row if v is not None):
+            continue  # linha em branco
+        yield n, {c: v for c, v in zip(campos, row) if c}
+
+
+def importar(
+    tipo: str,
+    registros: Iterator[Tuple[int, Dict[str, Any]]],
+    inserir_lote: Optional[Callable[[str, List[Dict[str, Any]]], List[Dict[str, Any]]]],
+    tamanho_lote: int = TAMANHO_LOTE,
+    ocupacao: Optional[OcupacaoIndex] = None,
+) -> ResultadoImportacao:
+    """
+    Valida cada registro e insere os válidos em lotes de `tamanho_lote`.
+    Com inserir_lote=None apenas valida (simulação). Com `ocupacao`, cada
+    linha reserva a sua vaga no índice (na simulação, só conta localmente).
+    """
+    esquema = ESQUEMAS[tipo]
+    res = ResultadoImportacao()
+    lote: List[Dict[str, Any]] = []
+    linhas_lote: List[int] = []
+    simuladas: Dict[Tuple[str, str], int] = {}  # vagas "reservadas" na simulação
+
+    def vaga(p: Dict[str, Any]) -> Tuple[Any, Any, int]:
+        return p["data"], p["turno"], esquema.qtd(p)
+
+    def reservar(n: int, p: Dict[str, Any]) -> bool:
+        if ocupacao is None:
+            return True
+        data, turno, qtd = vaga(p)
+        if inserir_lote is None:
+            k = (data, turno)
+            ok = ocupacao.cabe(data, turno, simuladas.get(k, 0) + qtd)
+            if ok:
+                simuladas[k] = simuladas.get(k, 0) + qtd
+        else:
+            ok = ocupacao.reservar(data, turno, qtd)
+        if not ok:
+            res.lotada(n, TurnoLotado(max(ocupacao.restante(data, turno) - simuladas.get((data, turno), 0), 0)))
+        return ok
+
+    def encerrar(p: Dict[str, Any], inserida: bool) -> None:
+        """Confirma ou devolve a reserva da linha."""
+        if ocupacao is not None:
+            (ocupacao.confirmar if inserida else ocupacao.liberar)(*vaga(p))
+
+    def um_a_um():
+        # o banco recusou o lote por lotação: descobre quais linhas cabem
+        for n, p in zip(linhas_lote, lote):
+            try:
+                inserir_lote(tipo, [p])
+            except TurnoLotado as e:
+                encerrar(p, False)
+                if ocupacao is not None and e.ocupado is not None:
+                    ocupacao.ajustar(p["data"], p["turno"], e.ocupado)
+                    e.restante = ocupacao.restante(p["data"], p["turno"])
+                res.lotada(n, e)
+            except Exception as e:
+                encerrar(p, False)
+                res.erro(n, f"falha ao inserir: {e}")
+            else:
+                encerrar(p, True)
+                res.inseridas += 1
+
+    def enviar():
+        if not lote:
+            return
+        if inserir_lote is None:
+            res.inseridas += len(lote)
+        else:
+            try:
+                inserir_lote(tipo, lote)
+            except TurnoLotado:
+                um_a_um()
+            except Exception as e:
+                for n, p in zip(linhas_lote, lote):
+                    encerrar(p, False)
+                    res.erro(n, f"falha ao inserir lote: {e}")
+            else:
+                for p in lote:
+                    encerrar(p, True)
+                res.inseridas += len(lote)
+        lote.clear()
+        linhas_lote.clear()
+
+    def validar(brutos: List[Tuple[int, Dict[str, Any]]]):
+        # valida o bloco inteiro numa passada (utils/validacoes.validar_lote)
+        preparados = esquema.preparar_lote([reg for _, reg in brutos])
+        for (n, _), (payload, erro) in zip(brutos, preparados):
+            if erro:
+                res.erro(n, erro)
+                continue
+            if not reservar(n, payload):
+                continue
+            lote.append(payload)
+            linhas_lote.append(n)
+            if len(lote) >= tamanho_lote:
+                enviar()
+        brutos.clear()
+
+    brutos: List[Tuple[int, Dict[str, Any]]] = []
+    try:
+        for item in registros:
+            res.lidas += 1
+            brutos.append(item)
+            if len(brutos) >= tamanho_lote:
+                validar(brutos)
+        validar(brutos)
+        enviar()
+    except BaseException:
+        for p in lote:  # arquivo ilegível no meio: devolve as vagas ainda não enviadas
+            encerrar(p, False)
+        raise
+    return res
@@ -0,0 +1,114 @@
+# utils/metricas.py
+"""
+Métricas no formato Prometheus (exportadas em /metrics).
+
+Usa prometheus_client quando instalado. Com vários workers do gunicorn,
+defina PROMETHEUS_MULTIPROC_DIR (o gunicorn.conf.py já faz isso) para que
+cada worker grave seus valores em arquivos e o /metrics some todos.
+Sem prometheus_client, as métricas viram no-ops e /metrics fica vazio.
+"""
+import os
+import time
+from contextlib import contextmanager
+from typing import Iterator, Tuple
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST,
+        CollectorRegistry,
+        Counter,
+        Gauge,
+        Histogram,
+        generate_latest,
+        multiprocess,
+    )
+except Exception:
+    Counter = Gauge = Histogram = None  # type: ignore
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _NoOp:
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, *args):
+        pass
+
+    def inc(self, *args):
+        pass
+
+    def dec(self, *args):
+        pass
+
+    def set(self, *args):
+        pass
+
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+if Histogram is not None:
+    HTTP_LATENCIA = Histogram(
+        "fcja_http_request_duration_seconds",
+        "Latência das requisições HTTP por rota.",
+        ["rota", "metodo", "status"],
+        buckets=_BUCKETS,
+    )
+    HTTP_EM_ANDAMENTO = Gauge(
+        "fcja_http_requests_in_flight",
+        "Requisições HTTP em andamento.",
+        multiprocess_mode="livesum",
+    )
+    HTTP_ERROS = Counter(
+        "fcja_http_exceptions_total",
+        "Requisições que terminaram em exceção não tratada.",
+        ["rota"],
+    )
+    SUPABASE_LATENCIA = Histogram(
+        "fcja_supabase_duration_seconds",
+        "Latência das chamadas ao Supabase por tabela e operação.",
+        ["tabela", "operacao"],
+        buckets=_BUCKETS,
+    )
+    SUPABASE_ERROS = Counter(
+        "fcja_supabase_errors_total",
+        "Chamadas ao Supabase que falharam, por tabela e operação.",
+        ["tabela", "operacao"],
+    )
+    SPOOL_PENDENTES = Gauge(
+        "fcja_spool_pending",
+        "Envios pendentes no spool local.",
+        multiprocess_mode="max",
+    )
+    CIRCUITO_ABERTO = Gauge(
+        "fcja_circuit_open",
+        "1 se o disjuntor do Supabase está aberto (em algum worker).",
+        multiprocess_mode="max",
+    )
+else:
+    HTTP_LATENCIA = HTTP_EM_ANDAMENTO = HTTP_ERROS = _NoOp()
+    SUPABASE_LATENCIA = SUPABASE_ERROS = _NoOp()
+    SPOOL_PENDENTES = CIRCUITO_ABERTO = _NoOp()
+
+
+@contextmanager
+def medir_supabase(tabela: str, operacao: str) -> Iterator[None]:
+    """Cronometra uma chamada ao Supabase e conta as falhas."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        SUPABASE_ERROS.labels(tabela, operacao).inc()
+        raise
+    finally:
+        SUPABASE_LATENCIA.labels(tabela, operacao).observe(time.perf_counter() - t0)
+
+
+def exportar() -> Tuple[bytes, str]:
+    """Corpo e content-type do /metrics (somando todos os workers, se multiprocess)."""
+    if Histogram is None:
+        return b"", CONTENT_TYPE_LATEST
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -0,0 +1,66 @@
+# utils/paginacao.py
+"""
+Paginação por cursor (keyset) sobre o PostgREST.
+
+Em vez de OFFSET, cada página continua a partir da chave do último
+registro da página anterior: `id` ou o par `(data, id)`. O cursor é
+opaco para o cliente (JSON em base64 url-safe).
+"""
+import base64
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# ordem -> (colunas da chave, decrescente?)
+ORDENS: Dict[str, Tuple[Tuple[str, ...], bool]] = {
+    "id": (("id",), False),
+    "-id": (("id",), True),
+    "data": (("data", "id"), False),
+    "-data": (("data", "id"), True),
+}
+
+_RE_DATA = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def codificar_cursor(ordem: str, chave: List[Any]) -> str:
+    bruto = json.dumps({"o": ordem, "k": chave}, separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(bruto.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(token: str, ordem: str) -> List[Any]:
+    """Retorna a chave do cursor. Levanta ValueError se inválido ou de outra ordem."""
+    try:
+        pad = "=" * (-len(token) % 4)
+        d = json.loads(base64.urlsafe_b64decode(token + pad).decode("utf-8"))
+        chave = d["k"]
+    except Exception:
+        raise ValueError("Cursor inválido")
+    if d.get("o") != ordem or not isinstance(chave, list) or len(chave) != len(ORDENS[ordem][0]):
+        raise ValueError("Cursor não corresponde à ordenação pedida")
+    return chave
+
+
+def aplicar_keyset(q, ordem: str, cursor: Optional[str]):
+    """Aplica filtro de continuação e ordenação à query do supabase-py."""
+    if ordem not in ORDENS:
+        raise ValueError(f"Ordenação inválida: {ordem}")
+    cols, desc = ORDENS[ordem]
+    op = "lt" if desc else "gt"
+
+    if cursor:
+        chave = decodificar_cursor(cursor, ordem)
+        if len(cols) == 1:
+            q = getattr(q, op)("id", int(chave[0]))
+        else:
+            d, i = str(chave[0]), int(chave[1])
+            if not _RE_DATA.match(d):
+                raise ValueError("Cursor inválido")
+            q = q.or_(f"data.{op}.{d},and(data.eq.{d},id.{op}.{i})")
+
+    for c in cols:
+        q = q.order(c, desc=desc)
+    return q
+
+
+def chave_registro(ordem: str, registro: Dict[str, Any]) -> List[Any]:
+    return [registro.get(c) for c in ORDENS[ordem][0]]
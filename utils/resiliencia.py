@@ -0,0 +1,227 @@
+# utils/resiliencia.py
+"""
+Resiliência para chamadas ao banco remoto: prazo total por chamada,
+novas tentativas com jitter (só para operações idempotentes) e um
+disjuntor (circuit breaker) que falha rápido quando a taxa de erro
+passa do limite, em vez de prender threads esperando um backend fora.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+
+class CircuitoAberto(Exception):
+    """O disjuntor está aberto: a chamada nem foi feita."""
+
+
+# status HTTP que indicam backend sobrecarregado/fora, além dos 5xx
+_STATUS_TRANSITORIOS = frozenset({408, 429})
+# SQLSTATE do Postgres (APIError.code) transitórios: conexão (08), recursos
+# (53), statement timeout, serialização e deadlock
+_SQLSTATE_TRANSITORIOS = ("08", "53", "57014", "57P", "40001", "40P01")
+# erros do nosso código: não são do backend, nem sucesso nem falha dele
+_ERROS_DE_PROGRAMA = (TypeError, AttributeError, NameError, KeyError, IndexError, AssertionError, ValueError)
+
+
+def _status_http(e: BaseException) -> "int | None":
+    """Status HTTP do erro, se houver (httpx, ou APIError de resposta não-JSON, que traz o status em `code`)."""
+    resp = getattr(e, "response", None)
+    for v in (getattr(resp, "status_code", None), getattr(e, "status_code", None),
+              getattr(e, "status", None), getattr(e, "code", None)):
+        try:
+            v = int(v)
+        except (TypeError, ValueError):
+            continue
+        if 100 <= v <= 599:
+            return v
+    return None
+
+
+def erro_de_programa(e: BaseException) -> bool:
+    """TypeError, KeyError...: erro do chamador, não do backend (JSON inválido do gateway não conta)."""
+    return isinstance(e, _ERROS_DE_PROGRAMA) and not isinstance(e, json.JSONDecodeError)
+
+
+def erro_transitorio(e: BaseException) -> bool:
+    """
+    Rede/timeout, HTTP 5xx, 408 e 429 (inclusive páginas HTML de gateway,
+    que o postgrest embrulha num APIError) e SQLSTATE de conexão/recursos
+    são transitórios: vale repetir e contam como falha no disjuntor. Os
+    demais erros do PostgREST (coluna inválida, RLS, constraint...) são
+    definitivos, e erros de programa também não são do backend.
+    """
+    if isinstance(e, CircuitoAberto) or erro_de_programa(e):
+        return False
+    status = _status_http(e)
+    if status is not None:
+        return status >= 500 or status in _STATUS_TRANSITORIOS
+    if type(e).__name__ == "APIError":
+        return str(getattr(e, "code", "") or "").startswith(_SQLSTATE_TRANSITORIOS)
+    return True
+
+
+class Circuito:
+    """
+    fechado  -> chamadas passam; guarda o resultado das últimas `janela` chamadas
+    aberto   -> taxa de erro >= limiar: rejeita tudo por `tempo_aberto` segundos
+    meio-aberto -> deixa passar uma chamada de teste; sucesso fecha, falha reabre
+    """
+
+    def __init__(
+        self,
+        nome: str,
+        limiar_erro: float = 0.5,
+        janela: int = 20,
+        min_chamadas: int = 5,
+        tempo_aberto: float = 30.0,
+    ):
+        self.nome = nome
+        self.limiar_erro = limiar_erro
+        self.min_chamadas = min_chamadas
+        self.tempo_aberto = tempo_aberto
+
+        self._resultados: Deque[bool] = deque(maxlen=janela)
+        self._estado = "fechado"
+        self._aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+        self.rejeitadas = 0
+
+    def permitir(self) -> bool:
+        with self._lock:
+            if self._estado == "fechado":
+                return True
+            if self._estado == "aberto" and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+                self._estado = "meio-aberto"
+                self._teste_em_andamento = False
+            if self._estado == "meio-aberto" and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            self.rejeitadas += 1
+            return False
+
+    def sucesso(self) -> None:
+        with self._lock:
+            if self._estado != "fechado":
+                self._estado = "fechado"
+                self._resultados.clear()
+            self._teste_em_andamento = False
+            self._resultados.append(True)
+
+    def falha(self) -> None:
+        with self._lock:
+            self._teste_em_andamento = False
+            if self._estado == "meio-aberto":
+                self._abrir()
+                return
+            self._resultados.append(False)
+            n = len(self._resultados)
+            erros = n - sum(self._resultados)
+            if n >= self.min_chamadas and erros / n >= self.limiar_erro:
+                self._abrir()
+
+    def liberar_teste(self) -> None:
+        """A chamada terminou sem dizer nada sobre o backend: libera a vaga de teste do meio-aberto."""
+        with self._lock:
+            self._teste_em_andamento = False
+
+    def _abrir(self) -> None:
+        self._estado = "aberto"
+        self._aberto_em = time.monotonic()
+
+    def estado(self) -> Dict[str, Any]:
+        with self._lock:
+            n = len(self._resultados)
+            st: Dict[str, Any] = {
+                "nome": self.nome,
+                "estado": self._estado,
+                "taxa_erro": round((n - sum(self._resultados)) / n, 3) if n else 0.0,
+                "amostras": n,
+                "rejeitadas": self.rejeitadas,
+            }
+            if self._estado == "aberto":
+                st["reabre_em_s"] = max(round(self.tempo_aberto - (time.monotonic() - self._aberto_em), 1), 0)
+            return st
+
+
+def executar(
+    fn: Callable[[], Any],
+    circuito: Circuito,
+    idempotente: bool = False,
+    tentativas: int = 3,
+    prazo: float = 15.0,
+    espera_base: float = 0.2,
+    ao_falhar: Optional[Callable[[BaseException], None]] = None,
+) -> Any:
+    """
+    Executa `fn()` sob o disjuntor. Operações idempotentes são repetidas
+    (até `tentativas`, com backoff exponencial + jitter) enquanto houver
+    prazo. Levanta CircuitoAberto sem chamar `fn` se o disjuntor estiver aberto.
+    """
+    limite = time.monotonic() + prazo
+    max_tentativas = tentativas if idempotente else 1
+
+    for tentativa in range(1, max_tentativas + 1):
+        if not circuito.permitir():
+            raise CircuitoAberto(f"circuito '{circuito.nome}' aberto")
+        try:
+            r = fn()
+        except Exception as e:
+            if erro_de_programa(e):
+                circuito.liberar_teste()
+                raise  # não diz nada sobre o backend
+            if not erro_transitorio(e):
+                # backend respondeu: não conta como indisponibilidade
+                circuito.sucesso()
+                raise
+            circuito.falha()
+            if ao_falhar:
+                ao_falhar(e)
+            espera = espera_base * (2 ** (tentativa - 1)) * random.uniform(0.5, 1.5)
+            if tentativa >= max_tentativas or time.monotonic() + espera >= limite:
+                raise
+            time.sleep(espera)
+            continue
+        circuito.sucesso()
+        return r
+
+
+async def executar_async(
+    fn: Callable[[], Awaitable[Any]],
+    circuito: Circuito,
+    idempotente: bool = False,
+    tentativas: int = 3,
+    prazo: float = 15.0,
+    espera_base: float = 0.2,
+    ao_falhar: Optional[Callable[[BaseException], None]] = None,
+) -> Any:
+    """Versão assíncrona de executar(); aqui o prazo também cancela a chamada em curso."""
+    limite = time.monotonic() + prazo
+    max_tentativas = tentativas if idempotente else 1
+
+    for tentativa in range(1, max_tentativas + 1):
+        if not circuito.permitir():
+            raise CircuitoAberto(f"circuito '{circuito.nome}' aberto")
+        try:
+            r = await asyncio.wait_for(fn(), timeout=max(limite - time.monotonic(), 0.01))
+        except Exception as e:
+            if erro_de_programa(e):
+                circuito.liberar_teste()
+                raise
+            if not erro_transitorio(e):
+                circuito.sucesso()
+                raise
+            circuito.falha()
+            if ao_falhar:
+                ao_falhar(e)
+            espera = espera_base * (2 ** (tentativa - 1)) * random.uniform(0.5, 1.5)
+            if tentativa >= max_tentativas or time.monotonic() + espera >= limite:
+                raise
+            await asyncio.sleep(espera)
+            continue
+        circuito.sucesso()
+        return r
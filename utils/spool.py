@@ -0,0 +1,251 @@
+# utils/spool.py
+"""
+Spool local (SQLite em modo WAL) para gravação assíncrona (write-behind).
+
+`enfileirar()` grava o payload em disco e retorna na hora; uma thread
+em segundo plano envia os pendentes em lotes para o banco remoto,
+com novas tentativas e backoff exponencial. Cada envio tem um status:
+    pendente -> enviando -> enviado | erro
+Vários processos (workers do gunicorn) podem compartilhar o mesmo arquivo.
+
+Cada envio tem uma chave gerada aqui (coluna `chave_envio` no banco, com
+índice único; DDL em sql_chave_envio()). Um lote que estourou o timeout
+pode ter sido gravado mesmo assim: o reenvio, em lote ou linha a linha,
+é um upsert que ignora chaves já gravadas, e não duplica a linha.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Envio preso em 'enviando' por mais tempo que isso volta para a fila
+# (worker que morreu no meio do envio)
+_TIMEOUT_ENVIANDO = 300
+
+# coluna da chave de idempotência nas tabelas remotas
+COLUNA_CHAVE = "chave_envio"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS envios (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabela TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pendente',
+    tentativas INTEGER NOT NULL DEFAULT 0,
+    proxima_tentativa REAL NOT NULL DEFAULT 0,
+    erro TEXT,
+    remote_id INTEGER,
+    chave TEXT,
+    criado_em REAL NOT NULL,
+    atualizado_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_envios_fila ON envios (status, proxima_tentativa);
+"""
+
+
+class Spool:
+    """
+    Fila durável de inserções.
+
+    `enviar(tabela, payloads)` deve inserir a lista no banco remoto e
+    retornar as linhas inseridas, ou levantar exceção. Cada payload traz
+    a sua chave em COLUNA_CHAVE: `enviar` precisa ignorar as que o banco
+    já tem (upsert com on_conflict) e devolver a coluna nas linhas.
+    """
+
+    def __init__(
+        self,
+        caminho: str,
+        enviar: Callable[[str, List[Dict[str, Any]]], List[Dict[str, Any]]],
+        intervalo: float = 2.0,
+        lote: int = 50,
+        max_tentativas: int = 8,
+    ):
+        self.caminho = str(caminho)
+        self.enviar = enviar
+        self.intervalo = intervalo
+        self.lote = lote
+        self.max_tentativas = max_tentativas
+
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid: Optional[int] = None
+        self._acordar = threading.Event()
+        self._lock = threading.Lock()
+
+        Path(self.caminho).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._conn()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            colunas = {r["name"] for r in conn.execute("PRAGMA table_info(envios)")}
+            if "chave" not in colunas:  # spool criado antes da chave de idempotência
+                conn.execute("ALTER TABLE envios ADD COLUMN chave TEXT")
+                conn.execute("UPDATE envios SET chave = lower(hex(randomblob(16))) WHERE chave IS NULL")
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.caminho, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # -------------------------
+    # API
+    # -------------------------
+    def enfileirar(self, tabela: str, payload: Dict[str, Any]) -> int:
+        """Grava o payload no spool e retorna o id do envio."""
+        agora = time.time()
+        with closing(self._conn()) as conn:
+            cur = conn.execute(
+                "INSERT INTO envios (tabela, payload, chave, criado_em, atualizado_em) VALUES (?,?,?,?,?)",
+                (tabela, json.dumps(payload, ensure_ascii=False, default=str), uuid.uuid4().hex, agora, agora),
+            )
+            envio_id = int(cur.lastrowid)
+        self.iniciar()
+        self._acordar.set()
+        return envio_id
+
+    def status(self, envio_id: int) -> Optional[Dict[str, Any]]:
+        with closing(self._conn()) as conn:
+            row = conn.execute(
+                "SELECT id, tabela, status, tentativas, erro, remote_id, criado_em, atualizado_em "
+                "FROM envios WHERE id = ?",
+                (envio_id,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def pendentes(self) -> int:
+        with closing(self._conn()) as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM envios WHERE status IN ('pendente', 'enviando')"
+            ).fetchone()
+        return int(row[0])
+
+    def iniciar(self) -> None:
+        """Inicia a thread de envio (uma por processo; seguro após fork)."""
+        with self._lock:
+            pid = os.getpid()
+            if self._thread and self._thread.is_alive() and self._thread_pid == pid:
+                return
+            self._thread_pid = pid
+            self._thread = threading.Thread(target=self._loop, name="spool-flusher", daemon=True)
+            self._thread.start()
+
+    # -------------------------
+    # Envio em segundo plano
+    # -------------------------
+    def _loop(self) -> None:
+        while True:
+            try:
+                enviados = self.flush()
+            except Exception as e:
+                print("[spool] Erro no flush:", e)
+                enviados = 0
+            if not enviados:
+                self._acordar.wait(self.intervalo)
+                self._acordar.clear()
+
+    def _reservar(self) -> List[sqlite3.Row]:
+        """Marca até `lote` envios como 'enviando' e os retorna (atômico entre processos)."""
+        agora = time.time()
+        conn = self._conn()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "UPDATE envios SET status='pendente', atualizado_em=? "
+                "WHERE status='enviando' AND atualizado_em < ?",
+                (agora, agora - _TIMEOUT_ENVIANDO),
+            )
+            rows = conn.execute(
+                "SELECT id, tabela, payload, chave, tentativas FROM envios "
+                "WHERE status='pendente' AND proxima_tentativa <= ? "
+                "ORDER BY id LIMIT ?",
+                (agora, self.lote),
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE envios SET status='enviando', atualizado_em=? WHERE id=?",
+                    [(agora, r["id"]) for r in rows],
+                )
+            conn.execute("COMMIT")
+            return rows
+        except Exception:
+            # BEGIN IMMEDIATE que falhou (banco travado) não abriu transação:
+            # um ROLLBACK aqui levantaria outro erro e esconderia o original
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def flush(self) -> int:
+        """Envia um lote de pendentes. Retorna quantos foram enviados com sucesso."""
+        rows = self._reservar()
+        if not rows:
+            return 0
+
+        por_tabela: Dict[str, List[sqlite3.Row]] = {}
+        for r in rows:
+            por_tabela.setdefault(r["tabela"], []).append(r)
+
+        ok = 0
+        for tabela, grupo in por_tabela.items():
+            try:
+                inseridos = self.enviar(tabela, [_com_chave(r) for r in grupo])
+                self._marcar_enviados(grupo, inseridos)
+                ok += len(grupo)
+            except Exception as e:
+                if len(grupo) == 1:
+                    self._marcar_falha(grupo[0], e)
+                    continue
+                # lote falhou: tenta um a um para isolar o registro problemático
+                for r in grupo:
+                    try:
+                        inseridos = self.enviar(tabela, [_com_chave(r)])
+                        self._marcar_enviados([r], inseridos)
+                        ok += 1
+                    except Exception as e2:
+                        self._marcar_falha(r, e2)
+        return ok
+
+    def _marcar_enviados(self, grupo: List[sqlite3.Row], inseridos: List[Dict[str, Any]]) -> None:
+        agora = time.time()
+        # linhas já gravadas numa tentativa anterior não voltam: sem remote_id
+        ids = {d.get(COLUNA_CHAVE): d.get("id") for d in (inseridos or [])}
+        params = [(ids.get(r["chave"]), agora, r["id"]) for r in grupo]
+        with closing(self._conn()) as conn:
+            conn.executemany(
+                "UPDATE envios SET status='enviado', erro=NULL, remote_id=?, atualizado_em=? WHERE id=?",
+                params,
+            )
+
+    def _marcar_falha(self, r: sqlite3.Row, erro: Exception) -> None:
+        agora = time.time()
+        tentativas = int(r["tentativas"]) + 1
+        status = "erro" if tentativas >= self.max_tentativas else "pendente"
+        espera = min(2 ** tentativas, 300)
+        print(f"[spool] Falha ao enviar envio {r['id']} ({r['tabela']}), tentativa {tentativas}:", erro)
+        with closing(self._conn()) as conn:
+            conn.execute(
+                "UPDATE envios SET status=?, tentativas=?, proxima_tentativa=?, erro=?, atualizado_em=? "
+                "WHERE id=?",
+                (status, tentativas, agora + espera, str(erro)[:500], agora, r["id"]),
+            )
+
+
+def _com_chave(r: sqlite3.Row) -> Dict[str, Any]:
+    payload = json.loads(r["payload"])
+    payload[COLUNA_CHAVE] = r["chave"]
+    return payload
+
+
+def sql_chave_envio(tabelas: List[str]) -> str:
+    """DDL (Postgres) da coluna de idempotência do spool, com índice único, nas tabelas."""
+    return "".join(
+        f"ALTER TABLE {t} ADD COLUMN IF NOT EXISTS {COLUNA_CHAVE} text;\n"
+        f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{t}_{COLUNA_CHAVE} ON {t} ({COLUNA_CHAVE});\n"
+        for t in tabelas
+    )
@@ -1,40 +1,113 @@
+import os
 import re
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+# Regras da semana, feriados e fechamentos: utils/calendario.py
+from utils.calendario import get_calendario
 
 # Formato padrão das datas (YYYY-MM-DD, vindo do input type="date")
 DATE_FMT = "%Y-%m-%d"
 
-def _parse(s: str):
-    """Converte string em datetime.date no formato padrão."""
-    return datetime.strptime(s, DATE_FMT)
+# Padrões compilados uma vez (antes eram recompilados a cada chamada)
+_RE_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+_RE_TELEFONE = re.compile(r'''
+    ^(?:\+?55[\s-]*)?                # +55 ou 55 (opcional)
+    (?:\(?\d{2}\)?[\s-]*)?           # DDD opcional
+    (?:\d{4,5}[-\s]?\d{4})$          # número (8 ou 9 dígitos)
+''', re.VERBOSE)
+_RE_NAO_DIGITO = re.compile(r"\D")
+_RE_ISO = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_RE_BR = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_RE_MES = re.compile(r"(\d{4})-(\d{1,2})")
+
+# ---------- Datas ----------
+@lru_cache(maxsize=8192)
+def _parse_str(s: str) -> Optional[date]:
+    m = _RE_ISO.fullmatch(s)
+    if m:
+        a, mes, d = m.groups()
+    else:
+        m = _RE_BR.fullmatch(s)
+        if not m:
+            return None
+        d, mes, a = m.groups()
+    try:
+        return date(int(a), int(mes), int(d))
+    except ValueError:
+        return None
+
+
+def parse_data(v: Any) -> Optional[date]:
+    """
+    Aceita date/datetime, 'AAAA-MM-DD' ou 'DD/MM/AAAA'; retorna date ou None.
+    Strings são memorizadas: num lote, a mesma data é convertida uma vez só.
+    """
+    if isinstance(v, datetime):
+        return v.date()
+    if isinstance(v, date):
+        return v
+    if not isinstance(v, str):
+        return None
+    return _parse_str(v.strip())
+
+
+def data_iso(v: Any) -> Optional[str]:
+    d = parse_data(v)
+    return d.isoformat() if d else None
+
+
+def parse_mes(s: str) -> Optional[tuple]:
+    """'AAAA-MM' -> (ano, mes), ou None se inválido."""
+    m = _RE_MES.fullmatch((s or "").strip())
+    if not m:
+        return None
+    ano, mes = int(m.group(1)), int(m.group(2))
+    if not (2000 <= ano <= 2100 and 1 <= mes <= 12):
+        return None
+    return ano, mes
 
 # ---------- Validações de data ----------
+# até quantos anos à frente se aceita agendar (datas passadas nunca)
+ANOS_A_FRENTE = int(os.getenv("AGENDA_ANOS_A_FRENTE", "2"))
+
+
+def janela_agendamento(hoje: Optional[date] = None) -> tuple:
+    """(primeiro, último) dia agendável: de hoje até ANOS_A_FRENTE anos depois."""
+    hoje = hoje or date.today()
+    try:
+        fim = hoje.replace(year=hoje.year + ANOS_A_FRENTE)
+    except ValueError:  # 29/02 -> 28/02
+        fim = hoje.replace(year=hoje.year + ANOS_A_FRENTE, day=28)
+    return hoje, fim
+
+
+def data_agendavel(d: date, hoje: Optional[date] = None) -> bool:
+    """A data está na janela de agendamento? (checado antes de consultar o calendário)"""
+    ini, fim = janela_agendamento(hoje)
+    return ini <= d <= fim
+
 def validar_data_visita(s: str) -> bool:
     """
     Visitas: terça a domingo (09:00 - 16:00).
-    Segunda-feira é fechado.
+    Segunda-feira é fechado, assim como feriados e fechamentos do calendário.
     """
-    try:
-        d = _parse(s)
-        return d.weekday() in [1, 2, 3, 4, 5, 6]  # terça a domingo
-    except Exception:
-        return False
+    d = parse_data(s)
+    return d is not None and get_calendario().aberto("visita", d)
 
 def validar_data_pesquisa(s: str) -> bool:
     """
     Pesquisas: segunda a sexta (09:00 - 16:00).
-    Sábado e domingo não funcionam.
+    Sábado e domingo não funcionam, nem feriados e fechamentos do calendário.
     """
-    try:
-        d = _parse(s)
-        return d.weekday() in [0, 1, 2, 3, 4]  # segunda a sexta
-    except Exception:
-        return False
+    d = parse_data(s)
+    return d is not None and get_calendario().aberto("pesquisa", d)
 
 # ---------- Validações de contato ----------
 def validar_email(e: str) -> bool:
     """Valida formato de e-mail simples."""
-    return re.fullmatch(r"[^@\s]+@[^@\s]+\.[^@\s]+", e or "") is not None
+    return _RE_EMAIL.fullmatch(e or "") is not None
 
 def validar_telefone(t: str) -> bool:
     """
@@ -56,28 +129,114 @@ def validar_telefone(t: str) -> bool:
         return False
 
     s = t.strip()
-
-    pattern = re.compile(r'''
-        ^(?:\+?55[\s-]*)?                # +55 ou 55 (opcional)
-        (?:\(?\d{2}\)?[\s-]*)?           # DDD opcional
-        (?:\d{4,5}[-\s]?\d{4})$          # número (8 ou 9 dígitos)
-    ''', re.VERBOSE)
-
-    if pattern.match(s):
+    if _RE_TELEFONE.match(s):
         return True
 
     # fallback: só números (8 a 11 dígitos)
-    digits = re.sub(r'\D', '', s)
+    digits = _RE_NAO_DIGITO.sub('', s)
     return 8 <= len(digits) <= 11
 
 # ---------- Normalização ----------
+_TURNOS = {"manha": "manhã", "manhã": "manhã", "tarde": "tarde"}
+
 def normalizar_turno(turno: str) -> str | None:
     """
     Normaliza turno: somente manhã ou tarde.
     """
-    t = (turno or "").strip().lower()
-    if t in {"manha", "manhã"}:
-        return "manhã"
-    if t == "tarde":
-        return "tarde"
-    return None
+    return _TURNOS.get((turno or "").strip().lower())
+
+# ---------- Validação em lote ----------
+# Códigos nas máscaras de erro (0 = ok)
+ERRO = 1
+DATA_FECHADA = 2
+FORA_DA_JANELA = 3
+
+
+def _texto(v: Any) -> str:
+    return v if isinstance(v, str) else ("" if v is None else str(v))
+
+
+class ResultadoLote:
+    """
+    Resultado de validar_lote(): uma máscara por campo (bytearray, um byte
+    por registro; 0 = ok, ERRO, DATA_FECHADA ou FORA_DA_JANELA) e as colunas normalizadas
+    de data (ISO) e turno.
+    """
+    __slots__ = ("n", "erros", "data", "turno")
+
+    def __init__(self, n: int, erros: Dict[str, bytearray], data: List[Optional[str]], turno: List[Optional[str]]):
+        self.n = n
+        self.erros = erros
+        self.data = data
+        self.turno = turno
+
+    def validos(self) -> bytearray:
+        """Máscara combinada: 1 = registro válido em todos os campos."""
+        m = bytearray(b"\x01") * self.n
+        for mascara in self.erros.values():
+            for i, e in enumerate(mascara):
+                if e:
+                    m[i] = 0
+        return m
+
+    def total_invalidos(self) -> int:
+        return self.n - sum(self.validos())
+
+
+def validar_lote(
+    registros: Union[Sequence[Dict[str, Any]], Dict[str, Sequence[Any]]],
+    agenda: str,
+) -> ResultadoLote:
+    """
+    Valida turno, data (formato + janela de agendamento + calendário), e-mail e telefone de
+    vários registros numa passada por campo. `registros` pode ser uma
+    lista de dicts (linhas) ou um dict de colunas {campo: [valores]}.
+    `agenda` é a regra ("visita"/"pesquisa") ou o tipo ("escola", ...).
+    """
+    if isinstance(registros, dict):
+        n = max((len(v) for v in registros.values()), default=0)
+
+        def coluna(c: str) -> Iterable[Any]:
+            return registros.get(c) or [None] * n
+    else:
+        linhas = registros if isinstance(registros, list) else list(registros)
+        n = len(linhas)
+
+        def coluna(c: str) -> Iterable[Any]:
+            return [r.get(c) for r in linhas]
+
+    aberto = get_calendario().aberto
+    ini, fim = janela_agendamento()
+    turno_get = _TURNOS.get
+    email_ok = _RE_EMAIL.fullmatch
+    tel_ok = validar_telefone  # um match por linha; o fallback só conta dígitos
+
+    turnos = [turno_get(t) or turno_get(_texto(t).strip().lower()) for t in coluna("turno")]
+
+    # cache local do lote: a mesma string de data só passa pelo parser uma vez
+    vistas: Dict[Any, Optional[date]] = {}
+    datas = []
+    for v in coluna("data"):
+        try:
+            d = vistas[v]
+        except KeyError:
+            d = vistas[v] = parse_data(v)
+        except TypeError:  # valor não-hashable
+            d = None
+        datas.append(d)
+
+    erros = {
+        "turno": bytearray(t is None for t in turnos),
+        "data": bytearray(
+            ERRO if d is None
+            else FORA_DA_JANELA if not ini <= d <= fim
+            else 0 if aberto(agenda, d, t) else DATA_FECHADA
+            for d, t in zip(datas, turnos)
+        ),
+        "email": bytearray(email_ok(_texto(e)) is None for e in coluna("email")),
+        "telefone": bytearray(
+            not tel_ok(_texto(t)) for t in coluna("telefone")
+        ),
+    }
+    isos = {d: d.isoformat() for d in set(datas) if d is not None}
+    return ResultadoLote(n, erros, [isos.get(d) for d in datas], turnos)
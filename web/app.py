@@ -1,44 +1,46 @@
-from flask import Flask, render_template, request, redirect, url_for, flash
+from flask import Flask, render_template, request, redirect, url_for, flash, g, Response
 import os
 import sys
-from datetime import datetime, date
-from typing import Dict, Any, Optional
+import threading
+import time
+import uuid
+from functools import wraps
+from datetime import date
+from typing import Optional
 
 # permite importar database.py que está fora da pasta web/
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-# init_db e get_connection podem não existir se DATABASE_URL não for usado
-try:
-    from database import init_db, get_connection
-except Exception:
-    def init_db():
-        raise RuntimeError("init_db indisponível.")
-
-    def get_connection():
-        raise RuntimeError("get_connection indisponível.")
-
 # Funções runtime (Supabase)
 from database import (
-    insert_visitante,
-    insert_escola,
-    insert_ies,
-    insert_pesquisador,
-    list_visitantes
+    inserir,
+    inserir_lote,
+    get_ocupacao,
+    disponibilidade,
+    iniciar_spool,
+    status_envio,
+    ultimos_registros,
+    listar_pagina,
+    get_usuario,
+    estado_circuito,
+    get_spool,
+    novo_envio,
+    USAR_SPOOL,
+    CAMPO_NOME,
 )
 
-# Cliente Supabase
+# Estatísticas do pool de clientes Supabase
 try:
-    from supabase_client import supabase
+    from supabase_client import estatisticas_pool
 except Exception:
-    supabase = None
-
-from utils.validacoes import (
-    validar_email,
-    validar_telefone,
-    validar_data_visita,
-    validar_data_pesquisa,
-    normalizar_turno
-)
+    def estatisticas_pool():
+        return {}
+
+from models.esquema import ESQUEMAS
+from utils.capacidade import TurnoLotado
+from utils.validacoes import parse_data, parse_mes
+from utils.importacao import importar, ler_registros
+from utils import metricas
 
 app = Flask(__name__)
 app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET", "fcja-secret")
@@ -57,14 +59,8 @@ def _mask_url(u: str) -> str:
 
 
 def _parse_date(d: str) -> Optional[date]:
-    if not d:
-        return None
-    try:
-        if "/" in d:
-            return datetime.strptime(d, "%d/%m/%Y").date()
-        return datetime.strptime(d, "%Y-%m-%d").date()
-    except Exception:
-        return None
+    # AAAA-MM-DD ou DD/MM/AAAA (conversão memorizada em utils/validacoes)
+    return parse_data(d) if d else None
 
 
 def safe_int(value, default=0):
@@ -73,26 +69,87 @@ def safe_int(value, default=0):
     except Exception:
         return default
 
+def admin_requerido(f):
+    """Exige HTTP Basic com um usuário da tabela 'usuarios'."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        auth = request.authorization
+        if not auth or not get_usuario(auth.username or "", auth.password or ""):
+            return (
+                {"erro": "autenticação necessária"},
+                401,
+                {"WWW-Authenticate": 'Basic realm="FCJA"'},
+            )
+        return f(*args, **kwargs)
+    return wrapper
+
 # -----------------------------------------------------
-# Inicialização (executa apenas 1 vez)
+# Inicialização (executa apenas 1 vez, no worker)
 # -----------------------------------------------------
+# Importar este módulo não abre conexões: o cliente Supabase e o índice de
+# ocupação são criados no primeiro uso. Na primeira requisição o worker
+# inicia o spool e aquece esses dois em segundo plano, sem atrasar a resposta.
+PREAQUECER = os.getenv("PREAQUECER", "1").lower() in {"1", "true", "sim"}
 _boot_done = False
+_boot_lock = threading.Lock()
+
+def _preaquecer():
+    try:
+        get_ocupacao()
+    except Exception as e:
+        print("pré-aquecimento falhou:", e)
 
 @app.before_request
 def _boot_once():
     global _boot_done
     if _boot_done:
         return
-    _boot_done = True
+    with _boot_lock:
+        if _boot_done:
+            return
+        _boot_done = True
 
     print("Inicializando aplicação FCJA...")
     print("SUPABASE:", _mask_url(os.getenv("SUPABASE_URL", "")))
 
     try:
-        init_db()
-        print("init_db: OK")
+        iniciar_spool()
     except Exception as e:
-        print("init_db ignorado:", e)
+        print("spool não iniciado:", e)
+
+    if PREAQUECER:
+        threading.Thread(target=_preaquecer, name="fcja-preaquecer", daemon=True).start()
+
+# -----------------------------------------------------
+# MÉTRICAS (latência por rota, requisições em andamento)
+# -----------------------------------------------------
+def _rota() -> str:
+    return request.url_rule.rule if request.url_rule else "<sem rota>"
+
+@app.before_request
+def _metricas_inicio():
+    g._t0 = time.perf_counter()
+    metricas.HTTP_EM_ANDAMENTO.inc()
+
+@app.after_request
+def _metricas_fim(resp):
+    metricas.HTTP_LATENCIA.labels(_rota(), request.method, str(resp.status_code)).observe(
+        time.perf_counter() - g._t0
+    )
+    g._medido = True
+    return resp
+
+@app.teardown_request
+def _metricas_teardown(exc):
+    if "_t0" not in g:
+        return
+    metricas.HTTP_EM_ANDAMENTO.dec()
+    if not g.get("_medido"):
+        # exceção não tratada: after_request não rodou
+        metricas.HTTP_ERROS.labels(_rota()).inc()
+        metricas.HTTP_LATENCIA.labels(_rota(), request.method, "500").observe(
+            time.perf_counter() - g._t0
+        )
 
 # -----------------------------------------------------
 # ROTAS PRINCIPAIS
@@ -104,139 +161,202 @@ def index():
 
 @app.get("/agendar/<tipo>")
 def agendar_form(tipo):
-    if tipo not in {"visitante", "escola", "ies", "pesquisador"}:
+    if tipo not in ESQUEMAS:
         return redirect(url_for("index"))
-    return render_template("form.html", tipo=tipo)
+    return render_template(
+        "form.html", tipo=tipo, idem_token=uuid.uuid4().hex, campo_qtd=ESQUEMAS[tipo].campo_qtd
+    )
 
 
 @app.post("/agendar/<tipo>")
 def agendar_submit(tipo):
-    if tipo not in {"visitante", "escola", "ies", "pesquisador"}:
+    if tipo not in ESQUEMAS:
         flash("Tipo inválido", "danger")
         return redirect(url_for("index"))
 
-    data = request.form.to_dict()
-    turno = normalizar_turno(data.get("turno"))
-    data_str = (data.get("data") or "").strip()
-    d = _parse_date(data_str)
-
-    if not turno:
-        flash("Turno inválido", "danger")
-        return redirect(request.url)
-
-    if not d:
-        flash("Data inválida", "danger")
-        return redirect(request.url)
-
-    if tipo in {"visitante", "escola", "ies"}:
-        if not validar_data_visita(data_str):
-            flash("Data inválida para visita", "danger")
-            return redirect(request.url)
-    else:
-        if not validar_data_pesquisa(data_str):
-            flash("Data inválida para pesquisa", "danger")
-            return redirect(request.url)
+    # reenvio do mesmo formulário (duplo clique, refresh): devolve o resultado original
+    envio = novo_envio(request.form.get("idem_token"))
+    anterior = envio.reservar_token()
+    if anterior:
+        flash(anterior["mensagem"], anterior["categoria"])
+        return redirect(url_for("index"))
 
-    if not validar_email(data.get("email", "")):
-        flash("E-mail inválido", "danger")
+    # validação + normalização + payload numa passada só (models/esquema.py)
+    payload, erro = ESQUEMAS[tipo].preparar(request.form)
+    if erro:
+        envio.liberar()
+        flash(erro, "danger")
         return redirect(request.url)
 
-    if not validar_telefone(data.get("telefone", "")):
-        flash("Telefone inválido", "danger")
-        return redirect(request.url)
+    # mesmo e-mail/data/turno/tipo dentro da janela de deduplicação
+    anterior = envio.reservar_conteudo(tipo, payload)
+    if anterior:
+        flash(anterior["mensagem"], anterior["categoria"])
+        return redirect(url_for("index"))
 
+    # capacidade do turno: inserir() reserva a vaga no índice (atômico) e o
+    # gatilho do banco garante o limite entre workers (utils/capacidade.py)
     try:
-        novo = None
-
-        if tipo == "visitante":
-            novo = insert_visitante({
-                "nome": data.get("nome"),
-                "genero": data.get("genero"),
-                "email": data.get("email"),
-                "telefone": data.get("telefone"),
-                "endereco": data.get("endereco"),
-                "qtd_pessoas": safe_int(data.get("qtd_pessoas"), 1),
-                "data": d.isoformat(),
-                "turno": turno,
-                "horario_chegada": data.get("horario_chegada"),
-                "duracao": data.get("duracao"),
-                "observacao": data.get("observacao"),
-            })
-
-        elif tipo == "escola":
-            novo = insert_escola({
-                "nome_escola": data.get("nome_escola"),
-                "representante": data.get("representante"),
-                "email": data.get("email"),
-                "telefone": data.get("telefone"),
-                "endereco": data.get("endereco"),
-                "num_alunos": safe_int(data.get("num_alunos"), 0),
-                "data": d.isoformat(),
-                "turno": turno,
-                "horario_chegada": data.get("horario_chegada"),
-                "duracao": data.get("duracao"),
-                "observacao": data.get("observacao"),
-            })
-
-        elif tipo == "ies":
-            novo = insert_ies({
-                "nome_ies": data.get("nome_ies"),
-                "representante": data.get("representante") or data.get("responsavel"),
-                "email": data.get("email"),
-                "telefone": data.get("telefone"),
-                "endereco": data.get("endereco"),
-                "num_alunos": safe_int(data.get("num_alunos"), 0),
-                "data": d.isoformat(),
-                "turno": turno,
-                "horario_chegada": data.get("horario_chegada"),
-                "duracao": data.get("duracao"),
-                "observacao": data.get("observacao"),
-            })
-
-        else:  # pesquisador
-            novo = insert_pesquisador({
-                "nome": data.get("nome"),
-                "genero": data.get("genero"),
-                "email": data.get("email"),
-                "telefone": data.get("telefone"),
-                "instituicao": data.get("instituicao"),
-                "pesquisa": data.get("pesquisa"),
-                "data": d.isoformat(),
-                "turno": turno,
-                "horario_chegada": data.get("horario_chegada"),
-                "duracao": data.get("duracao"),
-                "observacao": data.get("observacao"),
-            })
-
-        if novo:
-            flash("Agendamento enviado com sucesso!", "success")
-        else:
-            flash("Erro ao salvar no banco.", "danger")
-
+        novo = inserir(tipo, payload, preparado=True)
+    except TurnoLotado as e:
+        envio.liberar()
+        flash(str(e), "danger")
+        return redirect(request.url)
     except Exception as e:
         print("Erro:", e)
+        envio.liberar()
         flash("Erro interno ao salvar.", "danger")
+        return redirect(url_for("index"))
 
+    if novo:
+        resultado = {"mensagem": "Agendamento enviado com sucesso!", "categoria": "success"}
+        envio.concluir(resultado)
+        flash(resultado["mensagem"], resultado["categoria"])
+    else:
+        # falhou: libera as chaves para o usuário poder tentar de novo
+        envio.liberar()
+        flash("Erro ao salvar no banco.", "danger")
     return redirect(url_for("index"))
 
+# -----------------------------------------------------
+# DISPONIBILIDADE DO MÊS (usada pelo formulário)
+# -----------------------------------------------------
+@app.get("/api/disponibilidade/<tipo>")
+def api_disponibilidade(tipo):
+    """
+    ?mes=AAAA-MM (padrão: mês atual). Para cada dia: aberto/fechado,
+    motivo do fechamento e vagas restantes por turno. Responde 304 se o
+    If-None-Match bater com o ETag.
+    """
+    if tipo not in ESQUEMAS:
+        return {"erro": "tipo inválido"}, 404
+    hoje = date.today()
+    ano_mes = parse_mes(request.args["mes"]) if request.args.get("mes") else (hoje.year, hoje.month)
+    if not ano_mes:
+        return {"erro": "mes inválido (use AAAA-MM)"}, 400
+
+    corpo, etag = disponibilidade(tipo, *ano_mes)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(corpo, mimetype="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True  # sempre revalida; o 304 sai sem corpo
+    return resp
+
+# -----------------------------------------------------
+# STATUS DE ENVIO (SPOOL)
+# -----------------------------------------------------
+@app.get("/envio/<int:envio_id>")
+def envio_status(envio_id):
+    st = status_envio(envio_id)
+    if not st:
+        return {"erro": "envio não encontrado"}, 404
+    return {"id": st["id"], "status": st["status"], "tentativas": st["tentativas"]}, 200
+
 # -----------------------------------------------------
 # ÚLTIMOS REGISTROS (ADMIN)
 # -----------------------------------------------------
 @app.get("/ultimos")
 def ultimos():
-    dados: Dict[str, Any] = {}
-
-    if supabase:
-        for t in ["visitante", "escola", "ies", "pesquisador"]:
-            try:
-                resp = supabase.table(t).select("*").order("id", desc=True).limit(5).execute()
-                dados[t] = resp.data or []
-            except Exception:
-                dados[t] = []
-    else:
-        dados = {t: [] for t in ["visitante", "escola", "ies", "pesquisador"]}
+    dados = ultimos_registros(5)
+
+    registros = []
+    for t, linhas in dados.items():
+        for r in linhas:
+            registros.append({
+                "tipo": t,
+                "nome": r.get(CAMPO_NOME[t]),
+                "data": r.get("data"),
+                "turno": r.get("turno"),
+                "email": r.get("email"),
+                "telefone": r.get("telefone"),
+            })
+
+    return render_template("ultimos.html", registros=registros)
+
+# -----------------------------------------------------
+# API JSON PAGINADA (ADMIN)
+# -----------------------------------------------------
+@app.get("/api/<tipo>")
+@admin_requerido
+def api_listar(tipo):
+    """
+    Parâmetros (query string):
+      colunas=id,nome,data   projeção (padrão: todas)
+      desde=AAAA-MM-DD       data inicial (inclusive)
+      ate=AAAA-MM-DD         data final (inclusive)
+      ordem=-id|id|-data|data
+      limite=50              máx. 500
+      cursor=<token>         valor de "proximo" da página anterior
+      busca=jose silva       texto em nome/instituição, e-mail, telefone e observação
+    """
+    if tipo not in ESQUEMAS:
+        return {"erro": "tipo inválido"}, 404
+
+    args = request.args
+    colunas = [c.strip() for c in (args.get("colunas") or "").split(",") if c.strip()]
+    limite = min(max(safe_int(args.get("limite"), 50), 1), 500)
+
+    desde = ate = None
+    if args.get("desde"):
+        desde = _parse_date(args["desde"])
+        if not desde:
+            return {"erro": "desde inválido"}, 400
+    if args.get("ate"):
+        ate = _parse_date(args["ate"])
+        if not ate:
+            return {"erro": "ate inválido"}, 400
+
+    try:
+        pagina = listar_pagina(
+            tipo,
+            colunas=colunas or None,
+            limite=limite,
+            cursor=args.get("cursor") or None,
+            desde=desde.isoformat() if desde else None,
+            ate=ate.isoformat() if ate else None,
+            ordem=args.get("ordem") or "-id",
+            busca=args.get("busca") or None,
+        )
+    except (ValueError, TypeError) as e:
+        return {"erro": str(e)}, 400
+
+    if pagina is None:
+        return {"erro": "banco indisponível"}, 503
+    return pagina, 200
+
+# -----------------------------------------------------
+# IMPORTAÇÃO EM LOTE (ADMIN)
+# -----------------------------------------------------
+@app.route("/importar", methods=["GET", "POST"])
+@admin_requerido
+def importar_lote():
+    if request.method == "GET":
+        return render_template("importar.html", tipos=ESQUEMAS, resultado=None)
+
+    tipo = request.form.get("tipo")
+    arquivo = request.files.get("arquivo")
+    if tipo not in ESQUEMAS or not arquivo or not arquivo.filename:
+        flash("Informe o tipo e o arquivo (.csv ou .xlsx).", "danger")
+        return redirect(url_for("importar_lote"))
+
+    simular = bool(request.form.get("simular"))
+    try:
+        resultado = importar(
+            tipo,
+            ler_registros(arquivo.stream, arquivo.filename, tipo),
+            None if simular else inserir_lote,
+            ocupacao=get_ocupacao(),
+        )
+    except Exception as e:
+        print("Erro importar_lote:", e)
+        flash(f"Erro ao ler o arquivo: {e}", "danger")
+        return redirect(url_for("importar_lote"))
 
-    return render_template("ultimos.html", dados=dados)
+    return render_template(
+        "importar.html", tipos=ESQUEMAS, resultado=resultado, tipo=tipo, simular=simular
+    )
 
 # -----------------------------------------------------
 # 🔥 HEALTH CHECK (PING)
@@ -246,7 +366,24 @@ def health():
     """
     Endpoint usado para manter a aplicação e o Supabase ativos.
     """
-    return {"status": "ok"}, 200
+    circuito = estado_circuito()
+    return {
+        "status": "ok" if circuito["estado"] == "fechado" else "degradado",
+        "circuito": circuito,
+        "supabase_pool": estatisticas_pool(),
+    }, 200
+
+@app.get("/metrics")
+def metrics():
+    """Métricas no formato texto do Prometheus."""
+    metricas.CIRCUITO_ABERTO.set(0 if estado_circuito()["estado"] == "fechado" else 1)
+    if USAR_SPOOL:
+        try:
+            metricas.SPOOL_PENDENTES.set(get_spool().pendentes())
+        except Exception as e:
+            print("Erro ao contar spool:", e)
+    corpo, content_type = metricas.exportar()
+    return Response(corpo, mimetype=None, content_type=content_type)
 
 # -----------------------------------------------------
 if __name__ == "__main__":
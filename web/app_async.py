@@ -0,0 +1,201 @@
+"""
+Modo assíncrono (ASGI) do site de agendamentos.
+
+Serve as mesmas páginas públicas de web/app.py (início, formulários,
+envio e /ultimos), mas com views async e o cliente Supabase assíncrono:
+enquanto uma requisição espera o Supabase, o worker atende outras.
+As rotas administrativas (/api, /importar, /envio) continuam no app Flask.
+
+Execução (ver Procfile.async e requirements-async.txt):
+    gunicorn web.app_async:app -k uvicorn.workers.UvicornWorker --workers 2 --bind 0.0.0.0:$PORT
+ou, em desenvolvimento:
+    uvicorn web.app_async:app --reload
+"""
+import asyncio
+import os
+import sys
+import time
+import uuid
+from datetime import date
+
+from quart import Quart, Response, g, render_template, request, redirect, url_for, flash
+
+# permite importar database.py que está fora da pasta web/
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+import database_async as db
+from database import estado_circuito, iniciar_spool, novo_envio
+from models.esquema import ESQUEMAS
+from utils.capacidade import TurnoLotado
+from utils.validacoes import parse_mes
+from utils import metricas
+
+app = Quart(__name__)
+app.config["SECRET_KEY"] = os.getenv("FLASK_SECRET", "fcja-secret")
+
+
+@app.before_serving
+async def _boot():
+    print("Inicializando aplicação FCJA (ASGI)...")
+    try:
+        iniciar_spool()
+    except Exception as e:
+        print("spool não iniciado:", e)
+
+# -----------------------------------------------------
+# MÉTRICAS (latência por rota, requisições em andamento; como em web/app.py)
+# -----------------------------------------------------
+def _rota() -> str:
+    return request.url_rule.rule if request.url_rule else "<sem rota>"
+
+
+@app.before_request
+async def _metricas_inicio():
+    g._t0 = time.perf_counter()
+    metricas.HTTP_EM_ANDAMENTO.inc()
+
+
+@app.after_request
+async def _metricas_fim(resp):
+    metricas.HTTP_LATENCIA.labels(_rota(), request.method, str(resp.status_code)).observe(
+        time.perf_counter() - g._t0
+    )
+    g._medido = True
+    return resp
+
+
+@app.teardown_request
+async def _metricas_teardown(exc):
+    if "_t0" not in g:
+        return
+    metricas.HTTP_EM_ANDAMENTO.dec()
+    if not g.get("_medido"):
+        # exceção não tratada: after_request não rodou
+        metricas.HTTP_ERROS.labels(_rota()).inc()
+        metricas.HTTP_LATENCIA.labels(_rota(), request.method, "500").observe(
+            time.perf_counter() - g._t0
+        )
+
+# -----------------------------------------------------
+# ROTAS PRINCIPAIS
+# -----------------------------------------------------
+@app.get("/")
+async def index():
+    return await render_template("index.html")
+
+
+@app.get("/agendar/<tipo>")
+async def agendar_form(tipo):
+    if tipo not in ESQUEMAS:
+        return redirect(url_for("index"))
+    return await render_template(
+        "form.html", tipo=tipo, idem_token=uuid.uuid4().hex, campo_qtd=ESQUEMAS[tipo].campo_qtd
+    )
+
+
+@app.post("/agendar/<tipo>")
+async def agendar_submit(tipo):
+    if tipo not in ESQUEMAS:
+        await flash("Tipo inválido", "danger")
+        return redirect(url_for("index"))
+
+    form = await request.form
+    # registro de idempotência em SQLite local: síncrono -> fora do event loop
+    envio = novo_envio(form.get("idem_token"))
+    anterior = await asyncio.to_thread(envio.reservar_token)
+    if anterior:
+        await flash(anterior["mensagem"], anterior["categoria"])
+        return redirect(url_for("index"))
+
+    payload, erro = ESQUEMAS[tipo].preparar(form)
+    if erro:
+        await asyncio.to_thread(envio.liberar)
+        await flash(erro, "danger")
+        return redirect(request.url)
+
+    anterior = await asyncio.to_thread(envio.reservar_conteudo, tipo, payload)
+    if anterior:
+        await flash(anterior["mensagem"], anterior["categoria"])
+        return redirect(url_for("index"))
+
+    # reserva da vaga + limite no banco, como no app Flask (utils/capacidade.py)
+    try:
+        novo = await db.inserir(tipo, payload)
+    except TurnoLotado as e:
+        await asyncio.to_thread(envio.liberar)
+        await flash(str(e), "danger")
+        return redirect(request.url)
+    except Exception as e:
+        print("Erro:", e)
+        await asyncio.to_thread(envio.liberar)
+        await flash("Erro interno ao salvar.", "danger")
+        return redirect(url_for("index"))
+    if novo:
+        resultado = {"mensagem": "Agendamento enviado com sucesso!", "categoria": "success"}
+        await asyncio.to_thread(envio.concluir, resultado)
+        await flash(resultado["mensagem"], resultado["categoria"])
+    else:
+        await asyncio.to_thread(envio.liberar)
+        await flash("Erro ao salvar no banco.", "danger")
+    return redirect(url_for("index"))
+
+# -----------------------------------------------------
+# DISPONIBILIDADE DO MÊS (usada pelo formulário)
+# -----------------------------------------------------
+@app.get("/api/disponibilidade/<tipo>")
+async def api_disponibilidade(tipo):
+    if tipo not in ESQUEMAS:
+        return {"erro": "tipo inválido"}, 404
+    hoje = date.today()
+    ano_mes = parse_mes(request.args["mes"]) if request.args.get("mes") else (hoje.year, hoje.month)
+    if not ano_mes:
+        return {"erro": "mes inválido (use AAAA-MM)"}, 400
+
+    corpo, etag = await db.disponibilidade(tipo, *ano_mes)
+    if request.if_none_match.contains(etag):
+        resp = Response(b"", status=304)
+    else:
+        resp = Response(corpo, content_type="application/json")
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True
+    return resp
+
+# -----------------------------------------------------
+# ÚLTIMOS REGISTROS (ADMIN)
+# -----------------------------------------------------
+@app.get("/ultimos")
+async def ultimos():
+    dados = await db.ultimos_registros(5)
+
+    registros = []
+    for t, linhas in dados.items():
+        for r in linhas:
+            registros.append({
+                "tipo": t,
+                "nome": r.get(db.CAMPO_NOME[t]),
+                "data": r.get("data"),
+                "turno": r.get("turno"),
+                "email": r.get("email"),
+                "telefone": r.get("telefone"),
+            })
+
+    return await render_template("ultimos.html", registros=registros)
+
+# -----------------------------------------------------
+# HEALTH CHECK (PING)
+# -----------------------------------------------------
+@app.get("/health")
+async def health():
+    circuito = estado_circuito()
+    return {
+        "status": "ok" if circuito["estado"] == "fechado" else "degradado",
+        "circuito": circuito,
+        "modo": "asgi",
+    }, 200
+
+
+@app.get("/metrics")
+async def metrics():
+    metricas.CIRCUITO_ABERTO.set(0 if estado_circuito()["estado"] == "fechado" else 1)
+    corpo, content_type = metricas.exportar()
+    return Response(corpo, content_type=content_type)